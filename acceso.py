@@ -0,0 +1,171 @@
+from functools import wraps
+
+from flask import g, jsonify, request
+from flask_jwt_extended import get_jwt_identity
+
+from cache import TTLCache, crear_backend_compartido
+from catalogo import catalogo
+from config import Config
+from estadisticas import DESDE_CRITERIOS, DESDE_EJECUCIONES, DESDE_REQUERIMIENTOS, DESDE_SUBPROCESOS
+from extensions import get_db_connection
+
+# Mapa de membresia por usuario: proyecto_id -> [rol_id, es_creador]. rol_id es
+# None si solo lo creo. Lo invalidan los handlers que cambian la relacion
+# usuario-proyecto; ttl cubre el resto. Las claves van como texto para que el
+# valor sobreviva igual al backend compartido (JSON). Decide autorizaciones:
+# con Redis no tiene nivel en memoria y quitar a alguien de un proyecto vale en
+# todos los workers al invalidar. Sin Redis cada worker guarda el mapa
+# ACCESO_CACHE_TTL_LOCAL segundos, que es lo que puede tardar una baja en
+# llegar a los workers que no atendieron el cambio.
+cache_membresias = TTLCache(
+    'membresias',
+    maxsize=Config.ACCESO_CACHE_SIZE,
+    ttl=Config.ACCESO_CACHE_TTL,
+    compartido=crear_backend_compartido(Config.CACHE_REDIS_URL, 'gestproy:membresias'),
+    local=False,
+    ttl_local=Config.ACCESO_CACHE_TTL_LOCAL
+)
+
+# Proyecto dueno de cada entidad hija. Los padres no se reasignan y los ids no
+# se reutilizan, asi que la resolucion se puede cachear sin invalidar.
+cache_proyecto_de = TTLCache('proyecto_de', maxsize=Config.ACCESO_CACHE_SIZE, ttl=Config.ACCESO_CACHE_TTL)
+
+ENTIDADES = {
+    'proceso': "SELECT proyecto_id FROM procesos WHERE id = %s",
+    'subproceso': f"SELECT p.proyecto_id FROM {DESDE_SUBPROCESOS} WHERE s.id = %s",
+    'subproceso_tecnica': f"""SELECT p.proyecto_id FROM subproceso_tecnicas st
+        JOIN {DESDE_SUBPROCESOS} ON st.subproceso_id = s.id WHERE st.id = %s""",
+    'requerimiento': f"SELECT p.proyecto_id FROM {DESDE_REQUERIMIENTOS} WHERE r.id = %s",
+    'criterio': f"SELECT p.proyecto_id FROM {DESDE_CRITERIOS} WHERE c.id = %s",
+    'ejecucion': f"SELECT p.proyecto_id FROM {DESDE_EJECUCIONES} WHERE e.id = %s",
+    'stakeholder': "SELECT proyecto_id FROM stakeholders WHERE id = %s",
+    'diagrama': "SELECT proyecto_id FROM diagramas WHERE id = %s",
+    'rol': "SELECT proyecto_id FROM roles WHERE id = %s",
+    'miembro': "SELECT proyecto_id FROM miembros_proyecto WHERE id = %s",
+}
+
+
+# Cada rama usa su propio indice: el cubriente (usuario_id, proyecto_id, rol_id)
+# de miembros_proyecto e idx_proyectos_creador_eliminado. Los proyectos
+# marcados como eliminados quedan fuera, asi que el decorador los rechaza y
+# los listados no los ven mientras se purgan.
+SQL_MEMBRESIAS = """
+    SELECT mp.proyecto_id, mp.rol_id, FALSE AS creador FROM miembros_proyecto mp
+    JOIN proyectos p ON p.id = mp.proyecto_id
+    WHERE mp.usuario_id = %s AND p.eliminado_en IS NULL
+    UNION ALL
+    SELECT id, NULL, TRUE FROM proyectos WHERE creado_por = %s AND eliminado_en IS NULL
+"""
+
+
+def armar_mapa(filas):
+    mapa = {}
+    for fila in filas:
+        entrada = mapa.setdefault(str(fila['proyecto_id']), [None, False])
+        if fila['creador']:
+            entrada[1] = True
+        else:
+            entrada[0] = fila['rol_id']
+    return mapa
+
+
+def consultar_membresias(cursor, usuario_id):
+    cursor.execute(SQL_MEMBRESIAS, (usuario_id, usuario_id))
+    return armar_mapa(cursor.fetchall())
+
+
+def membresias(cursor, usuario_id):
+    usuario_id = int(usuario_id)
+    por_peticion = g.setdefault('membresias', {})
+    mapa = por_peticion.get(usuario_id)
+    if mapa is None:
+        mapa = cache_membresias.get_or_load(usuario_id, lambda: consultar_membresias(cursor, usuario_id))
+        por_peticion[usuario_id] = mapa
+    return mapa
+
+
+def proyectos_accesibles(cursor, usuario_id):
+    return {int(proyecto_id) for proyecto_id in membresias(cursor, usuario_id)}
+
+
+def invalidar_membresias(*usuario_ids):
+    por_peticion = g.get('membresias', {})
+    for usuario_id in usuario_ids:
+        cache_membresias.invalidate(int(usuario_id))
+        por_peticion.pop(int(usuario_id), None)
+
+
+def proyecto_de(cursor, entidad, id):
+    def cargar():
+        cursor.execute(ENTIDADES[entidad], (id,))
+        fila = cursor.fetchone()
+        return fila['proyecto_id'] if fila else None
+
+    return cache_proyecto_de.get_or_load(f'{entidad}:{id}', cargar)
+
+
+# El valor sale de donde lo lee el handler: la ruta, el cuerpo JSON en los
+# metodos que lo llevan y la query en el resto. Si otra fuente trae un valor
+# distinto se rechaza con 400; si no, el decorador podria autorizar un
+# proyecto y el handler actuar sobre otro. Devuelve (valor, error).
+def _valor_de_peticion(arg):
+    cuerpo = request.get_json(silent=True) if request.method in ('POST', 'PUT', 'PATCH') else None
+    fuentes = [
+        (request.view_args or {}).get(arg),
+        cuerpo.get(arg) if isinstance(cuerpo, dict) else None,
+        request.args.get(arg, type=int),
+    ]
+    presentes = [valor for valor in fuentes if valor is not None]
+    if len({str(valor).strip() for valor in presentes}) > 1:
+        return None, (jsonify({'error': f'{arg} no coincide entre la ruta, la consulta y el cuerpo'}), 400)
+    return (presentes[0] if presentes else None), None
+
+
+def denegar(membresia, roles=()):
+    if membresia is None:
+        return jsonify({'error': 'No tienes acceso a este proyecto'}), 403
+
+    rol_id, creador = membresia
+    if roles and not creador:
+        permitidos = {r['id'] for r in map(catalogo.rol_fijo_por_nombre, roles) if r}
+        if rol_id not in permitidos:
+            return jsonify({'error': f"Se requiere el rol {' o '.join(roles)}"}), 403
+    return None
+
+
+# Restringe el handler a miembros (o al creador) del proyecto al que pertenece
+# el recurso. entidad indica como llegar al proyecto desde arg (parametro de
+# ruta, cuerpo JSON o query, ver _valor_de_peticion); sin entidad, arg es
+# directamente el proyecto_id.
+# Si el valor no viene o la entidad no existe se deja pasar: el propio handler
+# responde 400/404. role acepta uno o varios nombres de roles fijos y el
+# creador del proyecto los cumple todos. Va debajo de @jwt_required().
+def requires_project_member(role=None, entidad=None, arg=None):
+    roles = (role,) if isinstance(role, str) else tuple(role or ())
+    arg = arg or ('id' if entidad else 'proyecto_id')
+
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            valor, error = _valor_de_peticion(arg)
+            if error:
+                return error
+            if valor is None:
+                return vista(*args, **kwargs)
+
+            cursor = get_db_connection().cursor(dictionary=True)
+            try:
+                proyecto_id = proyecto_de(cursor, entidad, valor) if entidad else valor
+                if proyecto_id is None:
+                    return vista(*args, **kwargs)
+                membresia = membresias(cursor, get_jwt_identity()).get(str(proyecto_id))
+            finally:
+                cursor.close()
+
+            denegado = denegar(membresia, roles)
+            if denegado:
+                return denegado
+
+            return vista(*args, **kwargs)
+        return envoltura
+    return decorador
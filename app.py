@@ -1,19 +1,36 @@
-from flask import Flask
+from flask import Flask, jsonify
 from flask_cors import CORS
+from flask_jwt_extended import jwt_required
+from cache import CACHES
+from catalogo import catalogo
 from config import Config
-from extensions import jwt, bcrypt
+from db_pool import PoolTimeoutError
+from eliminacion import purgar_proyectos
+from estadisticas import reconstruir_estadisticas
+from pagination import CursorInvalido
+from extensions import jwt, bcrypt, init_db_pool
+from hashing import HashingSaturado, hasher
+from importacion import importar_proyecto
+from serializers import crear_json_provider
+from sql_metrics import registrar_respuesta
+from tareas import procesar_trabajos
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.json = crear_json_provider(app)
     jwt.init_app(app)
     bcrypt.init_app(app)
+    hasher.init_app(app)
+    db_pool = init_db_pool(app)
+    catalogo.init_app(app)
 
     CORS(app, resources={
         r"/api/*": {
             "origins": ["http://localhost:4200", "http://127.0.0.1:4200"],
-            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"]
+            "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+            "allow_headers": ["Content-Type", "Authorization", "If-None-Match", "Idempotency-Key"],
+            "expose_headers": ["X-Next-Cursor", "ETag", "Server-Timing", "Location"]
         }
     })
     
@@ -30,6 +47,8 @@ def create_app():
     from requerimientos.routes import requerimientos_bp
     from ejecuciones.routes import ejecuciones_bp
     from diagramas.routes import diagramas_bp
+    from busqueda.routes import busqueda_bp
+    from trabajos.routes import trabajos_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(usuarios_bp, url_prefix='/api/usuarios')
@@ -44,6 +63,42 @@ def create_app():
     app.register_blueprint(requerimientos_bp, url_prefix='/api/requerimientos')
     app.register_blueprint(ejecuciones_bp, url_prefix='/api/ejecuciones')
     app.register_blueprint(diagramas_bp, url_prefix='/api/diagramas')
+    app.register_blueprint(busqueda_bp, url_prefix='/api/busqueda')
+    app.register_blueprint(trabajos_bp, url_prefix='/api/jobs')
+
+    app.cli.add_command(reconstruir_estadisticas)
+    app.cli.add_command(importar_proyecto)
+    app.cli.add_command(purgar_proyectos)
+    app.cli.add_command(procesar_trabajos)
+
+    app.after_request(registrar_respuesta)
+
+    @app.errorhandler(PoolTimeoutError)
+    def pool_agotado(e):
+        return jsonify({'error': 'Servicio saturado, intente nuevamente'}), 503
+
+    @app.errorhandler(HashingSaturado)
+    def hashing_saturado(e):
+        return jsonify({'error': 'Servicio saturado, intente nuevamente'}), 503, {'Retry-After': '1'}
+
+    @app.errorhandler(CursorInvalido)
+    def cursor_invalido(e):
+        return jsonify({'error': str(e)}), 400
+
+    @app.route('/api/health/db-pool', methods=['GET'])
+    @jwt_required()
+    def estado_pool():
+        return jsonify(db_pool.stats()), 200
+
+    @app.route('/api/health/hashing', methods=['GET'])
+    @jwt_required()
+    def estado_hashing():
+        return jsonify(hasher.stats()), 200
+
+    @app.route('/api/health/caches', methods=['GET'])
+    @jwt_required()
+    def estado_caches():
+        return jsonify({nombre: c.stats() for nombre, c in CACHES.items()}), 200
     
     return app
 
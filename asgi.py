@@ -0,0 +1,181 @@
+import re
+
+import aiomysql
+from asgiref.wsgi import WsgiToAsgi
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+from acceso import ENTIDADES, SQL_MEMBRESIAS, armar_mapa, cache_membresias, cache_proyecto_de, denegar
+from app import create_app
+from ejecuciones import routes as ejecuciones
+from requerimientos import routes as requerimientos
+from serializers import serializar
+from sql_metrics import instrumentar_cursor_asincrono
+from streaming import stream_solicitado
+
+# Modo ASGI: uvicorn asgi:app. Los listados mas consultados se atienden aqui
+# con aiomysql y un pool propio, de modo que un proceso puede tener muchas
+# peticiones esperando a MySQL sin ocupar un hilo cada una. Todo lo demas
+# (escrituras, streaming, el resto de blueprints) pasa a la app Flask de
+# siempre a traves de WsgiToAsgi.
+#
+# Cada vista corre dentro de un contexto de peticion de Flask, asi que reusa
+# Pagina, el serializador, los manejadores de error y los after_request (CORS,
+# Server-Timing) sin cambios.
+
+
+async def proyecto_de(cursor, entidad, id):
+    clave = f'{entidad}:{id}'
+    proyecto_id = cache_proyecto_de.get(clave)
+    if proyecto_id is None:
+        await cursor.execute(ENTIDADES[entidad], (id,))
+        fila = await cursor.fetchone()
+        if fila is None:
+            return None
+        proyecto_id = fila['proyecto_id']
+        cache_proyecto_de.set(clave, proyecto_id)
+    return proyecto_id
+
+
+async def membresias(cursor, usuario_id):
+    mapa = cache_membresias.get(usuario_id)
+    if mapa is None:
+        await cursor.execute(SQL_MEMBRESIAS, (usuario_id, usuario_id))
+        mapa = armar_mapa(await cursor.fetchall())
+        cache_membresias.set(usuario_id, mapa)
+    return mapa
+
+
+# Equivalente asincrono de @requires_project_member para estas vistas.
+async def verificar_acceso(cursor, entidad, id):
+    proyecto_id = await proyecto_de(cursor, entidad, id)
+    if proyecto_id is None:
+        return None
+    mapa = await membresias(cursor, int(get_jwt_identity()))
+    return denegar(mapa.get(str(proyecto_id)))
+
+
+async def listar_requerimientos(cursor, pagina, consulta):
+    await cursor.execute(*consulta)
+    filas = serializar(cursor, await cursor.fetchall())
+
+    if not (pagina.incluye('criterios') and filas):
+        return pagina.respuesta(filas)
+
+    await cursor.execute(*requerimientos.consulta_criterios([f['id'] for f in filas]))
+    por_req = requerimientos.agrupar_criterios(await cursor.fetchall())
+
+    def enriquecer(pagina_filas):
+        for req in pagina_filas:
+            req['criterios'] = por_req.get(req['id'], [])
+
+    return pagina.respuesta(filas, enriquecer=enriquecer)
+
+
+async def requerimientos_por_subproceso(cursor, subproceso_id):
+    denegado = await verificar_acceso(cursor, 'subproceso', subproceso_id)
+    if denegado:
+        return denegado
+    pagina = requerimientos.pagina_por_subproceso()
+    return await listar_requerimientos(cursor, pagina, requerimientos.consulta_por_subproceso(pagina, subproceso_id))
+
+
+async def requerimientos_por_tecnica(cursor, subproceso_tecnica_id):
+    denegado = await verificar_acceso(cursor, 'subproceso_tecnica', subproceso_tecnica_id)
+    if denegado:
+        return denegado
+    pagina = requerimientos.pagina_por_tecnica()
+    return await listar_requerimientos(cursor, pagina, requerimientos.consulta_por_tecnica(pagina, subproceso_tecnica_id))
+
+
+async def ejecuciones_por_tecnica(cursor, subproceso_tecnica_id):
+    denegado = await verificar_acceso(cursor, 'subproceso_tecnica', subproceso_tecnica_id)
+    if denegado:
+        return denegado
+    pagina = ejecuciones.pagina_por_tecnica()
+    await cursor.execute(*ejecuciones.consulta_por_tecnica(pagina, subproceso_tecnica_id))
+    return pagina.respuesta(serializar(cursor, await cursor.fetchall()))
+
+
+RUTAS = [
+    (re.compile(r'^/api/requerimientos/subproceso/(\d+)$'), requerimientos_por_subproceso),
+    (re.compile(r'^/api/requerimientos/tecnica/(\d+)$'), requerimientos_por_tecnica),
+    (re.compile(r'^/api/ejecuciones/tecnica/(\d+)$'), ejecuciones_por_tecnica),
+]
+
+
+class AppASGI:
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.pool = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._ciclo_de_vida(receive, send)
+
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            for patron, vista in RUTAS:
+                m = patron.match(scope['path'])
+                if m:
+                    respuesta = await self._atender(vista, int(m.group(1)), scope)
+                    if respuesta is not None:
+                        return await self._enviar(respuesta, send)
+                    break
+
+        await self.wsgi(scope, receive, send)
+
+    async def _ciclo_de_vida(self, receive, send):
+        while True:
+            mensaje = await receive()
+            if mensaje['type'] == 'lifespan.startup':
+                config = self.flask_app.config
+                self.pool = await aiomysql.create_pool(
+                    host=config['MYSQL_HOST'],
+                    user=config['MYSQL_USER'],
+                    password=config['MYSQL_PASSWORD'],
+                    db=config['MYSQL_DATABASE'],
+                    minsize=config['ASYNC_DB_POOL_MIN'],
+                    maxsize=config['ASYNC_DB_POOL_SIZE'],
+                    pool_recycle=config['DB_POOL_RECYCLE'],
+                    autocommit=True
+                )
+                await send({'type': 'lifespan.startup.complete'})
+            elif mensaje['type'] == 'lifespan.shutdown':
+                if self.pool is not None:
+                    self.pool.close()
+                    await self.pool.wait_closed()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    # Devuelve None cuando la peticion debe seguir por la app WSGI.
+    async def _atender(self, vista, id, scope):
+        app = self.flask_app
+        headers = [(k.decode('latin-1'), v.decode('latin-1')) for k, v in scope['headers']]
+        # query_string llega como bytes y EnvironBuilder espera texto; el prefijo
+        # de montaje va como SCRIPT_NAME, igual que lo arma WsgiToAsgi.
+        with app.test_request_context(
+            scope['path'], method='GET', headers=headers,
+            query_string=scope['query_string'].decode('latin-1'),
+            environ_overrides={'SCRIPT_NAME': scope.get('root_path', '')}
+        ):
+            if stream_solicitado():
+                return None
+            try:
+                verify_jwt_in_request()
+                async with self.pool.acquire() as conn:
+                    async with conn.cursor(aiomysql.DictCursor) as cursor:
+                        rv = await vista(instrumentar_cursor_asincrono(cursor), id)
+            except Exception as e:
+                rv = app.handle_user_exception(e)
+            return app.process_response(app.make_response(rv))
+
+    async def _enviar(self, respuesta, send):
+        await send({
+            'type': 'http.response.start',
+            'status': respuesta.status_code,
+            'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in respuesta.headers.items()],
+        })
+        await send({'type': 'http.response.body', 'body': respuesta.get_data()})
+
+
+app = AppASGI(create_app())
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
-from extensions import get_db_connection, bcrypt
+from extensions import get_db_connection, transaccion
+from hashing import HashingSaturado, hasher
+from usuarios.routes import obtener_usuario_cacheado
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -14,33 +16,23 @@ def register():
         if not data.get(field):
             return jsonify({'error': f'El campo {field} es requerido'}), 400
     
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("SELECT id FROM usuarios WHERE correo = %s", (data['correo'],))
-    if cursor.fetchone():
-        cursor.close()
-        conn.close()
-        return jsonify({'error': 'El correo ya esta registrado'}), 400
-    
-    hashed_password = bcrypt.generate_password_hash(data['contrasena']).decode('utf-8')
-    
-    cursor.execute(
-        "INSERT INTO usuarios (nombre, apellido, correo, contrasena) VALUES (%s, %s, %s, %s)",
-        (data['nombre'], data['apellido'], data['correo'], hashed_password)
-    )
-    conn.commit()
-    
-    user_id = cursor.lastrowid
-    
-    cursor.execute("SELECT id, nombre, apellido, correo, activo, fecha_creacion FROM usuarios WHERE id = %s", (user_id,))
-    usuario = cursor.fetchone()
-    
-    cursor.close()
-    conn.close()
-    
-    if usuario and usuario.get('fecha_creacion'):
-        usuario['fecha_creacion'] = usuario['fecha_creacion'].isoformat()
+    # Se calcula antes de tomar la conexion para no retenerla durante el hash.
+    hashed_password = hasher.generar(data['contrasena'])
+    
+    with transaccion() as cursor:
+        cursor.execute("SELECT id FROM usuarios WHERE correo = %s", (data['correo'],))
+        if cursor.fetchone():
+            return jsonify({'error': 'El correo ya esta registrado'}), 400
+        
+        cursor.execute(
+            "INSERT INTO usuarios (nombre, apellido, correo, contrasena) VALUES (%s, %s, %s, %s)",
+            (data['nombre'], data['apellido'], data['correo'], hashed_password)
+        )
+        
+        user_id = cursor.lastrowid
+        
+        cursor.execute("SELECT id, nombre, apellido, correo, activo, fecha_creacion FROM usuarios WHERE id = %s", (user_id,))
+        usuario = cursor.fetchone()
     
     access_token = create_access_token(identity=str(user_id))
     refresh_token = create_refresh_token(identity=str(user_id))
@@ -53,6 +45,21 @@ def register():
     }), 201
 
 
+# Si cambio BCRYPT_LOG_ROUNDS se aprovecha que tenemos la contrasena en claro
+# para regenerar el hash. Si el hasher esta saturado se deja para otro login.
+def actualizar_hash(usuario, contrasena):
+    try:
+        nuevo_hash = hasher.generar(contrasena)
+    except HashingSaturado:
+        return
+    
+    with transaccion() as cursor:
+        cursor.execute(
+            "UPDATE usuarios SET contrasena = %s WHERE id = %s AND contrasena = %s",
+            (nuevo_hash, usuario['id'], usuario['contrasena'])
+        )
+
+
 @auth_bp.route('/login', methods=['POST'])
 def login():
     data = request.get_json()
@@ -69,20 +76,19 @@ def login():
     cursor.close()
     conn.close()
     
-    if not usuario or not bcrypt.check_password_hash(usuario['contrasena'], data['contrasena']):
+    if not usuario or not hasher.verificar(usuario['contrasena'], data['contrasena']):
         return jsonify({'error': 'Credenciales invalidas'}), 401
     
     if not usuario['activo']:
         return jsonify({'error': 'Usuario desactivado'}), 401
     
+    if hasher.necesita_rehash(usuario['contrasena']):
+        actualizar_hash(usuario, data['contrasena'])
+    
     access_token = create_access_token(identity=str(usuario['id']))
     refresh_token = create_refresh_token(identity=str(usuario['id']))
     
     del usuario['contrasena']
-    if usuario.get('fecha_creacion'):
-        usuario['fecha_creacion'] = usuario['fecha_creacion'].isoformat()
-    if usuario.get('fecha_actualizacion'):
-        usuario['fecha_actualizacion'] = usuario['fecha_actualizacion'].isoformat()
     
     return jsonify({
         'message': 'Login exitoso',
@@ -108,19 +114,9 @@ def refresh():
 def get_current_user():
     current_user_id = get_jwt_identity()
     
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("SELECT id, nombre, apellido, correo, activo, fecha_creacion FROM usuarios WHERE id = %s", (current_user_id,))
-    usuario = cursor.fetchone()
-    
-    cursor.close()
-    conn.close()
+    usuario = obtener_usuario_cacheado(current_user_id)
     
     if not usuario:
         return jsonify({'error': 'Usuario no encontrado'}), 404
     
-    if usuario.get('fecha_creacion'):
-        usuario['fecha_creacion'] = usuario['fecha_creacion'].isoformat()
-    
     return jsonify(usuario), 200
@@ -0,0 +1,77 @@
+import argparse
+import json
+
+from benchmarks.consultas import medir
+from benchmarks.ejecutar import ClienteFlask, commit_actual, iniciar_sesion
+from benchmarks.sembrar import Escala, sembrar
+
+# Tiempo y consultas de GET /api/proyectos/<id>/arbol segun el tamano del
+# arbol. Cada nivel se carga con una consulta por conjunto, asi que las
+# consultas por peticion no deben depender del tamano; el tiempo si crece con
+# los nodos. 'llamadas' es lo que costaba armar el mismo arbol desde la
+# interfaz (procesos, subprocesos de cada proceso y tecnicas y requerimientos
+# de cada subproceso).
+#
+#   python -m benchmarks.arbol --tamanos 2x2x5,5x4x10,10x8x20 --salida arbol.json
+
+VARIANTES = {
+    'completo': '/api/proyectos/1/arbol',
+    'sin_criterios': '/api/proyectos/1/arbol?criterios=false',
+    'hasta_subprocesos': '/api/proyectos/1/arbol?profundidad=2',
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tiempo y consultas del endpoint de arbol de proyecto.')
+    parser.add_argument('--tamanos', default='2x2x5,5x4x10,10x8x20',
+                        help='Procesos x subprocesos por proceso x requerimientos por subproceso.')
+    parser.add_argument('--tecnicas', type=int, default=2)
+    parser.add_argument('--criterios', type=int, default=3)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--salida', help='Archivo JSON de resultados.')
+    args = parser.parse_args()
+
+    from app import create_app
+    app = create_app()
+    cliente = ClienteFlask(app)
+
+    resultados = {}
+    for tamano in args.tamanos.split(','):
+        procesos, subprocesos, requerimientos = (int(n) for n in tamano.split('x'))
+        escala = Escala(usuarios=1, proyectos=1, procesos=procesos, subprocesos=subprocesos,
+                        tecnicas=args.tecnicas, requerimientos=requerimientos, criterios=args.criterios,
+                        ejecuciones=1, stakeholders=1, miembros=0, diagramas=1, elementos=10)
+        sembrar(escala, args.semilla)
+        token = iniciar_sesion(cliente, 1)
+
+        total_subprocesos = procesos * subprocesos
+        resultados[tamano] = {
+            'nodos': procesos + total_subprocesos * (1 + args.tecnicas + requerimientos * (1 + args.criterios)),
+            'llamadas': 1 + procesos + 2 * total_subprocesos,
+            'variantes': {nombre: medir(cliente, ruta, token, args.repeticiones) for nombre, ruta in VARIANTES.items()},
+        }
+
+    print(f"{'tamano':>10} {'nodos':>7} {'llamadas':>8}  {'variante':<18} {'consultas':>9} {'p50_ms':>9} {'p95_ms':>9}")
+    for tamano, r in resultados.items():
+        for nombre, v in r['variantes'].items():
+            print(f"{tamano:>10} {r['nodos']:>7} {r['llamadas']:>8}  {nombre:<18} "
+                  f"{v['consultas_por_peticion']!s:>9} {v['p50_ms']:>9} {v['p95_ms']:>9}")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump({'commit': commit_actual(), 'resultados': resultados}, f, indent=2)
+
+    fallos = {n for r in resultados.values() for n, v in r['variantes'].items() if v['errores']}
+    variables = [n for n in VARIANTES
+                 if len({r['variantes'][n]['consultas_por_peticion'] for r in resultados.values()}) > 1]
+    if fallos or variables:
+        for nombre in sorted(fallos):
+            print(f'{nombre}: hubo respuestas con error')
+        for nombre in variables:
+            print(f'{nombre}: las consultas por peticion cambian con el tamano del arbol')
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
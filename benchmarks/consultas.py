@@ -0,0 +1,80 @@
+import argparse
+import json
+import time
+
+from benchmarks.ejecutar import CONSULTAS, ClienteFlask, commit_actual, iniciar_sesion, resumir
+from benchmarks.sembrar import Escala, sembrar
+
+# Consultas SQL por peticion de los listados de requerimientos a medida que
+# crece el subproceso. Con los criterios cargados por lote (un IN por pagina)
+# el numero tiene que ser el mismo con 10 que con 800 requerimientos; si crece
+# con el tamano volvio el N+1. Cada tamano se siembra de cero (proyecto 1, un
+# solo subproceso) y se mide con el test client, con SQL_METRICS_ENABLED.
+#
+#   python -m benchmarks.consultas --tamanos 10,100,400,800 --salida consultas.json
+
+RUTAS = {
+    'requerimientos.por_subproceso': lambda e: f'/api/requerimientos/subproceso/{e.subprocesos_de(1)[0]}',
+    'requerimientos.por_tecnica': lambda e: f'/api/requerimientos/tecnica/{e.asignaciones_de(1)[0]}',
+}
+
+
+def medir(cliente, ruta, token, repeticiones):
+    latencias, consultas, errores = [], [], 0
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        status, server_timing, _ = cliente.pedir('GET', ruta, token=token)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        if status >= 400:
+            errores += 1
+        m = CONSULTAS.search(server_timing)
+        if m:
+            consultas.append(int(m.group(1)))
+    return resumir(latencias, errores, consultas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Consultas por peticion de los listados de requerimientos.')
+    parser.add_argument('--tamanos', default='10,100,400,800', help='Requerimientos por subproceso.')
+    parser.add_argument('--criterios', type=int, default=3)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--salida', help='Archivo JSON de resultados.')
+    args = parser.parse_args()
+
+    from app import create_app
+    app = create_app()
+    cliente = ClienteFlask(app)
+
+    resultados = {}
+    for tamano in [int(t) for t in args.tamanos.split(',')]:
+        escala = Escala(usuarios=1, proyectos=1, procesos=1, subprocesos=1, tecnicas=1, requerimientos=tamano,
+                        criterios=args.criterios, ejecuciones=1, stakeholders=1, miembros=0, diagramas=1,
+                        elementos=10)
+        sembrar(escala, args.semilla)
+        token = iniciar_sesion(cliente, 1)
+        resultados[str(tamano)] = {
+            nombre: medir(cliente, ruta(escala), token, args.repeticiones) for nombre, ruta in RUTAS.items()
+        }
+
+    print(f"{'requerimientos':>14}  {'operacion':<30} {'consultas':>9} {'p50_ms':>9} {'p95_ms':>9}")
+    for tamano, por_ruta in resultados.items():
+        for nombre, r in por_ruta.items():
+            print(f"{tamano:>14}  {nombre:<30} {r['consultas_por_peticion']!s:>9} {r['p50_ms']:>9} {r['p95_ms']:>9}")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump({'commit': commit_actual(), 'resultados': resultados}, f, indent=2)
+
+    fallos = [n for por_ruta in resultados.values() for n, r in por_ruta.items() if r['errores']]
+    variables = [n for n in RUTAS if len({por_ruta[n]['consultas_por_peticion'] for por_ruta in resultados.values()}) > 1]
+    if fallos or variables:
+        for nombre in sorted(set(fallos)):
+            print(f'{nombre}: hubo respuestas con error')
+        for nombre in variables:
+            print(f'{nombre}: las consultas por peticion cambian con el tamano')
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
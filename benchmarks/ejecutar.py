@@ -0,0 +1,242 @@
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+
+from benchmarks.escenarios import MEZCLAS, Generador
+from benchmarks.sembrar import CONTRASENA, agregar_argumentos, escala_de, sembrar
+
+# Reproduce una mezcla de peticiones contra la app y guarda percentiles de
+# latencia, throughput y consultas SQL por peticion (cabecera Server-Timing,
+# requiere SQL_METRICS_ENABLED) en un JSON comparable entre corridas.
+#
+#   python -m benchmarks.ejecutar --sembrar --modo cliente --salida base.json
+#   python -m benchmarks.ejecutar --modo http --url http://127.0.0.1:8000 \
+#       --mezcla listados --concurrencia 64 --comparar base.json
+#
+# 'cliente' usa el test client de Flask en el mismo proceso; 'http' apunta a un
+# servidor ya levantado (flask run, gunicorn o uvicorn asgi:app), lo que
+# permite comparar el modo WSGI con el ASGI sobre los mismos datos.
+
+CONSULTAS = re.compile(r'desc="(\d+) queries')
+
+
+class ClienteFlask:
+    def __init__(self, app):
+        self._cliente = app.test_client()
+
+    def pedir(self, metodo, ruta, cuerpo=None, token=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        resp = self._cliente.open(ruta, method=metodo, json=cuerpo, headers=headers)
+        return resp.status_code, resp.headers.get('Server-Timing', ''), resp.get_data()
+
+
+class ClienteHTTP:
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+
+    def pedir(self, metodo, ruta, cuerpo=None, token=None):
+        datos = json.dumps(cuerpo).encode('utf-8') if cuerpo is not None else None
+        peticion = urllib.request.Request(self.url + ruta, data=datos, method=metodo)
+        if datos is not None:
+            peticion.add_header('Content-Type', 'application/json')
+        if token:
+            peticion.add_header('Authorization', f'Bearer {token}')
+        try:
+            with urllib.request.urlopen(peticion, timeout=60) as resp:
+                return resp.status, resp.headers.get('Server-Timing', ''), resp.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers.get('Server-Timing', ''), e.read()
+
+
+def percentil(ordenados, p):
+    if not ordenados:
+        return None
+    k = (len(ordenados) - 1) * p / 100
+    i = int(k)
+    j = min(i + 1, len(ordenados) - 1)
+    return round(ordenados[i] + (ordenados[j] - ordenados[i]) * (k - i), 3)
+
+
+def resumir(latencias, errores, consultas):
+    ordenados = sorted(latencias)
+    return {
+        'peticiones': len(ordenados),
+        'errores': errores,
+        'p50_ms': percentil(ordenados, 50),
+        'p90_ms': percentil(ordenados, 90),
+        'p95_ms': percentil(ordenados, 95),
+        'p99_ms': percentil(ordenados, 99),
+        'max_ms': round(ordenados[-1], 3) if ordenados else None,
+        'media_ms': round(sum(ordenados) / len(ordenados), 3) if ordenados else None,
+        'consultas_por_peticion': round(sum(consultas) / len(consultas), 2) if consultas else None,
+    }
+
+
+def iniciar_sesion(cliente, usuario_id):
+    status, _, cuerpo = cliente.pedir('POST', '/api/auth/login', {
+        'correo': f'bench{usuario_id}@example.com', 'contrasena': CONTRASENA
+    })
+    if status != 200:
+        raise RuntimeError(f'Login fallido para bench{usuario_id}: {status} {cuerpo[:200]!r}')
+    return json.loads(cuerpo)['access_token']
+
+
+def correr(crear_cliente, escala, mezcla, peticiones, concurrencia, calentamiento, semilla):
+    usuarios = list(range(1, min(escala.usuarios, escala.proyectos) + 1))
+    cliente = crear_cliente()
+    tokens = {u: iniciar_sesion(cliente, u) for u in usuarios[:max(concurrencia, 1)]}
+    usuarios = list(tokens)
+
+    lock = threading.Lock()
+    pendientes = [calentamiento + peticiones]
+    muestras = {}
+
+    def trabajador(n):
+        cliente = crear_cliente()
+        generador = Generador(mezcla, escala, semilla + n)
+        usuario = usuarios[n % len(usuarios)]
+        while True:
+            with lock:
+                if pendientes[0] <= 0:
+                    return
+                pendientes[0] -= 1
+                medir = pendientes[0] < peticiones
+
+            nombre, metodo, ruta, cuerpo = generador.siguiente(usuario)
+            inicio = time.perf_counter()
+            status, server_timing, _ = cliente.pedir(metodo, ruta, cuerpo, tokens[usuario])
+            ms = (time.perf_counter() - inicio) * 1000
+
+            if medir:
+                m = CONSULTAS.search(server_timing)
+                with lock:
+                    latencias, estados, consultas = muestras.setdefault(nombre, ([], {}, []))
+                    latencias.append(ms)
+                    estados[status] = estados.get(status, 0) + 1
+                    if m:
+                        consultas.append(int(m.group(1)))
+
+    hilos = [threading.Thread(target=trabajador, args=(n,)) for n in range(concurrencia)]
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    duracion = time.perf_counter() - inicio
+
+    operaciones = {}
+    todas, todas_consultas, total_errores = [], [], 0
+    for nombre, (latencias, estados, consultas) in sorted(muestras.items()):
+        errores = sum(c for s, c in estados.items() if s >= 400)
+        operaciones[nombre] = resumir(latencias, errores, consultas)
+        operaciones[nombre]['estados'] = {str(s): c for s, c in sorted(estados.items())}
+        todas += latencias
+        todas_consultas += consultas
+        total_errores += errores
+
+    # La duracion incluye el calentamiento, asi que el throughput es conservador.
+    total = resumir(todas, total_errores, todas_consultas)
+    total['throughput_rps'] = round((calentamiento + peticiones) / duracion, 2) if duracion else None
+    total['duracion_s'] = round(duracion, 3)
+    return {'total': total, 'operaciones': operaciones}
+
+
+def commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(actual, previo, umbral):
+    regresiones = []
+    filas = [('operacion', 'p50', 'p95', 'consultas')]
+    for nombre, op in actual['resultados']['operaciones'].items():
+        antes = previo['resultados']['operaciones'].get(nombre)
+        if not antes:
+            continue
+        celdas = [nombre]
+        for clave in ('p50_ms', 'p95_ms', 'consultas_por_peticion'):
+            a, b = antes.get(clave), op.get(clave)
+            if a is None or b is None:
+                celdas.append('-')
+                continue
+            cambio = (b - a) / a * 100 if a else 0.0
+            celdas.append(f'{a} -> {b} ({cambio:+.1f}%)')
+            if clave != 'p50_ms' and cambio > umbral:
+                regresiones.append(f'{nombre} {clave}: {a} -> {b}')
+        filas.append(tuple(celdas))
+
+    anchos = [max(len(f[i]) for f in filas) for i in range(4)]
+    for fila in filas:
+        print('  '.join(c.ljust(anchos[i]) for i, c in enumerate(fila)))
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de carga de gestproy.')
+    parser.add_argument('--modo', choices=['cliente', 'http'], default='cliente')
+    parser.add_argument('--url', default='http://127.0.0.1:5001')
+    parser.add_argument('--mezcla', choices=sorted(MEZCLAS), default='lectura')
+    parser.add_argument('--peticiones', type=int, default=2000)
+    parser.add_argument('--calentamiento', type=int, default=200)
+    parser.add_argument('--concurrencia', type=int, default=8)
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--sembrar', action='store_true', help='Recrear el esquema y los datos antes de medir.')
+    parser.add_argument('--salida', help='Archivo JSON de resultados.')
+    parser.add_argument('--comparar', help='JSON de una corrida anterior para comparar.')
+    parser.add_argument('--umbral', type=float, default=10.0, help='Porcentaje de empeoramiento tolerado.')
+    agregar_argumentos(parser)
+    args = parser.parse_args()
+
+    escala = escala_de(args)
+    siembra = sembrar(escala, args.semilla) if args.sembrar else None
+
+    if args.modo == 'cliente':
+        from app import create_app
+        app = create_app()
+        crear_cliente = lambda: ClienteFlask(app)
+    else:
+        crear_cliente = lambda: ClienteHTTP(args.url)
+
+    resultado = {
+        'fecha': datetime.now(timezone.utc).isoformat(),
+        'commit': commit_actual(),
+        'python': platform.python_version(),
+        'modo': args.modo,
+        'url': args.url if args.modo == 'http' else None,
+        'mezcla': args.mezcla,
+        'concurrencia': args.concurrencia,
+        'peticiones': args.peticiones,
+        'escala': vars(escala),
+        'siembra': siembra,
+        'resultados': correr(crear_cliente, escala, args.mezcla, args.peticiones, args.concurrencia,
+                             args.calentamiento, args.semilla),
+    }
+
+    texto = json.dumps(resultado, indent=2)
+    if args.salida:
+        os.makedirs(os.path.dirname(os.path.abspath(args.salida)), exist_ok=True)
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            f.write(texto)
+    print(json.dumps(resultado['resultados']['total'], indent=2))
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            regresiones = comparar(resultado, json.load(f), args.umbral)
+        if regresiones:
+            print('\nRegresiones:\n  ' + '\n  '.join(regresiones))
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
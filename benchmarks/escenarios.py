@@ -0,0 +1,109 @@
+import random
+
+# Cada operacion recibe (rnd, escala, usuario_id) y devuelve (metodo, ruta,
+# cuerpo). Los ids salen de la numeracion jerarquica de sembrar.Escala y se
+# eligen entre los proyectos creados por el usuario virtual, asi que todas las
+# peticiones pasan el control de membresia.
+
+
+def _proyecto(rnd, e, u):
+    return rnd.choice(e.proyectos_de(u))
+
+
+def _proceso(rnd, e, u):
+    return rnd.choice(e.procesos_de(_proyecto(rnd, e, u)))
+
+
+def _subproceso(rnd, e, u):
+    return rnd.choice(e.subprocesos_de(_proceso(rnd, e, u)))
+
+
+def _asignacion(rnd, e, u):
+    return rnd.choice(e.asignaciones_de(_subproceso(rnd, e, u)))
+
+
+def _requerimiento(rnd, e, u):
+    return rnd.choice(e.requerimientos_de(_subproceso(rnd, e, u)))
+
+
+def _diagrama(rnd, e, u):
+    return rnd.choice(e.diagramas_de(_proyecto(rnd, e, u)))
+
+
+LECTURAS = {
+    'usuarios.obtener': lambda rnd, e, u: ('GET', f'/api/usuarios/{u}', None),
+    'proyectos.listar': lambda rnd, e, u: ('GET', '/api/proyectos?limit=50', None),
+    'proyectos.obtener': lambda rnd, e, u: ('GET', f'/api/proyectos/{_proyecto(rnd, e, u)}', None),
+    'proyectos.arbol': lambda rnd, e, u: ('GET', f'/api/proyectos/{_proyecto(rnd, e, u)}/arbol?profundidad=3', None),
+    'proyectos.estadisticas': lambda rnd, e, u: ('GET', f'/api/proyectos/{_proyecto(rnd, e, u)}/estadisticas', None),
+    'roles.listar': lambda rnd, e, u: ('GET', f'/api/roles?proyecto_id={_proyecto(rnd, e, u)}', None),
+    'miembros.listar': lambda rnd, e, u: ('GET', f'/api/miembros/proyecto/{_proyecto(rnd, e, u)}', None),
+    'stakeholders.listar': lambda rnd, e, u: ('GET', f'/api/stakeholders/proyecto/{_proyecto(rnd, e, u)}', None),
+    'procesos.listar': lambda rnd, e, u: ('GET', f'/api/procesos/proyecto/{_proyecto(rnd, e, u)}', None),
+    'subprocesos.listar': lambda rnd, e, u: ('GET', f'/api/subprocesos/proceso/{_proceso(rnd, e, u)}', None),
+    'tecnicas.listar': lambda rnd, e, u: ('GET', '/api/tecnicas', None),
+    'subproceso_tecnicas.listar': lambda rnd, e, u: (
+        'GET', f'/api/subproceso-tecnicas/subproceso/{_subproceso(rnd, e, u)}', None),
+    'requerimientos.por_subproceso': lambda rnd, e, u: (
+        'GET', f'/api/requerimientos/subproceso/{_subproceso(rnd, e, u)}', None),
+    'requerimientos.por_tecnica': lambda rnd, e, u: (
+        'GET', f'/api/requerimientos/tecnica/{_asignacion(rnd, e, u)}', None),
+    'requerimientos.obtener': lambda rnd, e, u: ('GET', f'/api/requerimientos/{_requerimiento(rnd, e, u)}', None),
+    'ejecuciones.por_tecnica': lambda rnd, e, u: ('GET', f'/api/ejecuciones/tecnica/{_asignacion(rnd, e, u)}', None),
+    'diagramas.listar': lambda rnd, e, u: ('GET', f'/api/diagramas/proyecto/{_proyecto(rnd, e, u)}', None),
+    'diagramas.obtener': lambda rnd, e, u: ('GET', f'/api/diagramas/{_diagrama(rnd, e, u)}', None),
+    'busqueda': lambda rnd, e, u: ('GET', f'/api/busqueda?q=requerimiento+{rnd.randint(1, 500)}', None),
+}
+
+ESCRITURAS = {
+    'requerimientos.crear': lambda rnd, e, u: ('POST', '/api/requerimientos', _nuevo_requerimiento(rnd, e, u)),
+    'requerimientos.actualizar': lambda rnd, e, u: (
+        'PUT', f'/api/requerimientos/{_requerimiento(rnd, e, u)}',
+        {'estado': rnd.choice(['borrador', 'propuesto', 'aprobado'])}),
+    'ejecuciones.crear': lambda rnd, e, u: ('POST', '/api/ejecuciones', {
+        'subproceso_tecnica_id': _asignacion(rnd, e, u), 'datos': {'respuestas': [rnd.randint(1, 5)]}}),
+    'diagramas.renombrar': lambda rnd, e, u: (
+        'PUT', f'/api/diagramas/{_diagrama(rnd, e, u)}', {'nombre': f'Diagrama {rnd.randint(1, 10 ** 6)}'}),
+}
+
+
+def _nuevo_requerimiento(rnd, e, u):
+    subproceso = _subproceso(rnd, e, u)
+    return {
+        'subproceso_id': subproceso,
+        'subproceso_tecnica_id': rnd.choice(e.asignaciones_de(subproceso)),
+        'titulo': f'Requerimiento de carga {rnd.randint(1, 10 ** 6)}',
+        'criterios': [{'descripcion': 'Criterio de carga'}],
+    }
+
+
+# Pesos relativos por operacion. 'lectura' aproxima el uso de la interfaz web;
+# 'mixta' agrega escrituras; 'listados' aisla los endpoints del modo ASGI.
+MEZCLAS = {
+    'lectura': {nombre: 1 for nombre in LECTURAS} | {
+        'proyectos.listar': 6, 'requerimientos.por_subproceso': 8, 'requerimientos.obtener': 6,
+        'ejecuciones.por_tecnica': 4, 'diagramas.obtener': 3,
+    },
+    'mixta': {nombre: 1 for nombre in LECTURAS} | {
+        'proyectos.listar': 4, 'requerimientos.por_subproceso': 6, 'requerimientos.obtener': 4,
+        'requerimientos.crear': 2, 'requerimientos.actualizar': 3, 'ejecuciones.crear': 1, 'diagramas.renombrar': 1,
+    },
+    'listados': {
+        'requerimientos.por_subproceso': 2, 'requerimientos.por_tecnica': 1, 'ejecuciones.por_tecnica': 1,
+    },
+}
+
+OPERACIONES = LECTURAS | ESCRITURAS
+
+
+class Generador:
+    def __init__(self, mezcla, escala, semilla):
+        pesos = MEZCLAS[mezcla]
+        self.nombres = list(pesos)
+        self.pesos = [pesos[n] for n in self.nombres]
+        self.escala = escala
+        self.rnd = random.Random(semilla)
+
+    def siguiente(self, usuario_id):
+        nombre = self.rnd.choices(self.nombres, self.pesos)[0]
+        return (nombre,) + OPERACIONES[nombre](self.rnd, self.escala, usuario_id)
@@ -0,0 +1,137 @@
+import argparse
+import json
+import threading
+import time
+
+from benchmarks.ejecutar import ClienteFlask, ClienteHTTP, commit_actual, iniciar_sesion, resumir
+from benchmarks.sembrar import CONTRASENA, Escala, sembrar
+from config import Config
+
+# Throughput de login bajo rafaga. Varios hilos hacen POST /api/auth/login
+# mientras una sonda pide un endpoint liviano (GET /api/tecnicas): con el hash
+# en su propio executor acotado la sonda no deberia empeorar mucho respecto de
+# la medicion sin rafaga, y el exceso de logins se rechaza con 503 en lugar de
+# encolarse. El costo de bcrypt sale de BCRYPT_LOG_ROUNDS, igual que en la app.
+#
+#   python -m benchmarks.login --sembrar --concurrencia 32 --peticiones 500
+#   python -m benchmarks.login --modo http --url http://127.0.0.1:8000 --concurrencia 64
+
+SONDA = '/api/tecnicas'
+
+
+def sondear(cliente, token, latencias, detener=None, cantidad=None):
+    while (detener is None or not detener.is_set()) and (cantidad is None or len(latencias) < cantidad):
+        inicio = time.perf_counter()
+        cliente.pedir('GET', SONDA, token=token)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+
+
+def rafaga(crear_cliente, usuarios, peticiones, concurrencia):
+    lock = threading.Lock()
+    pendientes = [peticiones]
+    latencias, estados = [], {}
+
+    def trabajador():
+        cliente = crear_cliente()
+        while True:
+            with lock:
+                if pendientes[0] <= 0:
+                    return
+                pendientes[0] -= 1
+                usuario = usuarios[pendientes[0] % len(usuarios)]
+
+            inicio = time.perf_counter()
+            status, _, _ = cliente.pedir('POST', '/api/auth/login', {
+                'correo': f'bench{usuario}@example.com', 'contrasena': CONTRASENA
+            })
+            ms = (time.perf_counter() - inicio) * 1000
+            with lock:
+                latencias.append(ms)
+                estados[status] = estados.get(status, 0) + 1
+
+    hilos = [threading.Thread(target=trabajador) for _ in range(concurrencia)]
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    return latencias, estados, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Throughput de login y efecto sobre otras peticiones.')
+    parser.add_argument('--modo', choices=['cliente', 'http'], default='cliente')
+    parser.add_argument('--url', default='http://127.0.0.1:5001')
+    parser.add_argument('--concurrencia', type=int, default=32)
+    parser.add_argument('--peticiones', type=int, default=500)
+    parser.add_argument('--usuarios', type=int, default=50)
+    parser.add_argument('--sondas-base', type=int, default=200, help='Peticiones de la sonda sin rafaga.')
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--sembrar', action='store_true', help='Recrear el esquema y los usuarios antes de medir.')
+    parser.add_argument('--salida', help='Archivo JSON de resultados.')
+    args = parser.parse_args()
+
+    if args.sembrar:
+        sembrar(Escala(usuarios=args.usuarios, proyectos=args.usuarios, procesos=1, subprocesos=1, tecnicas=1,
+                       requerimientos=1, criterios=1, ejecuciones=1, stakeholders=1, miembros=0, diagramas=1,
+                       elementos=10), args.semilla)
+
+    if args.modo == 'cliente':
+        from app import create_app
+        app = create_app()
+        crear_cliente = lambda: ClienteFlask(app)
+    else:
+        crear_cliente = lambda: ClienteHTTP(args.url)
+
+    sonda = crear_cliente()
+    token = iniciar_sesion(sonda, 1)
+
+    base = []
+    sondear(sonda, token, base, cantidad=args.sondas_base)
+
+    durante = []
+    detener = threading.Event()
+    hilo_sonda = threading.Thread(target=sondear, args=(crear_cliente(), token, durante, detener))
+    hilo_sonda.start()
+    latencias, estados, duracion = rafaga(crear_cliente, list(range(1, args.usuarios + 1)), args.peticiones,
+                                          args.concurrencia)
+    detener.set()
+    hilo_sonda.join()
+
+    exitosos = estados.get(200, 0)
+    rechazados = estados.get(503, 0)
+    errores = sum(c for s, c in estados.items() if s not in (200, 503))
+    login = resumir(latencias, errores, [])
+    login.update({
+        'exitosos_por_segundo': round(exitosos / duracion, 2) if duracion else None,
+        'rechazados_503': rechazados,
+        'estados': {str(s): c for s, c in sorted(estados.items())},
+    })
+    resultados = {
+        'login': login,
+        'sonda_sin_rafaga': resumir(base, 0, []),
+        'sonda_durante_rafaga': resumir(durante, 0, []),
+    }
+
+    print(f"login: {exitosos} exitosos en {duracion:.2f}s ({login['exitosos_por_segundo']}/s), "
+          f"{rechazados} rechazados con 503, {errores} errores; p50 {login['p50_ms']} ms, p95 {login['p95_ms']} ms")
+    for nombre in ('sonda_sin_rafaga', 'sonda_durante_rafaga'):
+        r = resultados[nombre]
+        print(f"{nombre}: {r['peticiones']} peticiones, p50 {r['p50_ms']} ms, p95 {r['p95_ms']} ms, p99 {r['p99_ms']} ms")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump({
+                'commit': commit_actual(),
+                'modo': args.modo,
+                'concurrencia': args.concurrencia,
+                'bcrypt_log_rounds': Config.BCRYPT_LOG_ROUNDS,
+                'resultados': resultados,
+            }, f, indent=2)
+
+    if errores:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
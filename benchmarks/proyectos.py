@@ -0,0 +1,90 @@
+import argparse
+import json
+
+from benchmarks.consultas import medir
+from benchmarks.ejecutar import ClienteFlask, commit_actual, iniciar_sesion
+from benchmarks.sembrar import Escala, conectar, sembrar
+
+from acceso import SQL_MEMBRESIAS
+
+# GET /api/proyectos con 10k proyectos en la base. Los proyectos accesibles
+# salen del UNION indexado de acceso.SQL_MEMBRESIAS (o de la cache) y el
+# listado es una busqueda por clave primaria, asi que el tiempo tiene que
+# depender de los proyectos del usuario y no del total de la tabla. Ademas del
+# tiempo se imprime el EXPLAIN del UNION: ninguna de sus ramas puede recorrer
+# la tabla completa.
+#
+#   python -m benchmarks.proyectos --proyectos 10000 --usuarios 100 --salida proyectos.json
+
+VARIANTES = {
+    'primera_pagina': '/api/proyectos?limit=50',
+    'solo_ids': '/api/proyectos?fields=id',
+    'completo': '/api/proyectos',
+}
+
+
+def explicar(usuario_id):
+    conn = conectar()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute('EXPLAIN ' + SQL_MEMBRESIAS, (usuario_id, usuario_id))
+    filas = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return [{'tabla': f['table'], 'tipo': f['type'], 'indice': f['key'], 'filas': f['rows']} for f in filas]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Listado de proyectos con muchos proyectos en la base.')
+    parser.add_argument('--proyectos', type=int, default=10000)
+    parser.add_argument('--usuarios', type=int, default=100)
+    parser.add_argument('--miembros', type=int, default=3)
+    parser.add_argument('--repeticiones', type=int, default=50)
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--sin-sembrar', action='store_true', help='Medir sobre los datos ya cargados.')
+    parser.add_argument('--salida', help='Archivo JSON de resultados.')
+    args = parser.parse_args()
+
+    escala = Escala(usuarios=args.usuarios, proyectos=args.proyectos, procesos=1, subprocesos=1, tecnicas=1,
+                    requerimientos=1, criterios=1, ejecuciones=1, stakeholders=1, miembros=args.miembros,
+                    diagramas=1, elementos=10)
+    if not args.sin_sembrar:
+        sembrar(escala, args.semilla)
+
+    from app import create_app
+    app = create_app()
+    cliente = ClienteFlask(app)
+    token = iniciar_sesion(cliente, 1)
+
+    resultados = {nombre: medir(cliente, ruta, token, args.repeticiones) for nombre, ruta in VARIANTES.items()}
+    plan = explicar(1)
+
+    print(f"{args.proyectos} proyectos, {args.usuarios} usuarios, {len(escala.proyectos_de(1))} creados por el usuario 1")
+    print(f"{'variante':<16} {'consultas':>9} {'p50_ms':>9} {'p95_ms':>9} {'p99_ms':>9}")
+    for nombre, r in resultados.items():
+        print(f"{nombre:<16} {r['consultas_por_peticion']!s:>9} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9}")
+    print(f"\n{'tabla':<20} {'tipo':<8} {'indice':<32} {'filas':>7}")
+    for fila in plan:
+        print(f"{fila['tabla']!s:<20} {fila['tipo']!s:<8} {fila['indice']!s:<32} {fila['filas']!s:>7}")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump({
+                'commit': commit_actual(),
+                'proyectos': args.proyectos,
+                'usuarios': args.usuarios,
+                'resultados': resultados,
+                'explain': plan,
+            }, f, indent=2)
+
+    fallos = [n for n, r in resultados.items() if r['errores']]
+    recorridos = [f['tabla'] for f in plan if f['tipo'] == 'ALL' and f['tabla'] in ('mp', 'p', 'proyectos')]
+    if fallos or recorridos:
+        for nombre in fallos:
+            print(f'{nombre}: hubo respuestas con error')
+        for tabla in recorridos:
+            print(f'{tabla}: el UNION de membresias recorre la tabla completa')
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
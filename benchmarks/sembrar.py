@@ -0,0 +1,254 @@
+import argparse
+import json
+import os
+import random
+import time
+from dataclasses import asdict, dataclass
+
+import bcrypt
+import mysql.connector
+
+from config import Config
+from estadisticas import recalcular
+
+# Recrea database/schema.sql (DROP TABLE incluido) en la base de Config
+# (MYSQL_*), asi que debe apuntar a una base descartable, no a la de desarrollo.
+# Uso: python -m benchmarks.sembrar --proyectos 1000 --requerimientos 20
+
+ESQUEMA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database', 'schema.sql')
+
+CONTRASENA = 'bench-123'
+ROLES_FIJOS = [(1, 'Product Owner'), (2, 'Technical Leader'), (3, 'Analista')]
+TECNICAS = list(range(2, 16))
+LOTE = 1000
+
+
+# Los ids se asignan de forma explicita y jerarquica (el proceso j del proyecto
+# p es (p - 1) * procesos + j, y asi hacia abajo), de modo que los escenarios
+# pueden calcular ids validos sin consultar la base.
+@dataclass
+class Escala:
+    usuarios: int = 50
+    proyectos: int = 200
+    procesos: int = 4
+    subprocesos: int = 3
+    tecnicas: int = 2
+    requerimientos: int = 10
+    criterios: int = 3
+    ejecuciones: int = 2
+    stakeholders: int = 5
+    miembros: int = 3
+    diagramas: int = 2
+    elementos: int = 200
+
+    def creador(self, proyecto_id):
+        return (proyecto_id - 1) % self.usuarios + 1
+
+    def proyectos_de(self, usuario_id):
+        return range(usuario_id, self.proyectos + 1, self.usuarios)
+
+    def procesos_de(self, proyecto_id):
+        base = (proyecto_id - 1) * self.procesos
+        return range(base + 1, base + self.procesos + 1)
+
+    def subprocesos_de(self, proceso_id):
+        base = (proceso_id - 1) * self.subprocesos
+        return range(base + 1, base + self.subprocesos + 1)
+
+    def asignaciones_de(self, subproceso_id):
+        base = (subproceso_id - 1) * self.tecnicas
+        return range(base + 1, base + self.tecnicas + 1)
+
+    def requerimientos_de(self, subproceso_id):
+        base = (subproceso_id - 1) * self.requerimientos
+        return range(base + 1, base + self.requerimientos + 1)
+
+    def ejecuciones_de(self, asignacion_id):
+        base = (asignacion_id - 1) * self.ejecuciones
+        return range(base + 1, base + self.ejecuciones + 1)
+
+    def stakeholders_de(self, proyecto_id):
+        base = (proyecto_id - 1) * self.stakeholders
+        return range(base + 1, base + self.stakeholders + 1)
+
+    def diagramas_de(self, proyecto_id):
+        base = (proyecto_id - 1) * self.diagramas
+        return range(base + 1, base + self.diagramas + 1)
+
+
+def agregar_argumentos(parser):
+    for campo, valor in asdict(Escala()).items():
+        parser.add_argument(f'--{campo}', type=int, default=valor)
+
+
+def escala_de(args):
+    return Escala(**{campo: getattr(args, campo) for campo in asdict(Escala())})
+
+
+def conectar():
+    return mysql.connector.connect(
+        host=Config.MYSQL_HOST,
+        user=Config.MYSQL_USER,
+        password=Config.MYSQL_PASSWORD,
+        database=Config.MYSQL_DATABASE
+    )
+
+
+def aplicar_esquema(cursor):
+    with open(ESQUEMA, encoding='utf-8') as f:
+        lineas = [l for l in f if not l.startswith('--')]
+    for sentencia in ''.join(lineas).split(';\n'):
+        if sentencia.strip():
+            cursor.execute(sentencia)
+
+
+def insertar(cursor, tabla, columnas, filas):
+    sql = f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({', '.join(['%s'] * len(columnas))})"
+    total = 0
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= LOTE:
+            cursor.executemany(sql, lote)
+            total += len(lote)
+            lote = []
+    if lote:
+        cursor.executemany(sql, lote)
+        total += len(lote)
+    return total
+
+
+def diagrama(rnd, elementos):
+    elements = [
+        {'id': f'e{i}', 'tipo': rnd.choice(['actor', 'caso', 'clase', 'nota']), 'x': rnd.randint(0, 2000),
+         'y': rnd.randint(0, 2000), 'texto': f'Elemento {i}'}
+        for i in range(elementos)
+    ]
+    connections = [
+        {'id': f'c{i}', 'origen': f'e{i}', 'destino': f'e{rnd.randrange(elementos)}'}
+        for i in range(elementos - 1)
+    ]
+    return json.dumps({'elements': elements, 'connections': connections})
+
+
+def sembrar(escala, semilla=1):
+    rnd = random.Random(semilla)
+    hash_bench = bcrypt.hashpw(CONTRASENA.encode('utf-8'), bcrypt.gensalt(Config.BCRYPT_LOG_ROUNDS)).decode('utf-8')
+    e = escala
+    conteos = {}
+    inicio = time.perf_counter()
+
+    conn = conectar()
+    cursor = conn.cursor()
+    aplicar_esquema(cursor)
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+
+    conteos['roles'] = insertar(cursor, 'roles', ['id', 'proyecto_id', 'nombre', 'es_fijo'],
+                                ((id, None, nombre, True) for id, nombre in ROLES_FIJOS))
+
+    conteos['usuarios'] = insertar(cursor, 'usuarios', ['id', 'nombre', 'apellido', 'correo', 'contrasena'], (
+        (u, f'Usuario{u}', 'Bench', f'bench{u}@example.com', hash_bench) for u in range(1, e.usuarios + 1)
+    ))
+
+    conteos['proyectos'] = insertar(cursor, 'proyectos', ['id', 'nombre', 'descripcion', 'prioridad', 'creado_por'], (
+        (p, f'Proyecto {p}', f'Proyecto sintetico numero {p}', rnd.choice(['baja', 'media', 'alta']), e.creador(p))
+        for p in range(1, e.proyectos + 1)
+    ))
+
+    def miembros():
+        id = 0
+        for p in range(1, e.proyectos + 1):
+            creador = e.creador(p)
+            id += 1
+            yield id, p, creador, 1, creador
+            otros = [u for u in range(1, e.usuarios + 1) if u != creador]
+            for u in rnd.sample(otros, min(e.miembros, len(otros))):
+                id += 1
+                yield id, p, u, 3, creador
+    conteos['miembros_proyecto'] = insertar(
+        cursor, 'miembros_proyecto', ['id', 'proyecto_id', 'usuario_id', 'rol_id', 'asignado_por'], miembros()
+    )
+
+    conteos['stakeholders'] = insertar(
+        cursor, 'stakeholders', ['id', 'proyecto_id', 'nombre_completo', 'organizacion', 'tipo', 'nivel_influencia_interes'], (
+            (s, p, f'Stakeholder {s}', f'Organizacion {s % 17}', rnd.choice(['interno', 'externo', 'cliente']),
+             rnd.choice(['bajo', 'medio', 'alto']))
+            for p in range(1, e.proyectos + 1) for s in e.stakeholders_de(p)
+        ))
+
+    conteos['procesos'] = insertar(cursor, 'procesos', ['id', 'proyecto_id', 'nombre', 'descripcion'], (
+        (pr, p, f'Proceso {pr}', f'Proceso de negocio {pr} del proyecto {p}')
+        for p in range(1, e.proyectos + 1) for pr in e.procesos_de(p)
+    ))
+
+    todos_procesos = range(1, e.proyectos * e.procesos + 1)
+    conteos['subprocesos'] = insertar(cursor, 'subprocesos', ['id', 'proceso_id', 'nombre', 'descripcion', 'horas_estimadas'], (
+        (s, pr, f'Subproceso {s}', f'Actividad {s} del proceso {pr}', rnd.randint(4, 80))
+        for pr in todos_procesos for s in e.subprocesos_de(pr)
+    ))
+
+    todos_subprocesos = range(1, len(todos_procesos) * e.subprocesos + 1)
+    conteos['subproceso_tecnicas'] = insertar(cursor, 'subproceso_tecnicas', ['id', 'subproceso_id', 'tecnica_id'], (
+        (st, s, TECNICAS[(st - 1) % len(TECNICAS)])
+        for s in todos_subprocesos for st in e.asignaciones_de(s)
+    ))
+
+    conteos['requerimientos'] = insertar(cursor, 'requerimientos', [
+        'id', 'subproceso_id', 'subproceso_tecnica_id', 'codigo', 'titulo', 'descripcion', 'tipo', 'prioridad',
+        'estado', 'metadata', 'creado_por'
+    ], (
+        (r, s, e.asignaciones_de(s)[i % e.tecnicas], f'REQ-{i + 1:03d}', f'Requerimiento {r} del subproceso {s}',
+         f'El sistema debe permitir la operacion {r} con validaciones y registro de auditoria',
+         rnd.choice(['funcional', 'no_funcional', 'restriccion', 'regla_negocio']),
+         rnd.choice(['critica', 'alta', 'media', 'baja']), rnd.choice(['borrador', 'propuesto', 'aprobado']),
+         json.dumps({'fuente': 'bench', 'version': 1}), 1)
+        for s in todos_subprocesos for i, r in enumerate(e.requerimientos_de(s))
+    ))
+    conteos['requerimiento_secuencias'] = insertar(cursor, 'requerimiento_secuencias', ['subproceso_id', 'ultimo'], (
+        (s, e.requerimientos) for s in todos_subprocesos
+    ))
+
+    total_requerimientos = len(todos_subprocesos) * e.requerimientos
+    conteos['criterios_aceptacion'] = insertar(
+        cursor, 'criterios_aceptacion', ['requerimiento_id', 'descripcion', 'cumplido', 'orden'], (
+            (r, f'Criterio {c + 1} del requerimiento {r}', rnd.random() < 0.4, c)
+            for r in range(1, total_requerimientos + 1) for c in range(e.criterios)
+        ))
+
+    total_asignaciones = len(todos_subprocesos) * e.tecnicas
+    conteos['ejecuciones_tecnica'] = insertar(
+        cursor, 'ejecuciones_tecnica', ['id', 'subproceso_tecnica_id', 'datos', 'estado', 'creado_por'], (
+            (x, st, json.dumps({'respuestas': [rnd.randint(1, 5) for _ in range(20)]}),
+             rnd.choice(['planificada', 'en_progreso', 'completada']), 1)
+            for st in range(1, total_asignaciones + 1) for x in e.ejecuciones_de(st)
+        ))
+
+    conteos['diagramas'] = insertar(cursor, 'diagramas', ['id', 'proyecto_id', 'tipo', 'nombre', 'datos', 'creado_por'], (
+        (d, p, 'casos_de_uso', f'Diagrama {d}', diagrama(rnd, e.elementos), e.creador(p))
+        for p in range(1, e.proyectos + 1) for d in e.diagramas_de(p)
+    ))
+
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    conn.commit()
+
+    dict_cursor = conn.cursor(dictionary=True)
+    recalcular(dict_cursor)
+    conn.commit()
+
+    dict_cursor.close()
+    cursor.close()
+    conn.close()
+
+    return {'conteos': conteos, 'segundos': round(time.perf_counter() - inicio, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Crea el esquema y carga datos sinteticos para los benchmarks.')
+    agregar_argumentos(parser)
+    parser.add_argument('--semilla', type=int, default=1)
+    args = parser.parse_args()
+    print(json.dumps(sembrar(escala_de(args), args.semilla), indent=2))
+
+
+if __name__ == '__main__':
+    main()
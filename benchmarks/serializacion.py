@@ -0,0 +1,170 @@
+import argparse
+import json
+import random
+import timeit
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from flask import Flask
+from mysql.connector import FieldType
+
+from benchmarks.ejecutar import commit_actual
+from serializers import anidado, crear_json_provider, serializar
+
+# Microbenchmark de la serializacion de filas, sin base de datos: las filas se
+# arman en memoria con los tipos que devuelve mysql.connector. Compara los
+# bucles que tenia cada handler (isoformat y json.loads a mano, diccionarios
+# anidados armados campo a campo, json.dumps) con serializar() y el provider
+# JSON de la app.
+#
+#   python -m benchmarks.serializacion --filas 500 --repeticiones 200
+
+TECNICA = anidado('tecnica', 'tecnica_id', id='tecnica_id', nombre='tecnica_nombre', categoria='tecnica_categoria')
+RESPONSABLE = anidado('responsable', 'responsable_id', opcional=True, id='responsable_id',
+                      nombre='responsable_nombre', apellido='responsable_apellido')
+
+
+class CursorFalso:
+    def __init__(self, columnas):
+        self.description = [(nombre, tipo, None, None, None, None, True, 0) for nombre, tipo in columnas]
+
+
+def filas_requerimientos(rnd, n):
+    base = datetime(2024, 1, 1)
+    return [{
+        'id': i, 'subproceso_id': 1, 'subproceso_tecnica_id': 1, 'codigo': f'REQ-{i:03d}',
+        'titulo': f'Requerimiento {i}', 'descripcion': 'El sistema debe permitir la operacion ' * 3,
+        'tipo': 'funcional', 'prioridad': 'media', 'estado': 'aprobado',
+        'metadata': json.dumps({'fuente': 'bench', 'version': rnd.randint(1, 9)}), 'creado_por': 1,
+        'fecha_creacion': base + timedelta(minutes=i), 'fecha_actualizacion': base + timedelta(hours=i),
+        'tecnica_id': 2, 'tecnica_nombre': 'Entrevista', 'tecnica_categoria': 'colaborativa',
+    } for i in range(1, n + 1)]
+
+
+COLUMNAS_REQUERIMIENTOS = [
+    ('id', FieldType.LONG), ('subproceso_id', FieldType.LONG), ('subproceso_tecnica_id', FieldType.LONG),
+    ('codigo', FieldType.VAR_STRING), ('titulo', FieldType.VAR_STRING), ('descripcion', FieldType.BLOB),
+    ('tipo', FieldType.STRING), ('prioridad', FieldType.STRING), ('estado', FieldType.STRING),
+    ('metadata', FieldType.JSON), ('creado_por', FieldType.LONG), ('fecha_creacion', FieldType.DATETIME),
+    ('fecha_actualizacion', FieldType.DATETIME), ('tecnica_id', FieldType.LONG),
+    ('tecnica_nombre', FieldType.VAR_STRING), ('tecnica_categoria', FieldType.VAR_STRING),
+]
+
+
+def manual_requerimientos(filas):
+    resultado = []
+    for req in filas:
+        if req.get('fecha_creacion'):
+            req['fecha_creacion'] = req['fecha_creacion'].isoformat()
+        if req.get('fecha_actualizacion'):
+            req['fecha_actualizacion'] = req['fecha_actualizacion'].isoformat()
+        if req.get('metadata') and isinstance(req['metadata'], str):
+            req['metadata'] = json.loads(req['metadata'])
+        req['tecnica'] = {'id': req['tecnica_id'], 'nombre': req.pop('tecnica_nombre'),
+                          'categoria': req.pop('tecnica_categoria')}
+        resultado.append(req)
+    return json.dumps(resultado)
+
+
+def filas_subprocesos(rnd, n):
+    base = datetime(2024, 1, 1)
+    return [{
+        'id': i, 'proceso_id': 1, 'nombre': f'Subproceso {i}', 'descripcion': f'Actividad {i}',
+        'responsable_id': i if i % 3 else None, 'estado': 'definido',
+        'horas_estimadas': Decimal(rnd.randint(400, 8000)) / 100,
+        'fecha_creacion': base + timedelta(minutes=i), 'fecha_actualizacion': base + timedelta(hours=i),
+        'responsable_nombre': 'Ana' if i % 3 else None, 'responsable_apellido': 'Perez' if i % 3 else None,
+    } for i in range(1, n + 1)]
+
+
+COLUMNAS_SUBPROCESOS = [
+    ('id', FieldType.LONG), ('proceso_id', FieldType.LONG), ('nombre', FieldType.VAR_STRING),
+    ('descripcion', FieldType.BLOB), ('responsable_id', FieldType.LONG), ('estado', FieldType.STRING),
+    ('horas_estimadas', FieldType.NEWDECIMAL), ('fecha_creacion', FieldType.DATETIME),
+    ('fecha_actualizacion', FieldType.DATETIME), ('responsable_nombre', FieldType.VAR_STRING),
+    ('responsable_apellido', FieldType.VAR_STRING),
+]
+
+
+def manual_subprocesos(filas):
+    resultado = []
+    for s in filas:
+        resultado.append({
+            'id': s['id'],
+            'proceso_id': s['proceso_id'],
+            'nombre': s['nombre'],
+            'descripcion': s['descripcion'],
+            'responsable_id': s['responsable_id'],
+            'estado': s['estado'],
+            'horas_estimadas': float(s['horas_estimadas']) if s.get('horas_estimadas') is not None else None,
+            'fecha_creacion': s['fecha_creacion'].isoformat() if s.get('fecha_creacion') else None,
+            'fecha_actualizacion': s['fecha_actualizacion'].isoformat() if s.get('fecha_actualizacion') else None,
+            'responsable': {
+                'id': s['responsable_id'],
+                'nombre': s['responsable_nombre'],
+                'apellido': s['responsable_apellido']
+            } if s.get('responsable_id') else None
+        })
+    return json.dumps(resultado)
+
+
+FORMAS = {
+    'requerimientos': (filas_requerimientos, COLUMNAS_REQUERIMIENTOS, (TECNICA,), manual_requerimientos),
+    'subprocesos': (filas_subprocesos, COLUMNAS_SUBPROCESOS, (RESPONSABLE,), manual_subprocesos),
+}
+
+
+def medir(funcion, generar, repeticiones):
+    # Las filas se regeneran fuera del tiempo medido: ambos caminos las modifican.
+    lotes = [generar() for _ in range(repeticiones)]
+    it = iter(lotes)
+    segundos = timeit.timeit(lambda: funcion(next(it)), number=repeticiones)
+    return round(segundos / repeticiones * 1000, 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmark de serializacion de filas.')
+    parser.add_argument('--filas', type=int, default=500)
+    parser.add_argument('--repeticiones', type=int, default=200)
+    parser.add_argument('--orjson', action='store_true', help='Usar el provider con orjson (JSON_USE_ORJSON).')
+    parser.add_argument('--salida', help='Archivo JSON de resultados.')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['JSON_USE_ORJSON'] = args.orjson
+    provider = crear_json_provider(app)
+
+    resultados = {}
+    for forma, (filas, columnas, anidados, manual) in FORMAS.items():
+        cursor = CursorFalso(columnas)
+        generar = lambda: filas(random.Random(1), args.filas)
+
+        esperado = json.loads(manual(generar()))
+        obtenido = json.loads(provider.dumps(serializar(cursor, generar(), anidados)))
+        if obtenido != esperado:
+            raise SystemExit(f'{forma}: serializar no produce el mismo JSON que el bucle manual')
+
+        antes = medir(manual, generar, args.repeticiones)
+        despues = medir(lambda f: provider.dumps(serializar(cursor, f, anidados)), generar, args.repeticiones)
+        resultados[forma] = {
+            'manual_ms': antes,
+            'serializar_ms': despues,
+            'mejora': round(antes / despues, 2) if despues else None,
+        }
+
+    print(f"{'forma':<16} {'manual_ms':>10} {'serializar_ms':>14} {'mejora':>7}")
+    for forma, r in resultados.items():
+        print(f"{forma:<16} {r['manual_ms']:>10} {r['serializar_ms']:>14} {r['mejora']!s:>7}")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump({
+                'commit': commit_actual(),
+                'filas': args.filas,
+                'orjson': args.orjson,
+                'resultados': resultados,
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
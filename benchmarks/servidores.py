@@ -0,0 +1,100 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks.ejecutar import ClienteHTTP, commit_actual, correr
+from benchmarks.sembrar import agregar_argumentos, escala_de, sembrar
+
+# Prueba de carga WSGI contra ASGI: levanta la misma app con uvicorn en los dos
+# modos (la app Flask tras --interface wsgi y asgi:app con aiomysql), corre la
+# mezcla 'listados' a varias concurrencias contra cada uno y compara.
+#
+#   python -m benchmarks.servidores --sembrar --concurrencias 8,32,128 --salida servidores.json
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVIDORES = {
+    'wsgi': ['app:create_app', '--factory', '--interface', 'wsgi'],
+    'asgi': ['asgi:app', '--lifespan', 'on'],
+}
+
+
+def levantar(modo, puerto, workers):
+    comando = [sys.executable, '-m', 'uvicorn', *SERVIDORES[modo], '--port', str(puerto),
+               '--workers', str(workers), '--log-level', 'warning']
+    proceso = subprocess.Popen(comando, cwd=RAIZ)
+    url = f'http://127.0.0.1:{puerto}'
+    limite = time.monotonic() + 30
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError(f'El servidor {modo} termino con codigo {proceso.returncode}')
+        try:
+            urllib.request.urlopen(url + '/api/tecnicas', timeout=1)
+            return proceso, url
+        except urllib.error.HTTPError:
+            return proceso, url
+        except OSError:
+            time.sleep(0.2)
+    proceso.terminate()
+    raise RuntimeError(f'El servidor {modo} no respondio en 30 segundos')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara el modo WSGI con el ASGI bajo carga.')
+    parser.add_argument('--concurrencias', default='8,32,128')
+    parser.add_argument('--peticiones', type=int, default=2000)
+    parser.add_argument('--calentamiento', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--puerto', type=int, default=5101)
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--sembrar', action='store_true', help='Recrear el esquema y los datos antes de medir.')
+    parser.add_argument('--salida', help='Archivo JSON de resultados.')
+    agregar_argumentos(parser)
+    args = parser.parse_args()
+
+    escala = escala_de(args)
+    siembra = sembrar(escala, args.semilla) if args.sembrar else None
+    concurrencias = [int(c) for c in args.concurrencias.split(',')]
+
+    resultados = {}
+    for indice, modo in enumerate(SERVIDORES):
+        proceso, url = levantar(modo, args.puerto + indice, args.workers)
+        try:
+            resultados[modo] = {
+                str(c): correr(lambda: ClienteHTTP(url), escala, 'listados', args.peticiones, c,
+                               args.calentamiento, args.semilla)['total']
+                for c in concurrencias
+            }
+        finally:
+            proceso.terminate()
+            proceso.wait(timeout=30)
+
+    print(f"{'concurrencia':>12}  {'modo':<5} {'p50_ms':>9} {'p95_ms':>9} {'p99_ms':>9} {'rps':>9} {'errores':>8}")
+    for c in concurrencias:
+        for modo in SERVIDORES:
+            t = resultados[modo][str(c)]
+            print(f"{c:>12}  {modo:<5} {t['p50_ms']:>9} {t['p95_ms']:>9} {t['p99_ms']:>9} "
+                  f"{t['throughput_rps']:>9} {t['errores']:>8}")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump({
+                'commit': commit_actual(),
+                'escala': vars(escala),
+                'siembra': siembra,
+                'workers': args.workers,
+                'resultados': resultados,
+            }, f, indent=2)
+
+    # Un modo que devuelve errores no es comparable: se informa como fallo.
+    if any(t['errores'] for por_modo in resultados.values() for t in por_modo.values()):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from acceso import proyectos_accesibles
+from busqueda_memoria import IndiceBusqueda
+from config import Config
+from extensions import get_db_connection, nueva_conexion
+from pagination import CursorInvalido, codificar_cursor, decodificar_cursor
+
+busqueda_bp = Blueprint('busqueda', __name__)
+
+# Por tipo: tablas a recorrer, expresion del proyecto dueno, columnas del
+# resultado y columnas del indice FULLTEXT (deben coincidir con el indice).
+FUENTES = {
+    'requerimiento': {
+        'desde': """requerimientos r
+            JOIN subprocesos s ON r.subproceso_id = s.id
+            JOIN procesos p ON s.proceso_id = p.id""",
+        'proyecto': 'p.proyecto_id',
+        'columnas': "r.id, p.proyecto_id, CONCAT(r.codigo, ' ', r.titulo) AS titulo, LEFT(r.descripcion, 200) AS extracto",
+        'texto': 'r.titulo, r.descripcion',
+    },
+    'stakeholder': {
+        'desde': 'stakeholders sh',
+        'proyecto': 'sh.proyecto_id',
+        'columnas': "sh.id, sh.proyecto_id, sh.nombre_completo AS titulo, CONCAT_WS(' - ', sh.organizacion, sh.cargo) AS extracto",
+        'texto': 'sh.nombre_completo, sh.organizacion, sh.cargo',
+    },
+    'proceso': {
+        'desde': 'procesos p',
+        'proyecto': 'p.proyecto_id',
+        'columnas': 'p.id, p.proyecto_id, p.nombre AS titulo, LEFT(p.descripcion, 200) AS extracto',
+        'texto': 'p.nombre, p.descripcion',
+    },
+    'subproceso': {
+        'desde': 'subprocesos s JOIN procesos p ON s.proceso_id = p.id',
+        'proyecto': 'p.proyecto_id',
+        'columnas': 's.id, p.proyecto_id, s.nombre AS titulo, LEFT(s.descripcion, 200) AS extracto',
+        'texto': 's.nombre, s.descripcion',
+    },
+}
+
+BLUEPRINTS_INDEXADOS = {'requerimientos', 'stakeholders', 'procesos', 'subprocesos'}
+
+
+def cargar_documentos():
+    conn = nueva_conexion()
+    cursor = conn.cursor(dictionary=True)
+
+    documentos = []
+    for tipo, fuente in FUENTES.items():
+        cursor.execute(f"SELECT {fuente['columnas']}, CONCAT_WS(' ', {fuente['texto']}) AS texto FROM {fuente['desde']}")
+        for fila in cursor.fetchall():
+            texto = fila.pop('texto')
+            documentos.append(((tipo, fila['id']), texto, dict(fila, tipo=tipo)))
+
+    cursor.close()
+    conn.close()
+    return documentos
+
+
+indice_memoria = IndiceBusqueda(cargar_documentos, ttl=Config.BUSQUEDA_INDICE_TTL)
+
+
+@busqueda_bp.after_app_request
+def invalidar_indice(response):
+    if (request.method in ('POST', 'PUT', 'PATCH', 'DELETE')
+            and request.blueprint in BLUEPRINTS_INDEXADOS and response.status_code < 400):
+        indice_memoria.invalidar()
+    return response
+
+
+def buscar_fulltext(cursor, consulta, tipos, proyecto_ids, desde, limite):
+    placeholders = ', '.join(['%s'] * len(proyecto_ids))
+    partes = []
+    params = []
+    for tipo in tipos:
+        fuente = FUENTES[tipo]
+        partes.append(f"""
+            SELECT '{tipo}' AS tipo, {fuente['columnas']},
+                   MATCH({fuente['texto']}) AGAINST (%s IN NATURAL LANGUAGE MODE) AS puntaje
+            FROM {fuente['desde']}
+            WHERE {fuente['proyecto']} IN ({placeholders})
+              AND MATCH({fuente['texto']}) AGAINST (%s IN NATURAL LANGUAGE MODE)
+        """)
+        params += [consulta, *proyecto_ids, consulta]
+
+    cursor.execute(f"""
+        {' UNION ALL '.join(partes)}
+        ORDER BY puntaje DESC, tipo, id
+        LIMIT %s OFFSET %s
+    """, params + [limite, desde])
+    return cursor.fetchall()
+
+
+def buscar_memoria(consulta, tipos, proyecto_ids, desde, limite):
+    permitidos = set(proyecto_ids)
+    resultados = indice_memoria.actual().buscar(
+        consulta, lambda doc: doc['tipo'] in tipos and doc['proyecto_id'] in permitidos
+    )
+    resultados.sort(key=lambda r: (-r[0], r[1]['tipo'], r[1]['id']))
+    return [dict(doc, puntaje=puntaje) for puntaje, doc in resultados[desde:desde + limite]]
+
+
+# Busqueda global sobre los proyectos del usuario. Pagina por desplazamiento
+# (el orden es por relevancia), pero expone el mismo cursor opaco X-Next-Cursor
+# que los listados.
+@busqueda_bp.route('', methods=['GET'])
+@jwt_required()
+def buscar():
+    current_user_id = get_jwt_identity()
+
+    consulta = (request.args.get('q') or '').strip()
+    if len(consulta) < 2:
+        return jsonify({'error': 'La consulta debe tener al menos 2 caracteres'}), 400
+
+    tipos = list(FUENTES)
+    if request.args.get('tipos'):
+        tipos = [t for t in request.args['tipos'].split(',') if t in FUENTES]
+        if not tipos:
+            return jsonify({'error': f"tipos validos: {', '.join(FUENTES)}"}), 400
+
+    limite = request.args.get('limit', 20, type=int)
+    limite = max(1, min(limite, current_app.config['PAGINATION_MAX_LIMIT']))
+
+    desde = 0
+    if request.args.get('after'):
+        _, desde = decodificar_cursor(request.args['after'])
+        if not isinstance(desde, int) or desde < 0:
+            raise CursorInvalido('Cursor de paginacion invalido')
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    proyecto_ids = proyectos_accesibles(cursor, current_user_id)
+
+    proyecto_id = request.args.get('proyecto_id', type=int)
+    if proyecto_id:
+        if proyecto_id not in proyecto_ids:
+            cursor.close()
+            conn.close()
+            return jsonify({'error': 'No tienes acceso a este proyecto'}), 403
+        proyecto_ids = [proyecto_id]
+
+    resultados = []
+    if proyecto_ids:
+        # Se pide uno de mas para saber si hay otra pagina.
+        if current_app.config['BUSQUEDA_BACKEND'] == 'memoria':
+            resultados = buscar_memoria(consulta, tipos, proyecto_ids, desde, limite + 1)
+        else:
+            resultados = buscar_fulltext(cursor, consulta, tipos, proyecto_ids, desde, limite + 1)
+
+    cursor.close()
+    conn.close()
+
+    siguiente = None
+    if len(resultados) > limite:
+        resultados = resultados[:limite]
+        siguiente = codificar_cursor(None, desde + limite)
+
+    resp = jsonify(resultados)
+    if siguiente:
+        resp.headers['X-Next-Cursor'] = siguiente
+    return resp, 200
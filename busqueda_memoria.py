@@ -0,0 +1,73 @@
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+
+
+def tokens(texto):
+    texto = unicodedata.normalize('NFKD', (texto or '').lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return [t for t in re.findall(r'\w+', texto) if len(t) >= 2]
+
+
+# Indice invertido minimo (token -> documentos) con puntaje tf-idf. Sustituye a
+# los indices FULLTEXT de MySQL en entornos de prueba donde no estan creados.
+class IndiceInvertido:
+    def __init__(self):
+        self._postings = {}
+        self._docs = {}
+
+    def agregar(self, clave, texto, datos):
+        frecuencias = Counter(tokens(texto))
+        if not frecuencias:
+            return
+        self._docs[clave] = (datos, math.sqrt(sum(frecuencias.values())))
+        for token, tf in frecuencias.items():
+            self._postings.setdefault(token, {})[clave] = tf
+
+    def buscar(self, consulta, filtro=None):
+        total = len(self._docs)
+        puntajes = {}
+        for token in set(tokens(consulta)):
+            postings = self._postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + total / len(postings))
+            for clave, tf in postings.items():
+                puntajes[clave] = puntajes.get(clave, 0.0) + tf * idf
+
+        resultados = []
+        for clave, puntaje in puntajes.items():
+            datos, norma = self._docs[clave]
+            if filtro is None or filtro(datos):
+                resultados.append((round(puntaje / norma, 6), datos))
+        return resultados
+
+
+# Mantiene un IndiceInvertido construido con cargar() y lo reconstruye cuando
+# vence el ttl o cuando se invalida tras una escritura.
+class IndiceBusqueda:
+    def __init__(self, cargar, ttl=60):
+        self.cargar = cargar
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._indice = None
+        self._creado_en = 0.0
+
+    def actual(self):
+        indice = self._indice
+        if indice is None or time.monotonic() - self._creado_en > self.ttl:
+            with self._lock:
+                if self._indice is indice:
+                    nuevo = IndiceInvertido()
+                    for clave, texto, datos in self.cargar():
+                        nuevo.agregar(clave, texto, datos)
+                    self._indice = nuevo
+                    self._creado_en = time.monotonic()
+            indice = self._indice
+        return indice
+
+    def invalidar(self):
+        self._indice = None
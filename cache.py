@@ -0,0 +1,142 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+CACHES = {}
+
+_SIN_VALOR = object()
+
+
+class RedisBackend:
+    def __init__(self, url, prefijo):
+        self._cliente = redis.Redis.from_url(url)
+        self._prefijo = prefijo
+
+    def get(self, clave):
+        crudo = self._cliente.get(f'{self._prefijo}:{clave}')
+        return _SIN_VALOR if crudo is None else json.loads(crudo)
+
+    def set(self, clave, valor, ttl):
+        crudo = json.dumps(valor, default=lambda o: o.isoformat() if hasattr(o, 'isoformat') else str(o))
+        self._cliente.set(f'{self._prefijo}:{clave}', crudo, ex=max(1, int(ttl)))
+
+    def delete(self, clave):
+        self._cliente.delete(f'{self._prefijo}:{clave}')
+
+
+def crear_backend_compartido(url, prefijo):
+    if not url or redis is None:
+        return None
+    return RedisBackend(url, prefijo)
+
+
+# Cache LRU en memoria con expiracion por entrada. Si se configura un backend
+# compartido se usa como segundo nivel para que varios procesos se vean las
+# mismas entradas; las invalidaciones se propagan a ambos niveles. Pero una
+# invalidacion no llega al nivel en memoria de los otros procesos: con
+# local=False ese nivel no se usa si hay compartido y todo se lee de ahi. Sin
+# compartido el nivel en memoria es el unico y sus entradas viven ttl_local,
+# que acota cuanto puede tardar otro worker en ver una invalidacion.
+class TTLCache:
+    def __init__(self, nombre, maxsize=1024, ttl=300, compartido=None, local=True, ttl_local=None):
+        self.nombre = nombre
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.compartido = compartido
+        self.local = local or compartido is None
+        self.ttl_local = ttl if local or ttl_local is None else min(ttl, ttl_local)
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._aciertos = 0
+        self._fallos = 0
+        self._desalojos = 0
+        self._expirados = 0
+        self._invalidaciones = 0
+
+        CACHES[nombre] = self
+
+    def get(self, clave, default=None):
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None:
+                expira, valor = entrada
+                if expira > ahora:
+                    self._datos.move_to_end(clave)
+                    self._aciertos += 1
+                    return valor
+                del self._datos[clave]
+                self._expirados += 1
+
+        if self.compartido is not None:
+            valor = self.compartido.get(clave)
+            if valor is not _SIN_VALOR:
+                self._guardar_local(clave, valor)
+                with self._lock:
+                    self._aciertos += 1
+                return valor
+
+        with self._lock:
+            self._fallos += 1
+        return default
+
+    def set(self, clave, valor):
+        self._guardar_local(clave, valor)
+        if self.compartido is not None:
+            self.compartido.set(clave, valor, self.ttl)
+
+    def _guardar_local(self, clave, valor):
+        if not self.local:
+            return
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + self.ttl_local, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+                self._desalojos += 1
+
+    def get_or_load(self, clave, cargar):
+        valor = self.get(clave, _SIN_VALOR)
+        if valor is not _SIN_VALOR:
+            return valor
+        valor = cargar()
+        if valor is not None:
+            self.set(clave, valor)
+        return valor
+
+    def invalidate(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+            self._invalidaciones += 1
+        if self.compartido is not None:
+            self.compartido.delete(clave)
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+            self._invalidaciones += 1
+
+    def stats(self):
+        with self._lock:
+            total = self._aciertos + self._fallos
+            return {
+                'tamano': len(self._datos),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'ttl_local': self.ttl_local,
+                'aciertos': self._aciertos,
+                'fallos': self._fallos,
+                'ratio_aciertos': round(self._aciertos / total, 4) if total else 0.0,
+                'desalojos': self._desalojos,
+                'expirados': self._expirados,
+                'invalidaciones': self._invalidaciones,
+                'compartido': self.compartido is not None,
+                'local': self.local,
+            }
@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+
+from cache import CACHES
+from extensions import nueva_conexion
+
+logger = logging.getLogger('gestproy.catalogo')
+
+
+# Catalogo de solo lectura (tecnicas y roles fijos) que cambia muy pocas veces.
+# Se carga completo en memoria y se reemplaza de una sola vez en cada recarga,
+# de modo que los lectores nunca ven un estado a medias. Los handlers de
+# escritura llaman a recargar(); ttl cubre cambios hechos desde otros procesos.
+class Catalogo:
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.version = 0
+        self._lock = threading.Lock()
+        self._estado = None
+        self._cargado_en = 0.0
+        CACHES['catalogo'] = self
+
+    # Si la base no esta disponible al arrancar, la primera lectura reintenta la carga.
+    def init_app(self, app):
+        self.ttl = app.config['CATALOGO_TTL']
+        app.extensions['catalogo'] = self
+        try:
+            self.recargar()
+        except Exception:
+            logger.exception('No se pudo cargar el catalogo al iniciar')
+
+    def recargar(self):
+        conn = nueva_conexion()
+        cursor = conn.cursor(dictionary=True)
+
+        cursor.execute("SELECT * FROM tecnicas ORDER BY id")
+        tecnicas = tuple(cursor.fetchall())
+
+        cursor.execute("SELECT * FROM roles WHERE es_fijo = TRUE ORDER BY id")
+        roles_fijos = tuple(cursor.fetchall())
+
+        cursor.close()
+        conn.close()
+
+        activas = tuple(t for t in tecnicas if t['activo'])
+        por_categoria = {}
+        for t in activas:
+            por_categoria.setdefault(t['categoria'], []).append(t)
+
+        estado = {
+            'tecnicas': tecnicas,
+            'activas': activas,
+            'por_categoria': {c: tuple(ts) for c, ts in por_categoria.items()},
+            'tecnica_por_id': {t['id']: t for t in tecnicas},
+            'roles_fijos': roles_fijos,
+            'rol_fijo_por_id': {r['id']: r for r in roles_fijos},
+            'rol_fijo_por_nombre': {r['nombre']: r for r in roles_fijos},
+        }
+
+        with self._lock:
+            self._estado = estado
+            self._cargado_en = time.monotonic()
+            self.version += 1
+
+    # Descarta lo cargado; la proxima lectura vuelve a la base.
+    def clear(self):
+        with self._lock:
+            self._estado = None
+            self._cargado_en = 0.0
+
+    def _actual(self):
+        if self._estado is None or time.monotonic() - self._cargado_en > self.ttl:
+            self.recargar()
+        return self._estado
+
+    def tecnicas(self, categoria=None, solo_activas=True):
+        estado = self._actual()
+        if categoria:
+            return list(estado['por_categoria'].get(categoria, ()))
+        return list(estado['activas'] if solo_activas else estado['tecnicas'])
+
+    def tecnica(self, id):
+        return self._actual()['tecnica_por_id'].get(id)
+
+    def roles_fijos(self):
+        return list(self._actual()['roles_fijos'])
+
+    def rol_fijo(self, id):
+        return self._actual()['rol_fijo_por_id'].get(id)
+
+    def rol_fijo_por_nombre(self, nombre):
+        return self._actual()['rol_fijo_por_nombre'].get(nombre)
+
+    def stats(self):
+        estado = self._estado
+        return {
+            'version': self.version,
+            'ttl': self.ttl,
+            'cargado': estado is not None,
+            'edad_s': round(time.monotonic() - self._cargado_en, 1) if estado else None,
+            'tecnicas': len(estado['tecnicas']) if estado else 0,
+            'categorias': len(estado['por_categoria']) if estado else 0,
+            'roles_fijos': len(estado['roles_fijos']) if estado else 0,
+        }
+
+
+catalogo = Catalogo()
@@ -0,0 +1,208 @@
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+
+from serializers import serializar
+
+logger = logging.getLogger('gestproy.trabajos')
+
+# tipo -> funcion(parametros, trabajo, avance) que hace el trabajo y devuelve
+# el resultado (serializable a JSON). Se registran con @tarea (ver tareas.py).
+TAREAS = {}
+
+
+# Error que no tiene sentido reintentar (datos invalidos, archivo corrupto):
+# el trabajo pasa directo a error.
+class TrabajoFallido(Exception):
+    pass
+
+
+def tarea(tipo):
+    def registrar(funcion):
+        TAREAS[tipo] = funcion
+        return funcion
+    return registrar
+
+
+# Con clave, repetir la peticion (reintento del cliente tras un timeout)
+# devuelve el trabajo ya encolado en lugar de crear otro. La clave es por
+# usuario. Devuelve (id, creado). Si dos peticiones con la misma clave llegan a
+# la vez, la segunda choca con la clave unica y LAST_INSERT_ID(id) le devuelve
+# el trabajo de la primera (ambas lo informan como creado); cualquier otro error
+# se propaga.
+def encolar(cursor, tipo, parametros=None, usuario_id=None, clave=None, max_intentos=3):
+    if clave is not None:
+        existente = buscar(cursor, usuario_id, clave)
+        if existente is not None:
+            return existente, False
+
+    cursor.execute("""
+        INSERT INTO trabajos (tipo, parametros, creado_por, clave_idempotencia, max_intentos)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)
+    """, (tipo, json.dumps(parametros or {}), usuario_id, clave, max_intentos))
+    return cursor.lastrowid, True
+
+
+def buscar(cursor, usuario_id, clave):
+    cursor.execute("SELECT id FROM trabajos WHERE creado_por <=> %s AND clave_idempotencia = %s",
+                   (usuario_id, clave))
+    fila = cursor.fetchone()
+    return fila['id'] if fila else None
+
+
+def leer(cursor, trabajo_id):
+    cursor.execute("SELECT * FROM trabajos WHERE id = %s", (trabajo_id,))
+    fila = cursor.fetchone()
+    return serializar(cursor, [fila])[0] if fila else None
+
+
+class Avance:
+    def __init__(self):
+        self.progreso = 0.0
+        self.mensaje = None
+
+    def __call__(self, progreso, mensaje=None):
+        self.progreso = max(0.0, min(float(progreso), 1.0))
+        self.mensaje = mensaje[:255] if mensaje else None
+
+
+# Toma trabajos de la tabla de a uno. Mientras corre una tarea, un hilo
+# escribe el avance y el latido cada `latido` segundos por la conexion de
+# control (la tarea usa su propia conexion), asi que las tareas solo actualizan
+# un objeto en memoria. Un trabajo en_progreso sin latido por mas de
+# `abandonado` segundos se considera de un worker caido y se vuelve a tomar.
+# mantenimiento, si se indica, corre entre trabajos cada `mantenimiento_cada`
+# segundos (p. ej. borrar archivos viejos).
+class Worker:
+    def __init__(self, conectar, nombre=None, latido=15, abandonado=300, backoff=30, backoff_max=3600,
+                 mantenimiento=None, mantenimiento_cada=3600):
+        self.conectar = conectar
+        self.nombre = nombre or f'{socket.gethostname()}:{os.getpid()}'
+        self.latido = latido
+        self.abandonado = abandonado
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.mantenimiento = mantenimiento
+        self.mantenimiento_cada = mantenimiento_cada
+        self._proximo_mantenimiento = 0.0
+
+    def mantener(self):
+        if self.mantenimiento is None or time.monotonic() < self._proximo_mantenimiento:
+            return
+        self._proximo_mantenimiento = time.monotonic() + self.mantenimiento_cada
+        try:
+            self.mantenimiento()
+        except Exception:
+            logger.exception('Fallo el mantenimiento del worker')
+
+    def tomar(self, conn, cursor):
+        cursor.execute("""
+            SELECT * FROM trabajos
+            WHERE (estado = 'pendiente' AND disponible_en <= NOW())
+               OR (estado = 'en_progreso' AND fecha_latido < NOW() - INTERVAL %s SECOND)
+            ORDER BY disponible_en, id
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        """, (self.abandonado,))
+        fila = cursor.fetchone()
+        if fila:
+            # Se serializa antes del UPDATE, que deja el cursor sin description.
+            fila = serializar(cursor, [fila])[0]
+            cursor.execute("""
+                UPDATE trabajos
+                SET estado = 'en_progreso', intentos = intentos + 1, tomado_por = %s, fecha_latido = NOW()
+                WHERE id = %s
+            """, (self.nombre, fila['id']))
+            fila['intentos'] += 1
+        conn.commit()
+        return fila
+
+    def _latir(self, conn, trabajo_id, avance, detener):
+        cursor = conn.cursor()
+        try:
+            while not detener.wait(self.latido):
+                cursor.execute("""
+                    UPDATE trabajos SET fecha_latido = NOW(), progreso = %s, mensaje = %s
+                    WHERE id = %s AND tomado_por = %s
+                """, (avance.progreso, avance.mensaje, trabajo_id, self.nombre))
+                conn.commit()
+        except Exception:
+            logger.exception('No se pudo registrar el latido del trabajo %s', trabajo_id)
+        finally:
+            cursor.close()
+
+    def ejecutar(self, conn, cursor, trabajo):
+        funcion = TAREAS.get(trabajo['tipo'])
+        avance = Avance()
+        detener = threading.Event()
+        hilo = threading.Thread(target=self._latir, args=(conn, trabajo['id'], avance, detener), daemon=True)
+
+        if funcion is None:
+            error, reintentar = TrabajoFallido(f"Tipo de trabajo desconocido: {trabajo['tipo']}"), False
+        elif trabajo['intentos'] > trabajo['max_intentos']:
+            error, reintentar = TrabajoFallido('Se agotaron los reintentos'), False
+        else:
+            hilo.start()
+            try:
+                resultado = funcion(trabajo['parametros'] or {}, trabajo, avance)
+                error = None
+            except TrabajoFallido as e:
+                error, reintentar = e, False
+            except Exception as e:
+                logger.exception('Fallo el trabajo %s (%s)', trabajo['id'], trabajo['tipo'])
+                error, reintentar = e, trabajo['intentos'] < trabajo['max_intentos']
+            finally:
+                detener.set()
+                hilo.join()
+
+        # tomado_por en el WHERE: si otro worker lo retomo por abandonado, su
+        # resultado prevalece.
+        if error is None:
+            cursor.execute("""
+                UPDATE trabajos
+                SET estado = 'completado', progreso = 1, mensaje = NULL, resultado = %s, error = NULL,
+                    fecha_fin = NOW()
+                WHERE id = %s AND tomado_por = %s
+            """, (json.dumps(resultado, default=str), trabajo['id'], self.nombre))
+        elif reintentar:
+            # Backoff exponencial con jitter para no reintentar en rafaga.
+            espera = min(self.backoff * 2 ** (trabajo['intentos'] - 1), self.backoff_max)
+            espera = int(espera * random.uniform(0.5, 1.0))
+            cursor.execute("""
+                UPDATE trabajos
+                SET estado = 'pendiente', error = %s, tomado_por = NULL,
+                    disponible_en = NOW() + INTERVAL %s SECOND
+                WHERE id = %s AND tomado_por = %s
+            """, (str(error), espera, trabajo['id'], self.nombre))
+        else:
+            cursor.execute("""
+                UPDATE trabajos SET estado = 'error', error = %s, fecha_fin = NOW()
+                WHERE id = %s AND tomado_por = %s
+            """, (str(error), trabajo['id'], self.nombre))
+        conn.commit()
+        return error is None
+
+    def correr(self, continuo=False, intervalo=2.0, maximo=None):
+        procesados = 0
+        conn = self.conectar()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            while maximo is None or procesados < maximo:
+                self.mantener()
+                trabajo = self.tomar(conn, cursor)
+                if trabajo is None:
+                    if not continuo:
+                        break
+                    time.sleep(intervalo)
+                    continue
+                self.ejecutar(conn, cursor, trabajo)
+                procesados += 1
+        finally:
+            cursor.close()
+            conn.close()
+        return procesados
@@ -0,0 +1,34 @@
+from flask import make_response, request
+
+
+def calcular_etag(id, fecha_actualizacion):
+    # fecha_actualizacion tiene precision de microsegundos (TIMESTAMP(6)), asi
+    # que dos escrituras seguidas no comparten validador.
+    marca = fecha_actualizacion.strftime('%Y%m%d%H%M%S%f') if fecha_actualizacion else '0'
+    return f"{id}-{marca}"
+
+
+# Si el cliente manda If-None-Match, se consulta solo fecha_actualizacion (sin
+# leer ni parsear columnas pesadas) y se responde 304 cuando coincide.
+def verificar_no_modificado(cursor, tabla, id):
+    if not request.if_none_match:
+        return None
+
+    cursor.execute(f"SELECT fecha_actualizacion FROM {tabla} WHERE id = %s", (id,))
+    fila = cursor.fetchone()
+    if not fila:
+        return None
+
+    etag = calcular_etag(id, fila['fecha_actualizacion'])
+    if not request.if_none_match.contains(etag):
+        return None
+
+    resp = make_response('', 304)
+    resp.set_etag(etag)
+    return resp
+
+
+def respuesta_con_etag(cuerpo, id, fecha_actualizacion):
+    resp = make_response(cuerpo, 200)
+    resp.set_etag(calcular_etag(id, fecha_actualizacion))
+    return resp
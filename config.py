@@ -13,3 +13,57 @@ class Config:
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'tu-clave-secreta-cambiar-en-produccion')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+    DB_POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', '10'))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '3600'))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+
+    # Pool de aiomysql del modo ASGI (asgi.py); independiente del pool sincrono.
+    ASYNC_DB_POOL_MIN = int(os.getenv('ASYNC_DB_POOL_MIN', '1'))
+    ASYNC_DB_POOL_SIZE = int(os.getenv('ASYNC_DB_POOL_SIZE', '20'))
+
+    JSON_USE_ORJSON = os.getenv('JSON_USE_ORJSON', 'true').lower() == 'true'
+    JSON_STREAM_BATCH_SIZE = int(os.getenv('JSON_STREAM_BATCH_SIZE', '200'))
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '500'))
+    IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '500'))
+    PURGE_BATCH_SIZE = int(os.getenv('PURGE_BATCH_SIZE', '500'))
+    PURGE_PAUSE_MS = int(os.getenv('PURGE_PAUSE_MS', '50'))
+
+    # Cola de trabajos (cola.py). JOBS_DIR guarda los archivos de import
+    # recibidos y los export generados; debe ser compartido entre la app y los
+    # workers, que borran los archivos con mas de JOBS_RETENTION_HOURS.
+    JOBS_DIR = os.getenv('JOBS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'jobs'))
+    JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', '3'))
+    JOBS_BACKOFF_SECONDS = int(os.getenv('JOBS_BACKOFF_SECONDS', '30'))
+    JOBS_HEARTBEAT_SECONDS = int(os.getenv('JOBS_HEARTBEAT_SECONDS', '15'))
+    JOBS_STALE_SECONDS = int(os.getenv('JOBS_STALE_SECONDS', '300'))
+    JOBS_RETENTION_HOURS = int(os.getenv('JOBS_RETENTION_HOURS', '72'))
+
+    PAGINATION_MAX_LIMIT = int(os.getenv('PAGINATION_MAX_LIMIT', '500'))
+
+    DIAGRAMA_MAX_OPERACIONES = int(os.getenv('DIAGRAMA_MAX_OPERACIONES', '500'))
+    REQUERIMIENTOS_BULK_MAX = int(os.getenv('REQUERIMIENTOS_BULK_MAX', '1000'))
+
+    # 'fulltext' usa los indices FULLTEXT de MySQL; 'memoria' un indice invertido
+    # en proceso, pensado para entornos de prueba.
+    BUSQUEDA_BACKEND = os.getenv('BUSQUEDA_BACKEND', 'fulltext')
+    BUSQUEDA_INDICE_TTL = int(os.getenv('BUSQUEDA_INDICE_TTL', '60'))
+
+    SQL_METRICS_ENABLED = os.getenv('SQL_METRICS_ENABLED', 'true').lower() == 'true'
+    SQL_SLOW_QUERY_MS = float(os.getenv('SQL_SLOW_QUERY_MS', '200'))
+
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL')
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '10000'))
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', '300'))
+    USER_CACHE_TTL_LOCAL = int(os.getenv('USER_CACHE_TTL_LOCAL', '10'))
+    CATALOGO_TTL = int(os.getenv('CATALOGO_TTL', '300'))
+    ACCESO_CACHE_SIZE = int(os.getenv('ACCESO_CACHE_SIZE', '10000'))
+    ACCESO_CACHE_TTL = int(os.getenv('ACCESO_CACHE_TTL', '300'))
+    ACCESO_CACHE_TTL_LOCAL = int(os.getenv('ACCESO_CACHE_TTL_LOCAL', '5'))
+
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', '12'))
+    HASH_WORKERS = int(os.getenv('HASH_WORKERS', str(max(1, (os.cpu_count() or 2) // 2))))
+    HASH_MAX_COLA = int(os.getenv('HASH_MAX_COLA', '32'))
+    HASH_TIMEOUT = float(os.getenv('HASH_TIMEOUT', '10'))
@@ -0,0 +1,14 @@
+-- Contador por subproceso para generar codigos REQ-NNN sin COUNT(*).
+
+CREATE TABLE IF NOT EXISTS `requerimiento_secuencias` (
+  `subproceso_id` int NOT NULL,
+  `ultimo` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`subproceso_id`),
+  CONSTRAINT `requerimiento_secuencias_ibfk_1` FOREIGN KEY (`subproceso_id`) REFERENCES `subprocesos` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+INSERT INTO `requerimiento_secuencias` (`subproceso_id`, `ultimo`)
+SELECT `subproceso_id`, MAX(CAST(SUBSTRING(`codigo`, 5) AS UNSIGNED))
+FROM `requerimientos`
+GROUP BY `subproceso_id`
+ON DUPLICATE KEY UPDATE `ultimo` = GREATEST(`ultimo`, VALUES(`ultimo`));
@@ -0,0 +1,10 @@
+-- Precision de microsegundos en fecha_actualizacion para usarla como ETag.
+
+ALTER TABLE `diagramas`
+  MODIFY `fecha_actualizacion` timestamp(6) NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
+
+ALTER TABLE `ejecuciones_tecnica`
+  MODIFY `fecha_actualizacion` timestamp(6) NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
+
+ALTER TABLE `requerimientos`
+  MODIFY `fecha_actualizacion` timestamp(6) NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
@@ -0,0 +1,4 @@
+-- Numero de version para los cambios incrementales (PATCH) de diagramas.
+
+ALTER TABLE `diagramas`
+  ADD COLUMN `version` int NOT NULL DEFAULT '1' AFTER `datos`;
@@ -0,0 +1,13 @@
+-- Indices FULLTEXT para la busqueda global (/api/busqueda).
+
+ALTER TABLE `requerimientos`
+  ADD FULLTEXT KEY `ft_requerimientos` (`titulo`,`descripcion`);
+
+ALTER TABLE `stakeholders`
+  ADD FULLTEXT KEY `ft_stakeholders` (`nombre_completo`,`organizacion`,`cargo`);
+
+ALTER TABLE `procesos`
+  ADD FULLTEXT KEY `ft_procesos` (`nombre`,`descripcion`);
+
+ALTER TABLE `subprocesos`
+  ADD FULLTEXT KEY `ft_subprocesos` (`nombre`,`descripcion`);
@@ -0,0 +1,10 @@
+-- Resumen materializado por proyecto para /api/proyectos/<id>/estadisticas.
+-- Tras crear la tabla, poblarla con: flask --app app reconstruir-estadisticas
+
+CREATE TABLE IF NOT EXISTS `estadisticas_proyecto` (
+  `proyecto_id` int NOT NULL,
+  `metrica` varchar(100) NOT NULL,
+  `valor` decimal(14,2) NOT NULL DEFAULT '0.00',
+  PRIMARY KEY (`proyecto_id`,`metrica`),
+  CONSTRAINT `estadisticas_proyecto_ibfk_1` FOREIGN KEY (`proyecto_id`) REFERENCES `proyectos` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -0,0 +1,6 @@
+-- Indice cubriente para resolver los proyectos de un usuario sin leer las filas
+-- de miembros_proyecto. Reemplaza a fk_mp_usuario, que queda como prefijo.
+
+ALTER TABLE `miembros_proyecto`
+  ADD KEY `idx_mp_usuario_proyecto` (`usuario_id`,`proyecto_id`),
+  DROP KEY `fk_mp_usuario`;
@@ -0,0 +1,6 @@
+-- El mapa de membresia (acceso.py) tambien lee rol_id; se agrega al indice de
+-- 006 para que la consulta por usuario siga sin tocar las filas.
+
+ALTER TABLE `miembros_proyecto`
+  ADD KEY `idx_mp_usuario_proyecto_rol` (`usuario_id`,`proyecto_id`,`rol_id`),
+  DROP KEY `idx_mp_usuario_proyecto`;
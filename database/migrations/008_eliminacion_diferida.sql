@@ -0,0 +1,24 @@
+-- Eliminacion diferida de proyectos: DELETE /api/proyectos/<id> solo marca
+-- eliminado_en y encola la purga; `flask --app app purgar-proyectos` borra los
+-- hijos por lotes. purgas_proyecto no tiene FK a proyectos porque sobrevive a
+-- la fila del proyecto para informar el resultado.
+
+ALTER TABLE `proyectos`
+  ADD COLUMN `eliminado_en` datetime DEFAULT NULL AFTER `fecha_actualizacion`,
+  ADD KEY `idx_proyectos_creador_eliminado` (`creado_por`,`eliminado_en`),
+  DROP KEY `fk_proyectos_creador`;
+
+CREATE TABLE IF NOT EXISTS `purgas_proyecto` (
+  `proyecto_id` int NOT NULL,
+  `solicitado_por` int NOT NULL,
+  `estado` enum('pendiente','en_progreso','completada','error') NOT NULL DEFAULT 'pendiente',
+  `tabla` varchar(64) DEFAULT NULL,
+  `filas_borradas` int NOT NULL DEFAULT '0',
+  `filas_totales` int DEFAULT NULL,
+  `error` text,
+  `fecha_solicitud` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `fecha_actualizacion` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  `fecha_fin` datetime DEFAULT NULL,
+  PRIMARY KEY (`proyecto_id`),
+  KEY `idx_purgas_estado` (`estado`,`fecha_actualizacion`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
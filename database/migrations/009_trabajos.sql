@@ -0,0 +1,29 @@
+-- Cola de trabajos en segundo plano (cola.py). Los procesos de
+-- `flask --app app procesar-trabajos` toman filas pendientes con
+-- FOR UPDATE SKIP LOCKED; disponible_en programa los reintentos con backoff y
+-- fecha_latido permite detectar trabajos de un worker caido.
+
+CREATE TABLE IF NOT EXISTS `trabajos` (
+  `id` bigint NOT NULL AUTO_INCREMENT,
+  `tipo` varchar(50) NOT NULL,
+  `parametros` json DEFAULT NULL,
+  `estado` enum('pendiente','en_progreso','completado','error') NOT NULL DEFAULT 'pendiente',
+  `clave_idempotencia` varchar(100) DEFAULT NULL,
+  `creado_por` int DEFAULT NULL,
+  `intentos` int NOT NULL DEFAULT '0',
+  `max_intentos` int NOT NULL DEFAULT '3',
+  `disponible_en` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `progreso` decimal(5,4) NOT NULL DEFAULT '0.0000',
+  `mensaje` varchar(255) DEFAULT NULL,
+  `resultado` json DEFAULT NULL,
+  `error` text,
+  `tomado_por` varchar(100) DEFAULT NULL,
+  `fecha_latido` datetime DEFAULT NULL,
+  `fecha_creacion` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `fecha_actualizacion` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  `fecha_fin` datetime DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uq_trabajos_idempotencia` (`creado_por`,`clave_idempotencia`),
+  KEY `idx_trabajos_cola` (`estado`,`disponible_en`),
+  CONSTRAINT `fk_trabajos_creador` FOREIGN KEY (`creado_por`) REFERENCES `usuarios` (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -0,0 +1,11 @@
+-- generar_codigos ya no parte del mayor codigo existente cuando falta la fila
+-- del contador: todo subproceso tiene la suya desde que se crea. Se completan
+-- las que faltan (subprocesos sin requerimientos al correr la 001 y proyectos
+-- importados antes de que la importacion las creara).
+
+INSERT INTO `requerimiento_secuencias` (`subproceso_id`, `ultimo`)
+SELECT `s`.`id`, COALESCE(MAX(CAST(SUBSTRING(`r`.`codigo`, 5) AS UNSIGNED)), 0)
+FROM `subprocesos` `s`
+LEFT JOIN `requerimientos` `r` ON `r`.`subproceso_id` = `s`.`id`
+GROUP BY `s`.`id`
+ON DUPLICATE KEY UPDATE `ultimo` = GREATEST(`ultimo`, VALUES(`ultimo`));
@@ -48,9 +48,10 @@ CREATE TABLE `diagramas` (
   `tipo` varchar(50) NOT NULL,
   `nombre` varchar(200) NOT NULL,
   `datos` json NOT NULL,
+  `version` int NOT NULL DEFAULT '1',
   `creado_por` int NOT NULL,
   `fecha_creacion` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
-  `fecha_actualizacion` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  `fecha_actualizacion` timestamp(6) NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
   PRIMARY KEY (`id`),
   KEY `proyecto_id` (`proyecto_id`),
   KEY `creado_por` (`creado_por`),
@@ -76,7 +77,7 @@ CREATE TABLE `ejecuciones_tecnica` (
   `notas` text,
   `creado_por` int NOT NULL,
   `fecha_creacion` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
-  `fecha_actualizacion` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  `fecha_actualizacion` timestamp(6) NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
   PRIMARY KEY (`id`),
   KEY `subproceso_tecnica_id` (`subproceso_tecnica_id`),
   KEY `creado_por` (`creado_por`),
@@ -85,6 +86,22 @@ CREATE TABLE `ejecuciones_tecnica` (
 ) ENGINE=InnoDB AUTO_INCREMENT=2 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
+--
+-- Table structure for table `estadisticas_proyecto`
+--
+
+DROP TABLE IF EXISTS `estadisticas_proyecto`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `estadisticas_proyecto` (
+  `proyecto_id` int NOT NULL,
+  `metrica` varchar(100) NOT NULL,
+  `valor` decimal(14,2) NOT NULL DEFAULT '0.00',
+  PRIMARY KEY (`proyecto_id`,`metrica`),
+  CONSTRAINT `estadisticas_proyecto_ibfk_1` FOREIGN KEY (`proyecto_id`) REFERENCES `proyectos` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `miembros_proyecto`
 --
@@ -101,7 +118,7 @@ CREATE TABLE `miembros_proyecto` (
   `fecha_asignacion` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (`id`),
   UNIQUE KEY `uk_proyecto_usuario` (`proyecto_id`,`usuario_id`),
-  KEY `fk_mp_usuario` (`usuario_id`),
+  KEY `idx_mp_usuario_proyecto_rol` (`usuario_id`,`proyecto_id`,`rol_id`),
   KEY `fk_mp_rol` (`rol_id`),
   KEY `fk_mp_asignador` (`asignado_por`),
   CONSTRAINT `fk_mp_asignador` FOREIGN KEY (`asignado_por`) REFERENCES `usuarios` (`id`),
@@ -131,6 +148,7 @@ CREATE TABLE `procesos` (
   PRIMARY KEY (`id`),
   KEY `fk_proc_proyecto` (`proyecto_id`),
   KEY `fk_proc_responsable` (`responsable_id`),
+  FULLTEXT KEY `ft_procesos` (`nombre`,`descripcion`),
   CONSTRAINT `fk_proc_proyecto` FOREIGN KEY (`proyecto_id`) REFERENCES `proyectos` (`id`) ON DELETE CASCADE,
   CONSTRAINT `fk_proc_responsable` FOREIGN KEY (`responsable_id`) REFERENCES `usuarios` (`id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=3 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -154,12 +172,51 @@ CREATE TABLE `proyectos` (
   `creado_por` int NOT NULL,
   `fecha_creacion` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
   `fecha_actualizacion` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  `eliminado_en` datetime DEFAULT NULL,
   PRIMARY KEY (`id`),
-  KEY `fk_proyectos_creador` (`creado_por`),
+  KEY `idx_proyectos_creador_eliminado` (`creado_por`,`eliminado_en`),
   CONSTRAINT `fk_proyectos_creador` FOREIGN KEY (`creado_por`) REFERENCES `usuarios` (`id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=5 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
+--
+-- Table structure for table `purgas_proyecto`
+--
+
+DROP TABLE IF EXISTS `purgas_proyecto`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `purgas_proyecto` (
+  `proyecto_id` int NOT NULL,
+  `solicitado_por` int NOT NULL,
+  `estado` enum('pendiente','en_progreso','completada','error') NOT NULL DEFAULT 'pendiente',
+  `tabla` varchar(64) DEFAULT NULL,
+  `filas_borradas` int NOT NULL DEFAULT '0',
+  `filas_totales` int DEFAULT NULL,
+  `error` text,
+  `fecha_solicitud` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `fecha_actualizacion` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  `fecha_fin` datetime DEFAULT NULL,
+  PRIMARY KEY (`proyecto_id`),
+  KEY `idx_purgas_estado` (`estado`,`fecha_actualizacion`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `requerimiento_secuencias`
+--
+
+DROP TABLE IF EXISTS `requerimiento_secuencias`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `requerimiento_secuencias` (
+  `subproceso_id` int NOT NULL,
+  `ultimo` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`subproceso_id`),
+  CONSTRAINT `requerimiento_secuencias_ibfk_1` FOREIGN KEY (`subproceso_id`) REFERENCES `subprocesos` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `requerimientos`
 --
@@ -180,11 +237,12 @@ CREATE TABLE `requerimientos` (
   `metadata` json DEFAULT NULL,
   `creado_por` int NOT NULL,
   `fecha_creacion` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
-  `fecha_actualizacion` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  `fecha_actualizacion` timestamp(6) NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
   PRIMARY KEY (`id`),
   UNIQUE KEY `uk_codigo_subproceso` (`subproceso_id`,`codigo`),
   KEY `subproceso_tecnica_id` (`subproceso_tecnica_id`),
   KEY `creado_por` (`creado_por`),
+  FULLTEXT KEY `ft_requerimientos` (`titulo`,`descripcion`),
   CONSTRAINT `requerimientos_ibfk_1` FOREIGN KEY (`subproceso_id`) REFERENCES `subprocesos` (`id`) ON DELETE CASCADE,
   CONSTRAINT `requerimientos_ibfk_2` FOREIGN KEY (`subproceso_tecnica_id`) REFERENCES `subproceso_tecnicas` (`id`) ON DELETE CASCADE,
   CONSTRAINT `requerimientos_ibfk_3` FOREIGN KEY (`creado_por`) REFERENCES `usuarios` (`id`)
@@ -232,6 +290,7 @@ CREATE TABLE `stakeholders` (
   `fecha_creacion` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (`id`),
   KEY `fk_sh_proyecto` (`proyecto_id`),
+  FULLTEXT KEY `ft_stakeholders` (`nombre_completo`,`organizacion`,`cargo`),
   CONSTRAINT `fk_sh_proyecto` FOREIGN KEY (`proyecto_id`) REFERENCES `proyectos` (`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB AUTO_INCREMENT=2 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
@@ -277,6 +336,7 @@ CREATE TABLE `subprocesos` (
   PRIMARY KEY (`id`),
   KEY `fk_sub_proceso` (`proceso_id`),
   KEY `fk_sub_responsable` (`responsable_id`),
+  FULLTEXT KEY `ft_subprocesos` (`nombre`,`descripcion`),
   CONSTRAINT `fk_sub_proceso` FOREIGN KEY (`proceso_id`) REFERENCES `procesos` (`id`) ON DELETE CASCADE,
   CONSTRAINT `fk_sub_responsable` FOREIGN KEY (`responsable_id`) REFERENCES `usuarios` (`id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=3 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -300,6 +360,39 @@ CREATE TABLE `tecnicas` (
 ) ENGINE=InnoDB AUTO_INCREMENT=16 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
+--
+-- Table structure for table `trabajos`
+--
+
+DROP TABLE IF EXISTS `trabajos`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `trabajos` (
+  `id` bigint NOT NULL AUTO_INCREMENT,
+  `tipo` varchar(50) NOT NULL,
+  `parametros` json DEFAULT NULL,
+  `estado` enum('pendiente','en_progreso','completado','error') NOT NULL DEFAULT 'pendiente',
+  `clave_idempotencia` varchar(100) DEFAULT NULL,
+  `creado_por` int DEFAULT NULL,
+  `intentos` int NOT NULL DEFAULT '0',
+  `max_intentos` int NOT NULL DEFAULT '3',
+  `disponible_en` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `progreso` decimal(5,4) NOT NULL DEFAULT '0.0000',
+  `mensaje` varchar(255) DEFAULT NULL,
+  `resultado` json DEFAULT NULL,
+  `error` text,
+  `tomado_por` varchar(100) DEFAULT NULL,
+  `fecha_latido` datetime DEFAULT NULL,
+  `fecha_creacion` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `fecha_actualizacion` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  `fecha_fin` datetime DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uq_trabajos_idempotencia` (`creado_por`,`clave_idempotencia`),
+  KEY `idx_trabajos_cola` (`estado`,`disponible_en`),
+  CONSTRAINT `fk_trabajos_creador` FOREIGN KEY (`creado_por`) REFERENCES `usuarios` (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `usuarios`
 --
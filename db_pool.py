@@ -0,0 +1,178 @@
+import queue
+import threading
+import time
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class PooledConnection:
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    @property
+    def released(self):
+        return self._released
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._raw.cursor(*args, **kwargs)
+        if self._pool.envolver_cursor:
+            return self._pool.envolver_cursor(cursor)
+        return cursor
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+        self._pool._release(self._raw, self._created_at)
+
+
+class ConnectionPool:
+    def __init__(self, factory, size=5, max_overflow=10, timeout=30, recycle=3600, pre_ping=True,
+                 envolver_cursor=None):
+        self._factory = factory
+        self.envolver_cursor = envolver_cursor
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._disponible = threading.Condition(self._lock)
+        self._abiertas = 0
+
+        self._checkouts = 0
+        self._timeouts = 0
+        self._creadas = 0
+        self._recicladas = 0
+        self._invalidadas = 0
+        self._espera_total = 0.0
+        self._espera_max = 0.0
+
+    def connect(self):
+        inicio = time.perf_counter()
+        raw, created_at = self._checkout()
+        espera = time.perf_counter() - inicio
+
+        with self._lock:
+            self._checkouts += 1
+            self._espera_total += espera
+            if espera > self._espera_max:
+                self._espera_max = espera
+
+        return PooledConnection(self, raw, created_at)
+
+    def _checkout(self):
+        limite = time.monotonic() + self.timeout
+        while True:
+            try:
+                raw, created_at = self._idle.get_nowait()
+            except queue.Empty:
+                raw = None
+
+            if raw is not None:
+                if self._es_valida(raw, created_at):
+                    return raw, created_at
+                self._descartar(raw)
+                continue
+
+            with self._lock:
+                if self._abiertas < self.size + self.max_overflow:
+                    self._abiertas += 1
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f'No hay conexiones disponibles tras {self.timeout}s '
+                        f'(size={self.size}, overflow={self.max_overflow})'
+                    )
+                self._disponible.wait(restante)
+
+        try:
+            raw = self._factory()
+        except Exception:
+            with self._lock:
+                self._abiertas -= 1
+                self._disponible.notify()
+            raise
+
+        with self._lock:
+            self._creadas += 1
+        return raw, time.monotonic()
+
+    def _es_valida(self, raw, created_at):
+        if self.recycle and time.monotonic() - created_at > self.recycle:
+            with self._lock:
+                self._recicladas += 1
+            return False
+        if self.pre_ping:
+            try:
+                raw.ping(reconnect=False)
+            except Exception:
+                with self._lock:
+                    self._invalidadas += 1
+                return False
+        return True
+
+    def _descartar(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._abiertas -= 1
+            self._disponible.notify()
+
+    def _release(self, raw, created_at):
+        try:
+            if raw.in_transaction:
+                raw.rollback()
+        except Exception:
+            self._descartar(raw)
+            return
+
+        try:
+            self._idle.put_nowait((raw, created_at))
+        except queue.Full:
+            # Conexion de overflow: se cierra en vez de quedar ociosa.
+            self._descartar(raw)
+            return
+
+        with self._lock:
+            self._disponible.notify()
+
+    def dispose(self):
+        while True:
+            try:
+                raw, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._descartar(raw)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'abiertas': self._abiertas,
+                'ociosas': self._idle.qsize(),
+                'en_uso': self._abiertas - self._idle.qsize(),
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'creadas': self._creadas,
+                'recicladas': self._recicladas,
+                'invalidadas': self._invalidadas,
+                'espera_total_ms': round(self._espera_total * 1000, 3),
+                'espera_media_ms': round(self._espera_total * 1000 / self._checkouts, 3) if self._checkouts else 0.0,
+                'espera_max_ms': round(self._espera_max * 1000, 3),
+            }
@@ -1,43 +1,62 @@
 import json
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from extensions import get_db_connection
+from acceso import requires_project_member
+from conditional import respuesta_con_etag, verificar_no_modificado
+from extensions import get_db_connection, transaccion
+from pagination import Pagina
+from serializers import serializar_fila
 
 diagramas_bp = Blueprint('diagramas', __name__)
 
+CAMPOS_DIAGRAMA_LISTA = {
+    'id': 'd.id',
+    'proyecto_id': 'd.proyecto_id',
+    'tipo': 'd.tipo',
+    'nombre': 'd.nombre',
+    'creado_por': 'd.creado_por',
+    'creado_por_nombre': 'u.nombre',
+    'creado_por_apellido': 'u.apellido',
+    'fecha_creacion': 'd.fecha_creacion',
+    'fecha_actualizacion': 'd.fecha_actualizacion'
+}
+
 @diagramas_bp.route('/proyecto/<int:proyecto_id>', methods=['GET'])
 @jwt_required()
+@requires_project_member()
 def listar_por_proyecto(proyecto_id):
+    pagina = Pagina(CAMPOS_DIAGRAMA_LISTA, orden='fecha_actualizacion', descendente=True)
+    filtro, params = pagina.filtro()
+
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
-    cursor.execute("""
-        SELECT d.id, d.proyecto_id, d.tipo, d.nombre, d.creado_por,
-               u.nombre as creado_por_nombre, u.apellido as creado_por_apellido,
-               d.fecha_creacion, d.fecha_actualizacion
+    cursor.execute(f"""
+        SELECT {pagina.select()}
         FROM diagramas d
         JOIN usuarios u ON d.creado_por = u.id
-        WHERE d.proyecto_id = %s
-        ORDER BY d.fecha_actualizacion DESC
-    """, (proyecto_id,))
+        WHERE d.proyecto_id = %s{filtro}
+        {pagina.orden_y_limite()}
+    """, (proyecto_id,) + params)
 
     diagramas = cursor.fetchall()
-    for d in diagramas:
-        if d.get('fecha_creacion'):
-            d['fecha_creacion'] = d['fecha_creacion'].isoformat()
-        if d.get('fecha_actualizacion'):
-            d['fecha_actualizacion'] = d['fecha_actualizacion'].isoformat()
-
     cursor.close()
     conn.close()
-    return jsonify(diagramas), 200
+    return pagina.respuesta(diagramas)
 
 @diagramas_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
+@requires_project_member(entidad='diagrama')
 def obtener(id):
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
+    no_modificado = verificar_no_modificado(cursor, 'diagramas', id)
+    if no_modificado:
+        cursor.close()
+        conn.close()
+        return no_modificado
+
     cursor.execute("""
         SELECT d.*, u.nombre as creado_por_nombre, u.apellido as creado_por_apellido
         FROM diagramas d
@@ -45,25 +64,19 @@ def obtener(id):
         WHERE d.id = %s
     """, (id,))
 
-    diagrama = cursor.fetchone()
+    diagrama = serializar_fila(cursor, cursor.fetchone())
     if not diagrama:
         cursor.close()
         conn.close()
         return jsonify({'error': 'Diagrama no encontrado'}), 404
 
-    if diagrama.get('fecha_creacion'):
-        diagrama['fecha_creacion'] = diagrama['fecha_creacion'].isoformat()
-    if diagrama.get('fecha_actualizacion'):
-        diagrama['fecha_actualizacion'] = diagrama['fecha_actualizacion'].isoformat()
-    if diagrama.get('datos') and isinstance(diagrama['datos'], str):
-        diagrama['datos'] = json.loads(diagrama['datos'])
-
     cursor.close()
     conn.close()
-    return jsonify(diagrama), 200
+    return respuesta_con_etag(jsonify(diagrama), id, diagrama['fecha_actualizacion'])
 
 @diagramas_bp.route('', methods=['POST'])
 @jwt_required()
+@requires_project_member()
 def crear():
     current_user_id = get_jwt_identity()
     data = request.get_json()
@@ -75,49 +88,30 @@ def crear():
     if not data.get('tipo'):
         return jsonify({'error': 'tipo es requerido'}), 400
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
     datos_json = json.dumps(data.get('datos', {'elements': [], 'connections': []}))
 
-    cursor.execute("""
-        INSERT INTO diagramas (proyecto_id, tipo, nombre, datos, creado_por)
-        VALUES (%s, %s, %s, %s, %s)
-    """, (
-        data['proyecto_id'],
-        data['tipo'],
-        data['nombre'],
-        datos_json,
-        current_user_id
-    ))
-    conn.commit()
-    diagrama_id = cursor.lastrowid
-
-    cursor.execute("SELECT * FROM diagramas WHERE id = %s", (diagrama_id,))
-    diagrama = cursor.fetchone()
-    if diagrama.get('fecha_creacion'):
-        diagrama['fecha_creacion'] = diagrama['fecha_creacion'].isoformat()
-    if diagrama.get('fecha_actualizacion'):
-        diagrama['fecha_actualizacion'] = diagrama['fecha_actualizacion'].isoformat()
-    if diagrama.get('datos') and isinstance(diagrama['datos'], str):
-        diagrama['datos'] = json.loads(diagrama['datos'])
+    with transaccion() as cursor:
+        cursor.execute("""
+            INSERT INTO diagramas (proyecto_id, tipo, nombre, datos, creado_por)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (
+            data['proyecto_id'],
+            data['tipo'],
+            data['nombre'],
+            datos_json,
+            current_user_id
+        ))
+        diagrama_id = cursor.lastrowid
+
+        cursor.execute("SELECT * FROM diagramas WHERE id = %s", (diagrama_id,))
+        diagrama = serializar_fila(cursor, cursor.fetchone())
 
-    cursor.close()
-    conn.close()
     return jsonify({'message': 'Diagrama creado', 'diagrama': diagrama}), 201
 
 @diagramas_bp.route('/<int:id>', methods=['PUT'])
 @jwt_required()
+@requires_project_member(entidad='diagrama')
 def actualizar(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("SELECT id FROM diagramas WHERE id = %s", (id,))
-    if not cursor.fetchone():
-        cursor.close()
-        conn.close()
-        return jsonify({'error': 'Diagrama no encontrado'}), 404
-
     data = request.get_json()
     updates = []
     values = []
@@ -129,39 +123,171 @@ def actualizar(id):
         updates.append("datos = %s")
         valores_datos = data['datos']
         values.append(json.dumps(valores_datos) if isinstance(valores_datos, dict) else valores_datos)
+        updates.append("version = version + 1")
 
-    if updates:
-        values.append(id)
-        cursor.execute(f"UPDATE diagramas SET {', '.join(updates)} WHERE id = %s", values)
-        conn.commit()
+    with transaccion() as cursor:
+        if updates:
+            values.append(id)
+            cursor.execute(f"UPDATE diagramas SET {', '.join(updates)} WHERE id = %s", values)
+            if cursor.rowcount == 0:
+                return jsonify({'error': 'Diagrama no encontrado'}), 404
 
-    cursor.execute("SELECT * FROM diagramas WHERE id = %s", (id,))
-    diagrama = cursor.fetchone()
-    if diagrama.get('fecha_creacion'):
-        diagrama['fecha_creacion'] = diagrama['fecha_creacion'].isoformat()
-    if diagrama.get('fecha_actualizacion'):
-        diagrama['fecha_actualizacion'] = diagrama['fecha_actualizacion'].isoformat()
-    if diagrama.get('datos') and isinstance(diagrama['datos'], str):
-        diagrama['datos'] = json.loads(diagrama['datos'])
+        cursor.execute("SELECT * FROM diagramas WHERE id = %s", (id,))
+        diagrama = serializar_fila(cursor, cursor.fetchone())
+
+    if not diagrama:
+        return jsonify({'error': 'Diagrama no encontrado'}), 404
 
-    cursor.close()
-    conn.close()
     return jsonify({'message': 'Diagrama actualizado', 'diagrama': diagrama}), 200
 
+COLECCIONES = {'element': 'elements', 'connection': 'connections'}
+
+class OperacionInvalida(ValueError):
+    pass
+
+def _indice(ids, coleccion, item_id):
+    # Los items sin id figuran como None y no se pueden referenciar.
+    if item_id is None:
+        raise OperacionInvalida('la operacion requiere el id del item')
+    try:
+        return ids.index(item_id)
+    except ValueError:
+        raise OperacionInvalida(f'{coleccion} con id {item_id} no existe')
+
+# Id de cada posicion de los arreglos, con None para los items que no tienen id,
+# de modo que los indices coincidan con los del documento. Un arreglo que no
+# existe queda en None. Solo se leen los ids, no el documento completo.
+def leer_ids(cursor, diagrama_id, tipos):
+    ids_por_coleccion = {c: [] if tipos[f'tipo_{c}'] == 'ARRAY' else None for c in COLECCIONES.values()}
+    cursor.execute("""
+        SELECT 'elements' AS coleccion, j.pos, j.id
+        FROM diagramas d, JSON_TABLE(d.datos, '$.elements[*]' COLUMNS (pos FOR ORDINALITY, id JSON PATH '$.id')) j
+        WHERE d.id = %s
+        UNION ALL
+        SELECT 'connections', j.pos, j.id
+        FROM diagramas d, JSON_TABLE(d.datos, '$.connections[*]' COLUMNS (pos FOR ORDINALITY, id JSON PATH '$.id')) j
+        WHERE d.id = %s
+        ORDER BY coleccion, pos
+    """, (diagrama_id, diagrama_id))
+    for fila in cursor.fetchall():
+        ids = ids_por_coleccion[fila['coleccion']]
+        if ids is not None:
+            ids.append(json.loads(fila['id']) if fila['id'] is not None else None)
+    return ids_por_coleccion
+
+# Traduce las operaciones a una sola expresion JSON_SET/JSON_REMOVE anidada (se
+# aplican en orden), las dos funciones que MySQL puede aplicar como
+# actualizacion parcial. Un add es un JSON_SET sobre la posicion siguiente al
+# ultimo item. Los indices de cada arreglo se simulan en memoria para que un
+# delete desplace correctamente los indices de las operaciones siguientes.
+def compilar_operaciones(ids_por_coleccion, operaciones):
+    if not isinstance(operaciones, list):
+        raise OperacionInvalida('operaciones debe ser una lista')
+
+    expr = 'datos'
+    params = []
+
+    for op in operaciones:
+        if not isinstance(op, dict):
+            raise OperacionInvalida('cada operacion debe ser un objeto')
+        tipo = op.get('tipo', 'element')
+        coleccion = COLECCIONES.get(tipo) if isinstance(tipo, str) else None
+        if not coleccion:
+            raise OperacionInvalida(f'tipo invalido: {tipo}')
+        ids = ids_por_coleccion[coleccion]
+        if ids is None:
+            raise OperacionInvalida(f'el diagrama no tiene el arreglo {coleccion}')
+        accion = op.get('op')
+
+        if accion == 'add':
+            item = op.get('item')
+            if not isinstance(item, dict) or item.get('id') is None:
+                raise OperacionInvalida('add requiere un item con id')
+            if item['id'] in ids:
+                raise OperacionInvalida(f"{coleccion} con id {item['id']} ya existe")
+            expr = f"JSON_SET({expr}, %s, CAST(%s AS JSON))"
+            params += [f'$.{coleccion}[{len(ids)}]', json.dumps(item)]
+            ids.append(item['id'])
+
+        elif accion == 'delete':
+            i = _indice(ids, coleccion, op.get('id'))
+            expr = f"JSON_REMOVE({expr}, %s)"
+            params.append(f'$.{coleccion}[{i}]')
+            ids.pop(i)
+
+        elif accion == 'move':
+            i = _indice(ids, coleccion, op.get('id'))
+            if 'x' not in op or 'y' not in op:
+                raise OperacionInvalida('move requiere x e y')
+            expr = f"JSON_SET({expr}, %s, CAST(%s AS JSON), %s, CAST(%s AS JSON))"
+            params += [f'$.{coleccion}[{i}].x', json.dumps(op['x']), f'$.{coleccion}[{i}].y', json.dumps(op['y'])]
+
+        elif accion == 'update':
+            i = _indice(ids, coleccion, op.get('id'))
+            attrs = op.get('attrs')
+            if not isinstance(attrs, dict) or not attrs:
+                raise OperacionInvalida('update requiere attrs')
+            for clave, valor in attrs.items():
+                if clave == 'id':
+                    raise OperacionInvalida('no se puede cambiar el id')
+                expr = f"JSON_SET({expr}, %s, CAST(%s AS JSON))"
+                params += [f'$.{coleccion}[{i}].{json.dumps(clave)}', json.dumps(valor)]
+
+        else:
+            raise OperacionInvalida(f'operacion invalida: {accion}')
+
+    return expr, params
+
+@diagramas_bp.route('/<int:id>', methods=['PATCH'])
+@jwt_required()
+@requires_project_member(entidad='diagrama')
+def aplicar_cambios(id):
+    data = request.get_json()
+
+    if not isinstance(data, dict) or not isinstance(data.get('version'), int):
+        return jsonify({'error': 'version es requerida'}), 400
+    operaciones = data.get('operaciones')
+    if not isinstance(operaciones, list) or not operaciones:
+        return jsonify({'error': 'operaciones es requerido'}), 400
+    if len(operaciones) > current_app.config['DIAGRAMA_MAX_OPERACIONES']:
+        return jsonify({'error': 'Demasiadas operaciones en un solo cambio'}), 413
+
+    with transaccion() as cursor:
+        cursor.execute("""
+            SELECT version,
+                   JSON_TYPE(JSON_EXTRACT(datos, '$.elements')) as tipo_elements,
+                   JSON_TYPE(JSON_EXTRACT(datos, '$.connections')) as tipo_connections
+            FROM diagramas WHERE id = %s FOR UPDATE
+        """, (id,))
+        actual = cursor.fetchone()
+
+        if not actual:
+            return jsonify({'error': 'Diagrama no encontrado'}), 404
+
+        if actual['version'] != data['version']:
+            return jsonify({'error': 'El diagrama fue modificado por otro usuario', 'version': actual['version']}), 409
+
+        try:
+            expr, params = compilar_operaciones(leer_ids(cursor, id, actual), operaciones)
+        except OperacionInvalida as e:
+            return jsonify({'error': str(e)}), 400
+
+        cursor.execute(
+            f"UPDATE diagramas SET datos = {expr}, version = version + 1 WHERE id = %s",
+            params + [id]
+        )
+
+    return jsonify({'message': 'Diagrama actualizado', 'version': actual['version'] + 1}), 200
+
 @diagramas_bp.route('/<int:id>', methods=['DELETE'])
 @jwt_required()
+@requires_project_member(entidad='diagrama')
 def eliminar(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    with transaccion() as cursor:
+        cursor.execute("DELETE FROM diagramas WHERE id = %s", (id,))
+        eliminados = cursor.rowcount
 
-    cursor.execute("SELECT id FROM diagramas WHERE id = %s", (id,))
-    if not cursor.fetchone():
-        cursor.close()
-        conn.close()
+    if not eliminados:
         return jsonify({'error': 'Diagrama no encontrado'}), 404
 
-    cursor.execute("DELETE FROM diagramas WHERE id = %s", (id,))
-    conn.commit()
-    cursor.close()
-    conn.close()
     return jsonify({'message': 'Diagrama eliminado'}), 200
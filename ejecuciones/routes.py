@@ -1,47 +1,79 @@
 import json
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from extensions import get_db_connection
+from acceso import requires_project_member
+from conditional import respuesta_con_etag, verificar_no_modificado
+from estadisticas import DESDE_EJECUCIONES, deltas_ejecucion, proyecto_de_subproceso_tecnica, registrar, sumar
+from extensions import get_db_connection, transaccion
+from pagination import Pagina
+from serializers import serializar, serializar_fila
+from streaming import respuesta_json_stream, stream_solicitado
 
 ejecuciones_bp = Blueprint('ejecuciones', __name__)
 
+CAMPOS_EJECUCION = {c: f'e.{c}' for c in [
+    'id', 'subproceso_tecnica_id', 'datos', 'participantes', 'fecha_ejecucion', 'estado',
+    'notas', 'creado_por', 'fecha_creacion', 'fecha_actualizacion'
+]}
+CAMPOS_EJECUCION['creado_por_nombre'] = 'u.nombre'
+CAMPOS_EJECUCION['creado_por_apellido'] = 'u.apellido'
+
+def estado_ejecucion(cursor, ejecucion_id):
+    cursor.execute(f"""
+        SELECT e.estado, p.proyecto_id
+        FROM {DESDE_EJECUCIONES}
+        WHERE e.id = %s
+        FOR UPDATE OF e
+    """, (ejecucion_id,))
+    return cursor.fetchone()
+
+def pagina_por_tecnica():
+    return Pagina(CAMPOS_EJECUCION, orden='fecha_creacion', descendente=True)
+
+def consulta_por_tecnica(pagina, subproceso_tecnica_id):
+    filtro, params = pagina.filtro()
+    return f"""
+        SELECT {pagina.select()}
+        FROM ejecuciones_tecnica e
+        JOIN usuarios u ON e.creado_por = u.id
+        WHERE e.subproceso_tecnica_id = %s{filtro}
+        {pagina.orden_y_limite()}
+    """, (subproceso_tecnica_id,) + params
+
 @ejecuciones_bp.route('/tecnica/<int:subproceso_tecnica_id>', methods=['GET'])
 @jwt_required()
+@requires_project_member(entidad='subproceso_tecnica', arg='subproceso_tecnica_id')
 def listar_por_tecnica(subproceso_tecnica_id):
+    pagina = pagina_por_tecnica()
+
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
-    cursor.execute("""
-        SELECT e.*, u.nombre as creado_por_nombre, u.apellido as creado_por_apellido
-        FROM ejecuciones_tecnica e
-        JOIN usuarios u ON e.creado_por = u.id
-        WHERE e.subproceso_tecnica_id = %s
-        ORDER BY e.fecha_creacion DESC
-    """, (subproceso_tecnica_id,))
-
-    ejecuciones = cursor.fetchall()
-
-    for e in ejecuciones:
-        if e.get('fecha_ejecucion'):
-            e['fecha_ejecucion'] = e['fecha_ejecucion'].isoformat()
-        if e.get('fecha_creacion'):
-            e['fecha_creacion'] = e['fecha_creacion'].isoformat()
-        if e.get('fecha_actualizacion'):
-            e['fecha_actualizacion'] = e['fecha_actualizacion'].isoformat()
-        if e.get('datos') and isinstance(e['datos'], str):
-            e['datos'] = json.loads(e['datos'])
+    cursor.execute(*consulta_por_tecnica(pagina, subproceso_tecnica_id))
+
+    if stream_solicitado() and pagina.limite is None:
+        return respuesta_json_stream(conn, cursor, pagina=pagina)
+
+    ejecuciones = serializar(cursor, cursor.fetchall())
 
     cursor.close()
     conn.close()
 
-    return jsonify(ejecuciones), 200
+    return pagina.respuesta(ejecuciones)
 
 @ejecuciones_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
+@requires_project_member(entidad='ejecucion')
 def obtener(id):
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
+    no_modificado = verificar_no_modificado(cursor, 'ejecuciones_tecnica', id)
+    if no_modificado:
+        cursor.close()
+        conn.close()
+        return no_modificado
+
     cursor.execute("""
         SELECT e.*, u.nombre as creado_por_nombre, u.apellido as creado_por_apellido
         FROM ejecuciones_tecnica e
@@ -49,29 +81,21 @@ def obtener(id):
         WHERE e.id = %s
     """, (id,))
 
-    ejecucion = cursor.fetchone()
+    ejecucion = serializar_fila(cursor, cursor.fetchone())
 
     if not ejecucion:
         cursor.close()
         conn.close()
         return jsonify({'error': 'Ejecucion no encontrada'}), 404
 
-    if ejecucion.get('fecha_ejecucion'):
-        ejecucion['fecha_ejecucion'] = ejecucion['fecha_ejecucion'].isoformat()
-    if ejecucion.get('fecha_creacion'):
-        ejecucion['fecha_creacion'] = ejecucion['fecha_creacion'].isoformat()
-    if ejecucion.get('fecha_actualizacion'):
-        ejecucion['fecha_actualizacion'] = ejecucion['fecha_actualizacion'].isoformat()
-    if ejecucion.get('datos') and isinstance(ejecucion['datos'], str):
-        ejecucion['datos'] = json.loads(ejecucion['datos'])
-
     cursor.close()
     conn.close()
 
-    return jsonify(ejecucion), 200
+    return respuesta_con_etag(jsonify(ejecucion), id, ejecucion['fecha_actualizacion'])
 
 @ejecuciones_bp.route('', methods=['POST'])
 @jwt_required()
+@requires_project_member(entidad='subproceso_tecnica', arg='subproceso_tecnica_id')
 def crear():
     current_user_id = get_jwt_identity()
     data = request.get_json()
@@ -81,40 +105,28 @@ def crear():
         if not data.get(field):
             return jsonify({'error': f'El campo {field} es requerido'}), 400
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
     datos_value = json.dumps(data['datos']) if isinstance(data['datos'], dict) else data['datos']
 
-    cursor.execute("""
-        INSERT INTO ejecuciones_tecnica (subproceso_tecnica_id, datos, participantes, fecha_ejecucion, estado, notas, creado_por)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-    """, (
-        data['subproceso_tecnica_id'],
-        datos_value,
-        data.get('participantes'),
-        data.get('fecha_ejecucion'),
-        data.get('estado', 'planificada'),
-        data.get('notas'),
-        current_user_id
-    ))
-    conn.commit()
-    ejecucion_id = cursor.lastrowid
-
-    cursor.execute("SELECT * FROM ejecuciones_tecnica WHERE id = %s", (ejecucion_id,))
-    ejecucion = cursor.fetchone()
-    
-    if ejecucion.get('fecha_ejecucion'):
-        ejecucion['fecha_ejecucion'] = ejecucion['fecha_ejecucion'].isoformat()
-    if ejecucion.get('fecha_creacion'):
-        ejecucion['fecha_creacion'] = ejecucion['fecha_creacion'].isoformat()
-    if ejecucion.get('fecha_actualizacion'):
-        ejecucion['fecha_actualizacion'] = ejecucion['fecha_actualizacion'].isoformat()
-    if ejecucion.get('datos') and isinstance(ejecucion['datos'], str):
-        ejecucion['datos'] = json.loads(ejecucion['datos'])
-
-    cursor.close()
-    conn.close()
+    with transaccion() as cursor:
+        cursor.execute("""
+            INSERT INTO ejecuciones_tecnica (subproceso_tecnica_id, datos, participantes, fecha_ejecucion, estado, notas, creado_por)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, (
+            data['subproceso_tecnica_id'],
+            datos_value,
+            data.get('participantes'),
+            data.get('fecha_ejecucion'),
+            data.get('estado', 'planificada'),
+            data.get('notas'),
+            current_user_id
+        ))
+        ejecucion_id = cursor.lastrowid
+
+        cursor.execute("SELECT * FROM ejecuciones_tecnica WHERE id = %s", (ejecucion_id,))
+        ejecucion = serializar_fila(cursor, cursor.fetchone())
+
+        registrar(cursor, proyecto_de_subproceso_tecnica(cursor, data['subproceso_tecnica_id']),
+                  deltas_ejecucion(ejecucion))
 
     return jsonify({
         'message': 'Ejecucion registrada',
@@ -123,16 +135,8 @@ def crear():
 
 @ejecuciones_bp.route('/<int:id>', methods=['PUT'])
 @jwt_required()
+@requires_project_member(entidad='ejecucion')
 def actualizar(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("SELECT id FROM ejecuciones_tecnica WHERE id = %s", (id,))
-    if not cursor.fetchone():
-        cursor.close()
-        conn.close()
-        return jsonify({'error': 'Ejecucion no encontrada'}), 404
-
     data = request.get_json()
 
     updates = []
@@ -149,25 +153,28 @@ def actualizar(id):
         meta = data['datos']
         values.append(json.dumps(meta) if isinstance(meta, dict) else meta)
 
-    if updates:
-        values.append(id)
-        cursor.execute(f"UPDATE ejecuciones_tecnica SET {', '.join(updates)} WHERE id = %s", values)
-        conn.commit()
-
-    cursor.execute("SELECT * FROM ejecuciones_tecnica WHERE id = %s", (id,))
-    ejecucion = cursor.fetchone()
-    
-    if ejecucion.get('fecha_ejecucion'):
-        ejecucion['fecha_ejecucion'] = ejecucion['fecha_ejecucion'].isoformat()
-    if ejecucion.get('fecha_creacion'):
-        ejecucion['fecha_creacion'] = ejecucion['fecha_creacion'].isoformat()
-    if ejecucion.get('fecha_actualizacion'):
-        ejecucion['fecha_actualizacion'] = ejecucion['fecha_actualizacion'].isoformat()
-    if ejecucion.get('datos') and isinstance(ejecucion['datos'], str):
-        ejecucion['datos'] = json.loads(ejecucion['datos'])
+    with transaccion() as cursor:
+        anterior = None
+        if 'estado' in data:
+            anterior = estado_ejecucion(cursor, id)
+            if not anterior:
+                return jsonify({'error': 'Ejecucion no encontrada'}), 404
 
-    cursor.close()
-    conn.close()
+        if updates:
+            values.append(id)
+            cursor.execute(f"UPDATE ejecuciones_tecnica SET {', '.join(updates)} WHERE id = %s", values)
+            if cursor.rowcount == 0:
+                return jsonify({'error': 'Ejecucion no encontrada'}), 404
+
+        cursor.execute("SELECT * FROM ejecuciones_tecnica WHERE id = %s", (id,))
+        ejecucion = serializar_fila(cursor, cursor.fetchone())
+
+        if anterior and ejecucion:
+            registrar(cursor, anterior['proyecto_id'],
+                      sumar(deltas_ejecucion(anterior, -1), deltas_ejecucion(ejecucion)))
+
+    if not ejecucion:
+        return jsonify({'error': 'Ejecucion no encontrada'}), 404
 
     return jsonify({
         'message': 'Ejecucion actualizada',
@@ -176,20 +183,14 @@ def actualizar(id):
 
 @ejecuciones_bp.route('/<int:id>', methods=['DELETE'])
 @jwt_required()
+@requires_project_member(entidad='ejecucion')
 def eliminar(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    with transaccion() as cursor:
+        anterior = estado_ejecucion(cursor, id)
+        if not anterior:
+            return jsonify({'error': 'Ejecucion no encontrada'}), 404
 
-    cursor.execute("SELECT id FROM ejecuciones_tecnica WHERE id = %s", (id,))
-    if not cursor.fetchone():
-        cursor.close()
-        conn.close()
-        return jsonify({'error': 'Ejecucion no encontrada'}), 404
-
-    cursor.execute("DELETE FROM ejecuciones_tecnica WHERE id = %s", (id,))
-    conn.commit()
-
-    cursor.close()
-    conn.close()
+        cursor.execute("DELETE FROM ejecuciones_tecnica WHERE id = %s", (id,))
+        registrar(cursor, anterior['proyecto_id'], deltas_ejecucion(anterior, -1))
 
     return jsonify({'message': 'Ejecucion eliminada'}), 200
@@ -0,0 +1,184 @@
+import logging
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from exportacion import SECCIONES
+from extensions import nueva_conexion
+
+logger = logging.getLogger('gestproy.eliminacion')
+
+TABLAS = {
+    'rol': 'roles',
+    'miembro': 'miembros_proyecto',
+    'stakeholder': 'stakeholders',
+    'proceso': 'procesos',
+    'subproceso': 'subprocesos',
+    'subproceso_tecnica': 'subproceso_tecnicas',
+    'requerimiento': 'requerimientos',
+    'criterio': 'criterios_aceptacion',
+    'ejecucion': 'ejecuciones_tecnica',
+    'diagrama': 'diagramas',
+}
+
+# Las secciones del export van de padres a hijos; recorridas al reves cada
+# DELETE solo encuentra filas sin hijos y la cascada de InnoDB no tiene nada
+# que recorrer. (tabla, alias, origen, columna del proyecto)
+PASOS = [(TABLAS[tipo], alias, origen, columna) for tipo, alias, origen, columna in reversed(SECCIONES)
+         if tipo != 'proyecto']
+
+# Una purga en_progreso sin avances en este tiempo se considera abandonada
+# (worker caido) y otro worker la retoma; cada lote actualiza la fila.
+ABANDONADA = 600
+
+
+def solicitar(cursor, proyecto_id, usuario_id):
+    cursor.execute("""
+        INSERT INTO purgas_proyecto (proyecto_id, solicitado_por) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE estado = 'pendiente', error = NULL, fecha_fin = NULL
+    """, (proyecto_id, usuario_id))
+
+
+def leer(cursor, proyecto_id):
+    cursor.execute("SELECT * FROM purgas_proyecto WHERE proyecto_id = %s", (proyecto_id,))
+    purga = cursor.fetchone()
+    if purga:
+        totales = purga['filas_totales']
+        purga['progreso'] = 1.0 if purga['estado'] == 'completada' else (
+            round(min(purga['filas_borradas'] / totales, 1.0), 4) if totales else 0.0
+        )
+    return purga
+
+
+# Marca una purga concreta como en_progreso salvo que otro worker la tenga
+# activa o ya este completada.
+def tomar(conn, cursor, proyecto_id):
+    cursor.execute("""
+        UPDATE purgas_proyecto SET estado = 'en_progreso', error = NULL, fecha_actualizacion = NOW()
+        WHERE proyecto_id = %s
+          AND (estado IN ('pendiente', 'error')
+               OR (estado = 'en_progreso' AND fecha_actualizacion < NOW() - INTERVAL %s SECOND))
+    """, (proyecto_id, ABANDONADA))
+    tomada = cursor.rowcount > 0
+    conn.commit()
+    return tomada
+
+
+def tomar_pendiente(conn, cursor):
+    cursor.execute("""
+        SELECT proyecto_id FROM purgas_proyecto
+        WHERE estado = 'pendiente'
+           OR (estado = 'en_progreso' AND fecha_actualizacion < NOW() - INTERVAL %s SECOND)
+        ORDER BY fecha_solicitud
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    """, (ABANDONADA,))
+    fila = cursor.fetchone()
+    if fila:
+        cursor.execute("""
+            UPDATE purgas_proyecto SET estado = 'en_progreso', fecha_actualizacion = NOW()
+            WHERE proyecto_id = %s
+        """, (fila['proyecto_id'],))
+    conn.commit()
+    return fila['proyecto_id'] if fila else None
+
+
+def contar(cursor, proyecto_id):
+    total = 0
+    for _, alias, origen, columna in PASOS:
+        cursor.execute(f"SELECT COUNT(*) AS n FROM {origen} WHERE {columna} = %s", (proyecto_id,))
+        total += cursor.fetchone()['n']
+    return total
+
+
+# Borra el proyecto de abajo hacia arriba en lotes de tamano_lote ids, cada uno
+# en su propia transaccion y seguido de una pausa, para que los bloqueos duren
+# poco y los demas escritores avancen entre lote y lote. Es reanudable: lo ya
+# borrado no vuelve a aparecer en los SELECT.
+def purgar(conn, cursor, proyecto_id, tamano_lote=500, pausa=0.05, progreso=None):
+    cursor.execute("SELECT filas_borradas, filas_totales FROM purgas_proyecto WHERE proyecto_id = %s", (proyecto_id,))
+    purga = cursor.fetchone()
+    borradas, totales = purga['filas_borradas'], purga['filas_totales']
+    if totales is None:
+        totales = contar(cursor, proyecto_id)
+        cursor.execute("UPDATE purgas_proyecto SET filas_totales = %s WHERE proyecto_id = %s", (totales, proyecto_id))
+        conn.commit()
+
+    for tabla, alias, origen, columna in PASOS:
+        while True:
+            cursor.execute(f"""
+                SELECT {alias}.id FROM {origen}
+                WHERE {columna} = %s
+                ORDER BY {alias}.id
+                LIMIT %s
+            """, (proyecto_id, tamano_lote))
+            ids = [fila['id'] for fila in cursor.fetchall()]
+            if not ids:
+                break
+
+            cursor.execute(f"DELETE FROM {tabla} WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+            borradas += cursor.rowcount
+            cursor.execute("""
+                UPDATE purgas_proyecto SET tabla = %s, filas_borradas = %s
+                WHERE proyecto_id = %s
+            """, (tabla, borradas, proyecto_id))
+            conn.commit()
+
+            if progreso:
+                progreso(tabla, borradas, totales)
+            if pausa:
+                time.sleep(pausa)
+
+    # estadisticas_proyecto y requerimiento_secuencias caen por cascada, ya sin hijos.
+    cursor.execute("DELETE FROM proyectos WHERE id = %s AND eliminado_en IS NOT NULL", (proyecto_id,))
+    cursor.execute("""
+        UPDATE purgas_proyecto SET estado = 'completada', tabla = NULL, fecha_fin = NOW()
+        WHERE proyecto_id = %s
+    """, (proyecto_id,))
+    conn.commit()
+
+
+def procesar_pendientes(conn, tamano_lote, pausa, progreso=None):
+    cursor = conn.cursor(dictionary=True)
+    procesados = []
+    try:
+        while True:
+            proyecto_id = tomar_pendiente(conn, cursor)
+            if proyecto_id is None:
+                return procesados
+            try:
+                purgar(conn, cursor, proyecto_id, tamano_lote, pausa, progreso)
+            except Exception as e:
+                # Queda en error (visible en el endpoint de estado) y se sigue con la proxima.
+                logger.exception('Fallo la purga del proyecto %s', proyecto_id)
+                conn.rollback()
+                cursor.execute("UPDATE purgas_proyecto SET estado = 'error', error = %s WHERE proyecto_id = %s",
+                               (str(e), proyecto_id))
+                conn.commit()
+                continue
+            procesados.append(proyecto_id)
+    finally:
+        cursor.close()
+
+
+@click.command('purgar-proyectos')
+@click.option('--continuo', is_flag=True, help='Seguir esperando nuevas eliminaciones.')
+@click.option('--intervalo', type=float, default=5.0, help='Segundos entre consultas en modo continuo.')
+@with_appcontext
+def purgar_proyectos(continuo, intervalo):
+    tamano_lote = current_app.config['PURGE_BATCH_SIZE']
+    pausa = current_app.config['PURGE_PAUSE_MS'] / 1000
+
+    while True:
+        conn = nueva_conexion()
+        try:
+            procesados = procesar_pendientes(conn, tamano_lote, pausa)
+        finally:
+            conn.close()
+        for proyecto_id in procesados:
+            click.echo(f'Proyecto {proyecto_id} purgado')
+        if not continuo:
+            return
+        time.sleep(intervalo)
@@ -0,0 +1,160 @@
+import click
+from flask.cli import with_appcontext
+
+from extensions import transaccion
+
+# Resumen por proyecto en estadisticas_proyecto: una fila por (proyecto, metrica)
+# con nombres del tipo 'requerimientos.estado.aprobado'. Los handlers de
+# escritura aplican deltas dentro de su propia transaccion; recalcular() lo
+# reconstruye desde cero para los borrados en cascada y para reparaciones.
+
+DESDE_REQUERIMIENTOS = """requerimientos r
+    JOIN subprocesos s ON r.subproceso_id = s.id
+    JOIN procesos p ON s.proceso_id = p.id"""
+DESDE_CRITERIOS = """criterios_aceptacion c
+    JOIN requerimientos r ON c.requerimiento_id = r.id
+    JOIN subprocesos s ON r.subproceso_id = s.id
+    JOIN procesos p ON s.proceso_id = p.id"""
+DESDE_EJECUCIONES = """ejecuciones_tecnica e
+    JOIN subproceso_tecnicas st ON e.subproceso_tecnica_id = st.id
+    JOIN subprocesos s ON st.subproceso_id = s.id
+    JOIN procesos p ON s.proceso_id = p.id"""
+DESDE_SUBPROCESOS = """subprocesos s
+    JOIN procesos p ON s.proceso_id = p.id"""
+
+# (expresion de la metrica, expresion del valor, origen, agrupacion extra)
+AGREGADOS = [
+    ("'requerimientos.total'", 'COUNT(*)', DESDE_REQUERIMIENTOS, ''),
+    ("CONCAT('requerimientos.estado.', r.estado)", 'COUNT(*)', DESDE_REQUERIMIENTOS, ', r.estado'),
+    ("CONCAT('requerimientos.tipo.', r.tipo)", 'COUNT(*)', DESDE_REQUERIMIENTOS, ', r.tipo'),
+    ("CONCAT('requerimientos.prioridad.', r.prioridad)", 'COUNT(*)', DESDE_REQUERIMIENTOS, ', r.prioridad'),
+    ("'criterios.total'", 'COUNT(*)', DESDE_CRITERIOS, ''),
+    ("'criterios.cumplidos'", 'SUM(c.cumplido)', DESDE_CRITERIOS, ''),
+    ("'ejecuciones.total'", 'COUNT(*)', DESDE_EJECUCIONES, ''),
+    ("CONCAT('ejecuciones.estado.', e.estado)", 'COUNT(*)', DESDE_EJECUCIONES, ', e.estado'),
+    ("'subprocesos.total'", 'COUNT(*)', DESDE_SUBPROCESOS, ''),
+    ("'subprocesos.horas_estimadas'", 'COALESCE(SUM(s.horas_estimadas), 0)', DESDE_SUBPROCESOS, ''),
+]
+
+
+def deltas_requerimiento(req, signo=1):
+    return {
+        'requerimientos.total': signo,
+        f"requerimientos.estado.{req['estado']}": signo,
+        f"requerimientos.tipo.{req['tipo']}": signo,
+        f"requerimientos.prioridad.{req['prioridad']}": signo,
+    }
+
+
+def deltas_criterio(criterio, signo=1):
+    return {'criterios.total': signo, 'criterios.cumplidos': signo * int(bool(criterio['cumplido']))}
+
+
+def deltas_ejecucion(ejecucion, signo=1):
+    return {'ejecuciones.total': signo, f"ejecuciones.estado.{ejecucion['estado']}": signo}
+
+
+def deltas_subproceso(subproceso, signo=1):
+    return {'subprocesos.total': signo, 'subprocesos.horas_estimadas': signo * (subproceso['horas_estimadas'] or 0)}
+
+
+def sumar(*deltas):
+    total = {}
+    for d in deltas:
+        for metrica, valor in d.items():
+            total[metrica] = total.get(metrica, 0) + valor
+    return total
+
+
+def registrar(cursor, proyecto_id, deltas):
+    # Orden fijo de claves para que dos transacciones concurrentes bloqueen las
+    # filas del resumen en el mismo orden.
+    filas = [(proyecto_id, m, v) for m, v in sorted(deltas.items()) if v]
+    if not filas:
+        return
+    cursor.execute(f"""
+        INSERT INTO estadisticas_proyecto (proyecto_id, metrica, valor)
+        VALUES {', '.join(['(%s, %s, %s)'] * len(filas))} AS nuevo
+        ON DUPLICATE KEY UPDATE valor = estadisticas_proyecto.valor + nuevo.valor
+    """, [v for fila in filas for v in fila])
+
+
+def proyecto_de_proceso(cursor, proceso_id):
+    cursor.execute("SELECT proyecto_id FROM procesos WHERE id = %s", (proceso_id,))
+    fila = cursor.fetchone()
+    return fila['proyecto_id'] if fila else None
+
+
+def proyecto_de_subproceso(cursor, subproceso_id):
+    cursor.execute(f"SELECT p.proyecto_id FROM {DESDE_SUBPROCESOS} WHERE s.id = %s", (subproceso_id,))
+    fila = cursor.fetchone()
+    return fila['proyecto_id'] if fila else None
+
+
+def proyecto_de_subproceso_tecnica(cursor, subproceso_tecnica_id):
+    cursor.execute("""
+        SELECT p.proyecto_id FROM subproceso_tecnicas st
+        JOIN subprocesos s ON st.subproceso_id = s.id
+        JOIN procesos p ON s.proceso_id = p.id
+        WHERE st.id = %s
+    """, (subproceso_tecnica_id,))
+    fila = cursor.fetchone()
+    return fila['proyecto_id'] if fila else None
+
+
+def proyecto_de_requerimiento(cursor, requerimiento_id):
+    cursor.execute(f"SELECT p.proyecto_id FROM {DESDE_REQUERIMIENTOS} WHERE r.id = %s", (requerimiento_id,))
+    fila = cursor.fetchone()
+    return fila['proyecto_id'] if fila else None
+
+
+def recalcular(cursor, proyecto_id=None):
+    if proyecto_id is None:
+        filtro, params = '', ()
+        cursor.execute("DELETE FROM estadisticas_proyecto")
+    else:
+        filtro, params = ' WHERE p.proyecto_id = %s', (proyecto_id,)
+        cursor.execute("DELETE FROM estadisticas_proyecto WHERE proyecto_id = %s", params)
+
+    for metrica, valor, desde, agrupar in AGREGADOS:
+        cursor.execute(f"""
+            INSERT INTO estadisticas_proyecto (proyecto_id, metrica, valor)
+            SELECT p.proyecto_id, {metrica}, {valor}
+            FROM {desde}{filtro}
+            GROUP BY p.proyecto_id{agrupar}
+        """, params)
+
+
+def leer(cursor, proyecto_id):
+    cursor.execute(
+        "SELECT metrica, valor FROM estadisticas_proyecto WHERE proyecto_id = %s",
+        (proyecto_id,)
+    )
+    filas = cursor.fetchall()
+
+    resumen = {
+        'requerimientos': {'total': 0, 'estado': {}, 'tipo': {}, 'prioridad': {}},
+        'criterios': {'total': 0, 'cumplidos': 0},
+        'ejecuciones': {'total': 0, 'estado': {}},
+        'subprocesos': {'total': 0, 'horas_estimadas': 0},
+    }
+    for fila in filas:
+        grupo, *resto = fila['metrica'].split('.')
+        destino = resumen.setdefault(grupo, {})
+        for parte in resto[:-1]:
+            destino = destino.setdefault(parte, {})
+        valor = fila['valor']
+        destino[resto[-1]] = valor if fila['metrica'] == 'subprocesos.horas_estimadas' else int(valor)
+
+    criterios = resumen['criterios']
+    criterios['ratio_cumplidos'] = round(criterios['cumplidos'] / criterios['total'], 4) if criterios['total'] else 0.0
+    return resumen, bool(filas)
+
+
+@click.command('reconstruir-estadisticas')
+@click.option('--proyecto', type=int, default=None, help='Solo este proyecto.')
+@with_appcontext
+def reconstruir_estadisticas(proyecto):
+    with transaccion() as cursor:
+        recalcular(cursor, proyecto)
+    click.echo('Estadisticas reconstruidas' + (f' para el proyecto {proyecto}' if proyecto else ''))
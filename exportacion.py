@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+
+from estadisticas import DESDE_CRITERIOS, DESDE_EJECUCIONES, DESDE_REQUERIMIENTOS, DESDE_SUBPROCESOS
+from serializers import serializar
+
+FORMATO_VERSION = 1
+
+# Secciones del export en el orden en que se emiten: cada padre antes que sus
+# hijos, de modo que la importacion puede procesar el archivo en una pasada.
+# (tipo, alias, origen, columna del proyecto)
+SECCIONES = [
+    ('proyecto', 'pr', 'proyectos pr', 'pr.id'),
+    ('rol', 'ro', 'roles ro', 'ro.proyecto_id'),
+    ('miembro', 'mp', 'miembros_proyecto mp', 'mp.proyecto_id'),
+    ('stakeholder', 'sh', 'stakeholders sh', 'sh.proyecto_id'),
+    ('proceso', 'p', 'procesos p', 'p.proyecto_id'),
+    ('subproceso', 's', DESDE_SUBPROCESOS, 'p.proyecto_id'),
+    ('subproceso_tecnica', 'st', f'subproceso_tecnicas st JOIN {DESDE_SUBPROCESOS} ON st.subproceso_id = s.id',
+     'p.proyecto_id'),
+    ('requerimiento', 'r', DESDE_REQUERIMIENTOS, 'p.proyecto_id'),
+    ('criterio', 'c', DESDE_CRITERIOS, 'p.proyecto_id'),
+    ('ejecucion', 'e', DESDE_EJECUCIONES, 'p.proyecto_id'),
+    ('diagrama', 'd', 'diagramas d', 'd.proyecto_id'),
+]
+TIPOS = [s[0] for s in SECCIONES]
+
+
+class ReanudacionInvalida(ValueError):
+    pass
+
+
+# desde = 'tipo:id' del ultimo registro recibido completo.
+def punto_de_reanudacion(desde):
+    if not desde:
+        return None
+    tipo, _, id = desde.partition(':')
+    if tipo not in TIPOS or not id.isdigit():
+        raise ReanudacionInvalida('desde debe tener la forma tipo:id')
+    return TIPOS.index(tipo), int(id)
+
+
+# Genera (tipo, fila) recorriendo cada seccion con un cursor sin buffer y
+# fetchmany, asi que la memoria depende del tamano del lote y no del proyecto.
+# Cada seccion va por id, lo que permite reanudar por keyset. progreso, si se
+# pasa, se llama con (indice, tipo) al empezar cada seccion.
+def registros(cursor, proyecto_id, reanudar=None, tamano_lote=500, progreso=None):
+    inicio, ultimo_id = reanudar or (0, 0)
+    for indice, (tipo, alias, origen, columna) in enumerate(SECCIONES):
+        if indice < inicio:
+            continue
+        if progreso:
+            progreso(indice, tipo)
+        desde_id = ultimo_id if indice == inicio else 0
+        cursor.execute(f"""
+            SELECT {alias}.* FROM {origen}
+            WHERE {columna} = %s AND {alias}.id > %s
+            ORDER BY {alias}.id
+        """, (proyecto_id, desde_id))
+        while True:
+            lote = cursor.fetchmany(tamano_lote)
+            if not lote:
+                break
+            for fila in serializar(cursor, lote):
+                yield tipo, fila
+
+
+def ndjson(cursor, proyecto_id, dumps, reanudar=None, tamano_lote=500, progreso=None):
+    yield dumps({
+        'tipo': 'export',
+        'version': FORMATO_VERSION,
+        'proyecto_id': proyecto_id,
+        'generado': datetime.now(timezone.utc).isoformat(),
+        'reanudado': reanudar is not None,
+    }) + '\n'
+
+    total = 0
+    for tipo, fila in registros(cursor, proyecto_id, reanudar, tamano_lote, progreso):
+        total += 1
+        yield dumps({'tipo': tipo, 'id': fila['id'], 'datos': fila}) + '\n'
+
+    # Marca de fin: un archivo sin ella quedo cortado y se puede reanudar.
+    yield dumps({'tipo': 'fin', 'registros': total}) + '\n'
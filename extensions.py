@@ -1,15 +1,88 @@
+from contextlib import contextmanager
+
 import mysql.connector
+from flask import g, has_app_context
+from mysql.connector.constants import ClientFlag
 from flask_jwt_extended import JWTManager
 from flask_bcrypt import Bcrypt
 from config import Config
+from db_pool import ConnectionPool
+from sql_metrics import instrumentar_cursor
 
 jwt = JWTManager()
 bcrypt = Bcrypt()
 
-def get_db_connection():
+db_pool = None
+
+
+def _crear_conexion():
     return mysql.connector.connect(
         host=Config.MYSQL_HOST,
         user=Config.MYSQL_USER,
         password=Config.MYSQL_PASSWORD,
-        database=Config.MYSQL_DATABASE
+        database=Config.MYSQL_DATABASE,
+        # rowcount de UPDATE cuenta filas encontradas, no solo modificadas, para
+        # poder usarlo como chequeo de existencia.
+        client_flags=[ClientFlag.FOUND_ROWS]
+    )
+
+
+def init_db_pool(app):
+    global db_pool
+
+    db_pool = ConnectionPool(
+        _crear_conexion,
+        size=app.config['DB_POOL_SIZE'],
+        max_overflow=app.config['DB_POOL_MAX_OVERFLOW'],
+        timeout=app.config['DB_POOL_TIMEOUT'],
+        recycle=app.config['DB_POOL_RECYCLE'],
+        pre_ping=app.config['DB_POOL_PRE_PING'],
+        envolver_cursor=instrumentar_cursor
     )
+    app.extensions['db_pool'] = db_pool
+    app.teardown_appcontext(_liberar_conexion)
+    return db_pool
+
+
+def _liberar_conexion(exc=None):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        conn.close()
+
+
+def get_db_connection():
+    if db_pool is None:
+        return _crear_conexion()
+
+    if not has_app_context():
+        return db_pool.connect()
+
+    conn = g.get('db_conn')
+    if conn is None or conn.released:
+        conn = db_pool.connect()
+        g.db_conn = conn
+    return conn
+
+
+def nueva_conexion():
+    if db_pool is None:
+        return _crear_conexion()
+    return db_pool.connect()
+
+
+# Unidad de trabajo: toda la escritura de una peticion va en una sola
+# transaccion. Commit al salir del bloque (tambien con return), rollback si se
+# propaga una excepcion; el cursor y la conexion se liberan siempre.
+@contextmanager
+def transaccion():
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        yield cursor
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
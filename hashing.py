@@ -0,0 +1,83 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from extensions import bcrypt
+
+
+class HashingSaturado(Exception):
+    pass
+
+
+def costo_de(hash_guardado):
+    try:
+        return int(hash_guardado.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+# bcrypt libera el GIL mientras calcula, asi que lo que satura el servidor es
+# la cantidad de hashes simultaneos, no el hilo que espera. Se limita con un
+# executor propio de pocos hilos y una cola acotada: si se llena, se rechaza
+# la peticion (503) en lugar de acumular trabajo que luego vence por timeout.
+class HasherContrasenas:
+    def __init__(self):
+        self.rondas = 12
+        self.timeout = 10
+        self.max_pendientes = 0
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pendientes = 0
+        self._rechazados = 0
+        self._completados = 0
+
+    def init_app(self, app):
+        hilos = app.config['HASH_WORKERS']
+        self.rondas = app.config['BCRYPT_LOG_ROUNDS']
+        self.timeout = app.config['HASH_TIMEOUT']
+        self.max_pendientes = hilos + app.config['HASH_MAX_COLA']
+        self._executor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='bcrypt')
+        app.extensions['hasher'] = self
+
+    def _ejecutar(self, funcion, *args):
+        if self._executor is None:
+            return funcion(*args)
+
+        with self._lock:
+            if self._pendientes >= self.max_pendientes:
+                self._rechazados += 1
+                raise HashingSaturado('Demasiadas operaciones de contrasena en curso')
+            self._pendientes += 1
+
+        futuro = self._executor.submit(funcion, *args)
+        futuro.add_done_callback(self._terminado)
+        try:
+            return futuro.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HashingSaturado('Tiempo de espera agotado al procesar la contrasena')
+
+    def _terminado(self, futuro):
+        with self._lock:
+            self._pendientes -= 1
+            self._completados += 1
+
+    def generar(self, contrasena):
+        return self._ejecutar(bcrypt.generate_password_hash, contrasena, self.rondas).decode('utf-8')
+
+    def verificar(self, hash_guardado, contrasena):
+        return self._ejecutar(bcrypt.check_password_hash, hash_guardado, contrasena)
+
+    def necesita_rehash(self, hash_guardado):
+        return costo_de(hash_guardado) != self.rondas
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rondas': self.rondas,
+                'pendientes': self._pendientes,
+                'max_pendientes': self.max_pendientes,
+                'completados': self._completados,
+                'rechazados': self._rechazados,
+            }
+
+
+hasher = HasherContrasenas()
@@ -0,0 +1,314 @@
+import json
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from mysql.connector import errorcode, errors
+
+from acceso import invalidar_membresias
+from catalogo import catalogo
+from estadisticas import DESDE_SUBPROCESOS, recalcular
+from exportacion import FORMATO_VERSION, SECCIONES, TIPOS
+from extensions import nueva_conexion
+
+
+class ImportacionInvalida(ValueError):
+    pass
+
+
+def _json(valor):
+    return json.dumps(valor) if isinstance(valor, (dict, list)) else valor
+
+
+# Por tipo: tabla, columnas y como armar la fila a partir del registro
+# exportado (imp es el Importador, para remapear claves). Los tipos con hijos
+# se vuelven a leer tras insertar para conocer sus ids nuevos.
+NIVELES = {
+    'rol': ('roles', ['proyecto_id', 'nombre', 'descripcion', 'es_fijo'], lambda imp, d: (
+        imp.proyecto_id, d['nombre'], d.get('descripcion'), False)),
+    'miembro': ('miembros_proyecto', ['proyecto_id', 'usuario_id', 'rol_id', 'asignado_por'], lambda imp, d: (
+        imp.proyecto_id, imp.usuario(d['usuario_id']), imp.rol(d['rol_id']), imp.usuario_id)),
+    'stakeholder': ('stakeholders', [
+        'proyecto_id', 'nombre_completo', 'correo', 'telefono', 'organizacion', 'cargo', 'tipo',
+        'nivel_influencia_interes', 'notas'
+    ], lambda imp, d: (
+        imp.proyecto_id, d['nombre_completo'], d.get('correo'), d.get('telefono'), d.get('organizacion'),
+        d.get('cargo'), d['tipo'], d['nivel_influencia_interes'], d.get('notas'))),
+    'proceso': ('procesos', ['proyecto_id', 'nombre', 'descripcion', 'objetivo', 'responsable_id', 'estado'], lambda imp, d: (
+        imp.proyecto_id, d['nombre'], d.get('descripcion'), d.get('objetivo'), imp.usuario(d.get('responsable_id')),
+        d['estado'])),
+    'subproceso': ('subprocesos', ['proceso_id', 'nombre', 'descripcion', 'responsable_id', 'estado', 'horas_estimadas'], lambda imp, d: (
+        imp.padre('proceso', d['proceso_id']), d['nombre'], d.get('descripcion'), imp.usuario(d.get('responsable_id')),
+        d['estado'], d.get('horas_estimadas'))),
+    'subproceso_tecnica': ('subproceso_tecnicas', ['subproceso_id', 'tecnica_id', 'notas'], lambda imp, d: (
+        imp.padre('subproceso', d['subproceso_id']), imp.tecnica(d['tecnica_id']), d.get('notas'))),
+    'requerimiento': ('requerimientos', [
+        'subproceso_id', 'subproceso_tecnica_id', 'codigo', 'titulo', 'descripcion', 'tipo', 'prioridad', 'estado',
+        'metadata', 'creado_por'
+    ], lambda imp, d: (
+        imp.padre('subproceso', d['subproceso_id']), imp.padre('subproceso_tecnica', d['subproceso_tecnica_id']),
+        d['codigo'], d['titulo'], d.get('descripcion'), d['tipo'], d['prioridad'], d['estado'],
+        _json(d.get('metadata')), imp.usuario_id)),
+    'criterio': ('criterios_aceptacion', ['requerimiento_id', 'descripcion', 'cumplido', 'orden'], lambda imp, d: (
+        imp.padre('requerimiento', d['requerimiento_id']), d['descripcion'], d['cumplido'], d['orden'])),
+    'ejecucion': ('ejecuciones_tecnica', [
+        'subproceso_tecnica_id', 'datos', 'participantes', 'fecha_ejecucion', 'estado', 'notas', 'creado_por'
+    ], lambda imp, d: (
+        imp.padre('subproceso_tecnica', d['subproceso_tecnica_id']), _json(d['datos']), d.get('participantes'),
+        d.get('fecha_ejecucion'), d['estado'], d.get('notas'), imp.usuario_id)),
+    'diagrama': ('diagramas', ['proyecto_id', 'tipo', 'nombre', 'datos', 'creado_por'], lambda imp, d: (
+        imp.proyecto_id, d['tipo'], d['nombre'], _json(d['datos']), imp.usuario_id)),
+}
+CON_HIJOS = {'rol', 'proceso', 'subproceso', 'subproceso_tecnica', 'requerimiento'}
+ORIGENES = {tipo: (alias, origen, columna) for tipo, alias, origen, columna in SECCIONES}
+
+
+class OmitirFila(Exception):
+    pass
+
+
+# Recrea un proyecto exportado (formato de exportacion.py) nivel por nivel. Las
+# filas de cada tipo se acumulan en lotes y se insertan con executemany; los
+# ids nuevos se obtienen releyendo por id ascendente dentro del proyecto nuevo,
+# que solo ve esta transaccion (o solo su creador, con commits parciales), asi
+# que el orden coincide con el de insercion. Los mapas viejo -> nuevo guardan
+# solo enteros.
+class Importador:
+    def __init__(self, conn, cursor, usuario_id, tamano_lote=500, commit_cada=None, nombre=None):
+        self.conn = conn
+        self.cursor = cursor
+        self.usuario_id = int(usuario_id)
+        self.tamano_lote = tamano_lote
+        self.commit_cada = commit_cada
+        self.nombre = nombre
+        self.proyecto_id = None
+        self.mapas = {tipo: {} for tipo in TIPOS}
+        self.ultimo_id = {tipo: 0 for tipo in TIPOS}
+        self.filas = {}
+        self.omitidas = {}
+        self.miembros = set()
+        self._usuarios = {}
+        self._pendientes = []
+        self._tipo_actual = None
+        self._sin_commit = 0
+
+    def usuario(self, usuario_id):
+        if usuario_id is None:
+            return None
+        if usuario_id not in self._usuarios:
+            self.cursor.execute("SELECT id FROM usuarios WHERE id = %s", (usuario_id,))
+            self._usuarios[usuario_id] = self.cursor.fetchone() is not None
+        return usuario_id if self._usuarios[usuario_id] else None
+
+    def rol(self, rol_id):
+        if rol_id in self.mapas['rol']:
+            return self.mapas['rol'][rol_id]
+        if catalogo.rol_fijo(rol_id):
+            return rol_id
+        raise OmitirFila()
+
+    def tecnica(self, tecnica_id):
+        if not catalogo.tecnica(tecnica_id):
+            raise ImportacionInvalida(f'La tecnica {tecnica_id} no existe en este servidor')
+        return tecnica_id
+
+    def padre(self, tipo, id_viejo):
+        try:
+            return self.mapas[tipo][id_viejo]
+        except KeyError:
+            raise ImportacionInvalida(f'Referencia a {tipo} {id_viejo} inexistente o fuera de orden')
+
+    def importar(self, lineas):
+        inicio = time.perf_counter()
+        encabezado = False
+        fin = False
+
+        for numero, linea in enumerate(lineas, 1):
+            if isinstance(linea, bytes):
+                linea = linea.decode('utf-8')
+            if not linea.strip():
+                continue
+            try:
+                registro = json.loads(linea)
+                tipo = registro['tipo']
+            except (ValueError, KeyError, TypeError):
+                raise ImportacionInvalida(f'Linea {numero}: JSON invalido')
+
+            if not encabezado:
+                if tipo != 'export' or registro.get('version') != FORMATO_VERSION:
+                    raise ImportacionInvalida('Falta el encabezado del export o la version no es compatible')
+                if registro.get('reanudado'):
+                    raise ImportacionInvalida('El archivo empieza en una descarga reanudada; falta la primera parte')
+                encabezado = True
+            elif tipo == 'export':
+                # Partes de una descarga reanudada concatenadas en orden.
+                if not registro.get('reanudado'):
+                    raise ImportacionInvalida(f'Linea {numero}: el archivo contiene mas de un export')
+            elif tipo == 'fin':
+                fin = True
+            elif tipo == 'proyecto':
+                self._crear_proyecto(registro.get('datos'))
+            elif tipo in NIVELES:
+                if self.proyecto_id is None:
+                    raise ImportacionInvalida(f'Linea {numero}: {tipo} antes del proyecto')
+                self._agregar(tipo, registro)
+            else:
+                raise ImportacionInvalida(f'Linea {numero}: tipo desconocido {tipo}')
+
+        if not fin:
+            raise ImportacionInvalida('El archivo esta incompleto (no tiene la linea de fin)')
+        self._vaciar()
+        self._sembrar_secuencias()
+        recalcular(self.cursor, self.proyecto_id)
+
+        segundos = time.perf_counter() - inicio
+        total = sum(self.filas.values())
+        return {
+            'proyecto_id': self.proyecto_id,
+            'filas': self.filas,
+            'omitidas': self.omitidas,
+            'segundos': round(segundos, 3),
+            'filas_por_segundo': round(total / segundos, 1) if segundos else None,
+        }
+
+    def _crear_proyecto(self, d):
+        if self.proyecto_id is not None:
+            raise ImportacionInvalida('El archivo contiene mas de un proyecto')
+        try:
+            id_viejo = d['id']
+            fila = (self.nombre or d['nombre'], d.get('descripcion'), d['estado'], d['prioridad'],
+                    d.get('fecha_inicio'), d.get('fecha_fin'), self.usuario_id)
+        except (KeyError, TypeError, AttributeError):
+            raise ImportacionInvalida('proyecto: faltan campos requeridos')
+        self.cursor.execute("""
+            INSERT INTO proyectos (nombre, descripcion, estado, prioridad, fecha_inicio, fecha_fin, creado_por)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, fila)
+        self.proyecto_id = self.cursor.lastrowid
+        self.mapas['proyecto'][id_viejo] = self.proyecto_id
+        self.filas['proyecto'] = 1
+
+    # Los requerimientos llegan con sus codigos: el contador de cada subproceso
+    # parte del mayor, como en la migracion 001.
+    def _sembrar_secuencias(self):
+        self.cursor.execute(f"""
+            INSERT INTO requerimiento_secuencias (subproceso_id, ultimo)
+            SELECT s.id, COALESCE(MAX(CAST(SUBSTRING(r.codigo, 5) AS UNSIGNED)), 0)
+            FROM {DESDE_SUBPROCESOS}
+            LEFT JOIN requerimientos r ON r.subproceso_id = s.id
+            WHERE p.proyecto_id = %s
+            GROUP BY s.id
+        """, (self.proyecto_id,))
+
+    def _agregar(self, tipo, registro):
+        if tipo != self._tipo_actual:
+            self._vaciar()
+            self._tipo_actual = tipo
+        self._pendientes.append(registro)
+        if len(self._pendientes) >= self.tamano_lote:
+            self._vaciar()
+
+    def _vaciar(self):
+        if not self._pendientes:
+            return
+        tipo = self._tipo_actual
+        tabla, columnas, armar = NIVELES[tipo]
+
+        ids_viejos, valores = [], []
+        for registro in self._pendientes:
+            try:
+                fila = armar(self, registro['datos'])
+                id_viejo = registro['id']
+            except OmitirFila:
+                self.omitidas[tipo] = self.omitidas.get(tipo, 0) + 1
+                continue
+            except (KeyError, TypeError, AttributeError):
+                raise ImportacionInvalida(f"{tipo} {registro.get('id')}: faltan campos requeridos")
+            valores.append(fila)
+            ids_viejos.append(id_viejo)
+        self._pendientes = []
+
+        if tipo == 'miembro':
+            # Sin usuario valido en este servidor no hay membresia que crear.
+            filas = [(i, v) for i, v in zip(ids_viejos, valores) if v[1] is not None and v[1] != self.usuario_id]
+            self.omitidas[tipo] = self.omitidas.get(tipo, 0) + len(valores) - len(filas)
+            ids_viejos, valores = [i for i, _ in filas], [v for _, v in filas]
+            self.miembros.update(v[1] for v in valores)
+        if not valores:
+            return
+
+        self.cursor.executemany(
+            f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({', '.join(['%s'] * len(columnas))})",
+            valores
+        )
+        self.filas[tipo] = self.filas.get(tipo, 0) + len(valores)
+
+        if tipo in CON_HIJOS:
+            alias, origen, columna = ORIGENES[tipo]
+            self.cursor.execute(f"""
+                SELECT {alias}.id FROM {origen}
+                WHERE {columna} = %s AND {alias}.id > %s
+                ORDER BY {alias}.id
+                LIMIT %s
+            """, (self.proyecto_id, self.ultimo_id[tipo], len(valores)))
+            nuevos = [fila['id'] for fila in self.cursor.fetchall()]
+            if len(nuevos) != len(ids_viejos):
+                raise ImportacionInvalida(f'No se pudieron resolver los ids nuevos de {tipo}')
+            self.mapas[tipo].update(zip(ids_viejos, nuevos))
+            self.ultimo_id[tipo] = nuevos[-1]
+
+        self._sin_commit += len(valores)
+        if self.commit_cada and self._sin_commit >= self.commit_cada:
+            self.conn.commit()
+            self._sin_commit = 0
+
+
+# Errores con los que la base rechaza filas del archivo (duplicados, valores
+# fuera de un enum o de rango, fechas invalidas): es el archivo el que esta
+# mal, no el servidor.
+def rechazo_de_datos(error):
+    return isinstance(error, (errors.IntegrityError, errors.DataError)) or error.errno in (
+        errorcode.WARN_DATA_TRUNCATED, errorcode.ER_TRUNCATED_WRONG_VALUE_FOR_FIELD
+    )
+
+
+def importar(conn, lineas, usuario_id, tamano_lote=500, commit_cada=None, nombre=None):
+    cursor = conn.cursor(dictionary=True)
+    importador = Importador(conn, cursor, usuario_id, tamano_lote, commit_cada, nombre)
+    try:
+        try:
+            resumen = importador.importar(lineas)
+        except errors.DatabaseError as e:
+            if not rechazo_de_datos(e):
+                raise
+            raise ImportacionInvalida(f'El archivo contiene datos invalidos: {e.msg}') from e
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        # Con commits parciales lo ya confirmado queda; se informa para poder borrarlo.
+        if commit_cada and importador.proyecto_id:
+            raise ImportacionInvalida(
+                f'Importacion interrumpida; el proyecto parcial {importador.proyecto_id} quedo creado'
+            )
+        raise
+    finally:
+        cursor.close()
+
+    invalidar_membresias(importador.usuario_id, *importador.miembros)
+    return resumen
+
+
+@click.command('importar-proyecto')
+@click.argument('archivo', type=click.File('rb'))
+@click.option('--usuario', type=int, required=True, help='Usuario que queda como creador del proyecto.')
+@click.option('--commit-cada', type=int, default=None, help='Confirmar cada N filas en lugar de al final.')
+@click.option('--nombre', default=None, help='Nombre del proyecto nuevo.')
+@with_appcontext
+def importar_proyecto(archivo, usuario, commit_cada, nombre):
+    conn = nueva_conexion()
+    try:
+        resumen = importar(conn, archivo, usuario, current_app.config['IMPORT_BATCH_SIZE'], commit_cada, nombre)
+    finally:
+        conn.close()
+    click.echo(json.dumps(resumen, indent=2))
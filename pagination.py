@@ -0,0 +1,120 @@
+import base64
+import json
+from datetime import date, datetime
+
+from flask import current_app, jsonify, request
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def codificar_cursor(valor_orden, id):
+    if isinstance(valor_orden, (datetime, date)):
+        valor_orden = valor_orden.isoformat()
+    crudo = json.dumps([valor_orden, id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(crudo).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(token):
+    try:
+        crudo = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        datos = json.loads(crudo)
+    except (ValueError, TypeError):
+        raise CursorInvalido('Cursor de paginacion invalido')
+    # Solo lo que produce codificar_cursor: [valor escalar, id entero].
+    if (not isinstance(datos, list) or len(datos) != 2
+            or not isinstance(datos[0], (str, int, float, type(None)))
+            or not isinstance(datos[1], int) or isinstance(datos[1], bool)):
+        raise CursorInvalido('Cursor de paginacion invalido')
+    valor_orden, id = datos
+    return valor_orden, id
+
+
+# Paginacion por cursor (keyset) sobre (orden, id) y proyeccion de columnas con
+# ?fields=. campos mapea nombre expuesto -> expresion SQL; solo esos nombres se
+# aceptan en fields, lo que evita inyectar columnas arbitrarias.
+class Pagina:
+    def __init__(self, campos, orden='id', descendente=False, extras=()):
+        self.campos = campos
+        self.orden = orden
+        self.descendente = descendente
+
+        limite = request.args.get('limit', type=int)
+        if limite is not None:
+            limite = max(1, min(limite, current_app.config['PAGINATION_MAX_LIMIT']))
+        self.limite = limite
+
+        after = request.args.get('after')
+        self.after = decodificar_cursor(after) if after else None
+
+        self.solicitados = None
+        fields = request.args.get('fields')
+        if fields:
+            pedidos = [f.strip() for f in fields.split(',')]
+            self.solicitados = [f for f in pedidos if f in campos or f in extras]
+
+    def incluye(self, nombre):
+        return self.solicitados is None or nombre in self.solicitados
+
+    def _seleccionados(self):
+        if self.solicitados is None:
+            return list(self.campos)
+        nombres = [n for n in self.campos if n in self.solicitados]
+        for obligatorio in ('id', self.orden):
+            if obligatorio not in nombres:
+                nombres.append(obligatorio)
+        return nombres
+
+    def select(self):
+        return ', '.join(f"{self.campos[n]} AS {n}" for n in self._seleccionados())
+
+    def filtro(self):
+        if self.after is None:
+            return '', ()
+        valor_orden, id = self.after
+        op = '<' if self.descendente else '>'
+        id_expr = self.campos['id']
+        if self.orden == 'id':
+            return f" AND {id_expr} {op} %s", (id,)
+        orden_expr = self.campos[self.orden]
+        return (
+            f" AND ({orden_expr} {op} %s OR ({orden_expr} = %s AND {id_expr} {op} %s))",
+            (valor_orden, valor_orden, id)
+        )
+
+    def orden_y_limite(self):
+        direccion = ' DESC' if self.descendente else ''
+        sql = f" ORDER BY {self.campos[self.orden]}{direccion}"
+        if self.orden != 'id':
+            sql += f", {self.campos['id']}{direccion}"
+        if self.limite is not None:
+            sql += f" LIMIT {self.limite + 1}"
+        return sql
+
+    def recortar(self, filas):
+        if self.limite is None or len(filas) <= self.limite:
+            return filas, None
+        filas = filas[:self.limite]
+        ultima = filas[-1]
+        return filas, codificar_cursor(ultima[self.orden], ultima['id'])
+
+    # Quita id y la columna de orden si se pidieron fields sin ellas (se
+    # seleccionan igual para armar el cursor).
+    def proyectar(self, filas):
+        if self.solicitados is None:
+            return
+        sobrantes = [n for n in {self.orden, 'id'} if n not in self.solicitados]
+        for fila in filas:
+            for n in sobrantes:
+                fila.pop(n, None)
+
+    def respuesta(self, filas, enriquecer=None):
+        filas, siguiente = self.recortar(filas)
+        if enriquecer:
+            enriquecer(filas)
+        self.proyectar(filas)
+        resp = jsonify(filas)
+        if siguiente:
+            resp.headers['X-Next-Cursor'] = siguiente
+        return resp, 200
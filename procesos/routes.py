@@ -1,12 +1,19 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
-from extensions import get_db_connection
+from acceso import requires_project_member
+from estadisticas import proyecto_de_proceso, recalcular
+from extensions import get_db_connection, transaccion
+from serializers import anidado, serializar, serializar_fila
 
 procesos_bp = Blueprint('procesos', __name__)
 
+RESPONSABLE = anidado('responsable', 'responsable_id', opcional=True,
+                      id='responsable_id', nombre='responsable_nombre', apellido='responsable_apellido')
+
 
 @procesos_bp.route('/proyecto/<int:proyecto_id>', methods=['GET'])
 @jwt_required()
+@requires_project_member()
 def listar_procesos(proyecto_id):
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -18,35 +25,17 @@ def listar_procesos(proyecto_id):
         WHERE p.proyecto_id = %s
     """, (proyecto_id,))
     
-    procesos = cursor.fetchall()
+    procesos = serializar(cursor, cursor.fetchall(), (RESPONSABLE,))
     
     cursor.close()
     conn.close()
     
-    result = []
-    for p in procesos:
-        result.append({
-            'id': p['id'],
-            'proyecto_id': p['proyecto_id'],
-            'nombre': p['nombre'],
-            'descripcion': p['descripcion'],
-            'objetivo': p['objetivo'],
-            'responsable_id': p['responsable_id'],
-            'estado': p['estado'],
-            'fecha_creacion': p['fecha_creacion'].isoformat() if p.get('fecha_creacion') else None,
-            'fecha_actualizacion': p['fecha_actualizacion'].isoformat() if p.get('fecha_actualizacion') else None,
-            'responsable': {
-                'id': p['responsable_id'],
-                'nombre': p['responsable_nombre'],
-                'apellido': p['responsable_apellido']
-            } if p.get('responsable_id') else None
-        })
-    
-    return jsonify(result), 200
+    return jsonify(procesos), 200
 
 
 @procesos_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
+@requires_project_member(entidad='proceso')
 def obtener_proceso(id):
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -58,36 +47,20 @@ def obtener_proceso(id):
         WHERE p.id = %s
     """, (id,))
     
-    p = cursor.fetchone()
+    proceso = serializar_fila(cursor, cursor.fetchone(), (RESPONSABLE,))
     
     cursor.close()
     conn.close()
     
-    if not p:
+    if not proceso:
         return jsonify({'error': 'Proceso no encontrado'}), 404
     
-    proceso = {
-        'id': p['id'],
-        'proyecto_id': p['proyecto_id'],
-        'nombre': p['nombre'],
-        'descripcion': p['descripcion'],
-        'objetivo': p['objetivo'],
-        'responsable_id': p['responsable_id'],
-        'estado': p['estado'],
-        'fecha_creacion': p['fecha_creacion'].isoformat() if p.get('fecha_creacion') else None,
-        'fecha_actualizacion': p['fecha_actualizacion'].isoformat() if p.get('fecha_actualizacion') else None,
-        'responsable': {
-            'id': p['responsable_id'],
-            'nombre': p['responsable_nombre'],
-            'apellido': p['responsable_apellido']
-        } if p.get('responsable_id') else None
-    }
-    
     return jsonify(proceso), 200
 
 
 @procesos_bp.route('', methods=['POST'])
 @jwt_required()
+@requires_project_member()
 def crear_proceso():
     data = request.get_json()
     
@@ -97,52 +70,29 @@ def crear_proceso():
     if not data.get('nombre'):
         return jsonify({'error': 'El nombre es requerido'}), 400
     
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("""
-        INSERT INTO procesos (proyecto_id, nombre, descripcion, objetivo, responsable_id, estado)
-        VALUES (%s, %s, %s, %s, %s, %s)
-    """, (
-        data['proyecto_id'],
-        data['nombre'],
-        data.get('descripcion'),
-        data.get('objetivo'),
-        data.get('responsable_id'),
-        data.get('estado', 'definido')
-    ))
-    conn.commit()
-    
-    proceso_id = cursor.lastrowid
-    
-    cursor.execute("""
-        SELECT p.*, u.nombre as responsable_nombre, u.apellido as responsable_apellido
-        FROM procesos p
-        LEFT JOIN usuarios u ON p.responsable_id = u.id
-        WHERE p.id = %s
-    """, (proceso_id,))
-    
-    p = cursor.fetchone()
-    
-    cursor.close()
-    conn.close()
-    
-    proceso = {
-        'id': p['id'],
-        'proyecto_id': p['proyecto_id'],
-        'nombre': p['nombre'],
-        'descripcion': p['descripcion'],
-        'objetivo': p['objetivo'],
-        'responsable_id': p['responsable_id'],
-        'estado': p['estado'],
-        'fecha_creacion': p['fecha_creacion'].isoformat() if p.get('fecha_creacion') else None,
-        'fecha_actualizacion': p['fecha_actualizacion'].isoformat() if p.get('fecha_actualizacion') else None,
-        'responsable': {
-            'id': p['responsable_id'],
-            'nombre': p['responsable_nombre'],
-            'apellido': p['responsable_apellido']
-        } if p.get('responsable_id') else None
-    }
+    with transaccion() as cursor:
+        cursor.execute("""
+            INSERT INTO procesos (proyecto_id, nombre, descripcion, objetivo, responsable_id, estado)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (
+            data['proyecto_id'],
+            data['nombre'],
+            data.get('descripcion'),
+            data.get('objetivo'),
+            data.get('responsable_id'),
+            data.get('estado', 'definido')
+        ))
+        
+        proceso_id = cursor.lastrowid
+        
+        cursor.execute("""
+            SELECT p.*, u.nombre as responsable_nombre, u.apellido as responsable_apellido
+            FROM procesos p
+            LEFT JOIN usuarios u ON p.responsable_id = u.id
+            WHERE p.id = %s
+        """, (proceso_id,))
+        
+        proceso = serializar_fila(cursor, cursor.fetchone(), (RESPONSABLE,))
     
     return jsonify({
         'message': 'Proceso creado',
@@ -152,16 +102,8 @@ def crear_proceso():
 
 @procesos_bp.route('/<int:id>', methods=['PUT'])
 @jwt_required()
+@requires_project_member(entidad='proceso')
 def actualizar_proceso(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("SELECT id FROM procesos WHERE id = %s", (id,))
-    if not cursor.fetchone():
-        cursor.close()
-        conn.close()
-        return jsonify({'error': 'Proceso no encontrado'}), 404
-    
     data = request.get_json()
     
     updates = []
@@ -174,39 +116,24 @@ def actualizar_proceso(id):
             updates.append(f"{campo} = %s")
             values.append(data[campo])
     
-    if updates:
-        values.append(id)
-        cursor.execute(f"UPDATE procesos SET {', '.join(updates)} WHERE id = %s", values)
-        conn.commit()
-    
-    cursor.execute("""
-        SELECT p.*, u.nombre as responsable_nombre, u.apellido as responsable_apellido
-        FROM procesos p
-        LEFT JOIN usuarios u ON p.responsable_id = u.id
-        WHERE p.id = %s
-    """, (id,))
-    
-    p = cursor.fetchone()
-    
-    cursor.close()
-    conn.close()
-    
-    proceso = {
-        'id': p['id'],
-        'proyecto_id': p['proyecto_id'],
-        'nombre': p['nombre'],
-        'descripcion': p['descripcion'],
-        'objetivo': p['objetivo'],
-        'responsable_id': p['responsable_id'],
-        'estado': p['estado'],
-        'fecha_creacion': p['fecha_creacion'].isoformat() if p.get('fecha_creacion') else None,
-        'fecha_actualizacion': p['fecha_actualizacion'].isoformat() if p.get('fecha_actualizacion') else None,
-        'responsable': {
-            'id': p['responsable_id'],
-            'nombre': p['responsable_nombre'],
-            'apellido': p['responsable_apellido']
-        } if p.get('responsable_id') else None
-    }
+    with transaccion() as cursor:
+        if updates:
+            values.append(id)
+            cursor.execute(f"UPDATE procesos SET {', '.join(updates)} WHERE id = %s", values)
+            if cursor.rowcount == 0:
+                return jsonify({'error': 'Proceso no encontrado'}), 404
+        
+        cursor.execute("""
+            SELECT p.*, u.nombre as responsable_nombre, u.apellido as responsable_apellido
+            FROM procesos p
+            LEFT JOIN usuarios u ON p.responsable_id = u.id
+            WHERE p.id = %s
+        """, (id,))
+        
+        proceso = serializar_fila(cursor, cursor.fetchone(), (RESPONSABLE,))
+    
+    if not proceso:
+        return jsonify({'error': 'Proceso no encontrado'}), 404
     
     return jsonify({
         'message': 'Proceso actualizado',
@@ -216,20 +143,16 @@ def actualizar_proceso(id):
 
 @procesos_bp.route('/<int:id>', methods=['DELETE'])
 @jwt_required()
+@requires_project_member(entidad='proceso')
 def eliminar_proceso(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("SELECT id FROM procesos WHERE id = %s", (id,))
-    if not cursor.fetchone():
-        cursor.close()
-        conn.close()
+    with transaccion() as cursor:
+        proyecto_id = proyecto_de_proceso(cursor, id)
+        cursor.execute("DELETE FROM procesos WHERE id = %s", (id,))
+        eliminados = cursor.rowcount
+        if eliminados:
+            recalcular(cursor, proyecto_id)
+    
+    if not eliminados:
         return jsonify({'error': 'Proceso no encontrado'}), 404
     
-    cursor.execute("DELETE FROM procesos WHERE id = %s", (id,))
-    conn.commit()
-    
-    cursor.close()
-    conn.close()
-    
     return jsonify({'message': 'Proceso eliminado'}), 200
@@ -1,44 +1,169 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from extensions import get_db_connection
+from acceso import invalidar_membresias, proyectos_accesibles, requires_project_member
+from catalogo import catalogo
+from cola import encolar
+from eliminacion import leer as leer_purga, solicitar as solicitar_purga
+from estadisticas import leer as leer_estadisticas
+from exportacion import ReanudacionInvalida, ndjson, punto_de_reanudacion
+from extensions import get_db_connection, transaccion
+from importacion import ImportacionInvalida, importar
+from pagination import Pagina
+from procesos.routes import RESPONSABLE
+from requerimientos.routes import CAMPOS_REQUERIMIENTO, cargar_criterios
+from serializers import serializar
+from subproceso_tecnicas.routes import TECNICA
 
 proyectos_bp = Blueprint('proyectos', __name__)
 
+CAMPOS_PROYECTO = {c: f'p.{c}' for c in [
+    'id', 'nombre', 'descripcion', 'estado', 'prioridad', 'fecha_inicio', 'fecha_fin',
+    'creado_por', 'fecha_creacion', 'fecha_actualizacion'
+]}
+
+# Cada nivel del arbol se carga con una sola consulta filtrada por proyecto y se
+# cuelga de su padre en memoria: nivel, columnas, FROM/WHERE, clave del padre,
+# objetos anidados y columnas que estos necesitan.
+NIVELES_ARBOL = [
+    (
+        'procesos',
+        {c: f'p.{c}' for c in [
+            'id', 'proyecto_id', 'nombre', 'descripcion', 'objetivo', 'responsable_id', 'estado',
+            'fecha_creacion', 'fecha_actualizacion'
+        ]},
+        """FROM procesos p
+           LEFT JOIN usuarios u ON p.responsable_id = u.id
+           WHERE p.proyecto_id = %s ORDER BY p.id""",
+        None,
+        RESPONSABLE,
+        {'responsable_id': 'p.responsable_id', 'responsable_nombre': 'u.nombre', 'responsable_apellido': 'u.apellido'}
+    ),
+    (
+        'subprocesos',
+        {c: f's.{c}' for c in [
+            'id', 'proceso_id', 'nombre', 'descripcion', 'responsable_id', 'estado', 'horas_estimadas',
+            'fecha_creacion', 'fecha_actualizacion'
+        ]},
+        """FROM subprocesos s
+           JOIN procesos p ON s.proceso_id = p.id
+           LEFT JOIN usuarios u ON s.responsable_id = u.id
+           WHERE p.proyecto_id = %s ORDER BY s.id""",
+        'proceso_id',
+        RESPONSABLE,
+        {'responsable_id': 's.responsable_id', 'responsable_nombre': 'u.nombre', 'responsable_apellido': 'u.apellido'}
+    ),
+    (
+        'tecnicas',
+        {c: f'st.{c}' for c in ['id', 'subproceso_id', 'tecnica_id', 'notas', 'fecha_asignacion']},
+        """FROM subproceso_tecnicas st
+           JOIN tecnicas t ON st.tecnica_id = t.id
+           JOIN subprocesos s ON st.subproceso_id = s.id
+           JOIN procesos p ON s.proceso_id = p.id
+           WHERE p.proyecto_id = %s ORDER BY st.id""",
+        'subproceso_id',
+        TECNICA,
+        {'tecnica_id': 'st.tecnica_id', 'tecnica_nombre': 't.nombre', 'tecnica_categoria': 't.categoria'}
+    ),
+    (
+        'requerimientos',
+        CAMPOS_REQUERIMIENTO,
+        """FROM requerimientos r
+           JOIN subprocesos s ON r.subproceso_id = s.id
+           JOIN procesos p ON s.proceso_id = p.id
+           WHERE p.proyecto_id = %s ORDER BY r.codigo, r.id""",
+        'subproceso_tecnica_id',
+        None,
+        {}
+    ),
+]
+
+
+def cargar_nivel(cursor, proyecto_id, nivel, solicitados):
+    nombre, campos, desde, clave_padre, anidado, columnas_anidado = nivel
+
+    if solicitados is None:
+        seleccion = dict(campos)
+    else:
+        seleccion = {n: e for n, e in campos.items() if n in solicitados}
+        seleccion['id'] = campos['id']
+        if clave_padre:
+            seleccion[clave_padre] = campos[clave_padre]
+
+    anidados = ()
+    if anidado and (solicitados is None or anidado.clave in solicitados):
+        seleccion.update(columnas_anidado)
+        anidados = (anidado,)
+
+    columnas = ', '.join(f"{expr} AS {n}" for n, expr in seleccion.items())
+    cursor.execute(f"SELECT {columnas} {desde}", (proyecto_id,))
+    filas = serializar(cursor, cursor.fetchall(), anidados)
+
+    if solicitados is not None:
+        sobrantes = [n for n in seleccion if n not in solicitados and n not in columnas_anidado
+                     and n not in ('id', clave_padre)]
+        for fila in filas:
+            for n in sobrantes:
+                fila.pop(n, None)
+    return filas
+
+
+def construir_arbol(cursor, proyecto_id, profundidad, con_criterios, campos_por_nivel):
+    niveles = NIVELES_ARBOL[:profundidad]
+    cargados = []
+    for nivel in niveles:
+        cargados.append(cargar_nivel(cursor, proyecto_id, nivel, campos_por_nivel.get(nivel[0])))
+
+    if con_criterios and profundidad == len(NIVELES_ARBOL):
+        requerimientos = cargados[-1]
+        criterios_por_req = cargar_criterios(cursor, [r['id'] for r in requerimientos])
+        for r in requerimientos:
+            r['criterios'] = criterios_por_req.get(r['id'], [])
+
+    # Se cuelga cada nivel de su padre de abajo hacia arriba.
+    for i in range(len(niveles) - 1, 0, -1):
+        hijo, padre = niveles[i][0], cargados[i - 1]
+        clave_padre = niveles[i][3]
+        por_padre = {}
+        for fila in cargados[i]:
+            por_padre.setdefault(fila[clave_padre], []).append(fila)
+        for fila in padre:
+            fila[hijo] = por_padre.get(fila['id'], [])
+
+    return cargados[0] if cargados else []
+
 
 @proyectos_bp.route('', methods=['GET'])
 @jwt_required()
 def listar_proyectos():
     current_user_id = get_jwt_identity()
+    pagina = Pagina(CAMPOS_PROYECTO)
+    filtro, params = pagina.filtro()
     
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     
-    cursor.execute("""
-        SELECT DISTINCT p.* FROM proyectos p
-        LEFT JOIN miembros_proyecto mp ON p.id = mp.proyecto_id
-        WHERE p.creado_por = %s OR mp.usuario_id = %s
-    """, (current_user_id, current_user_id))
+    # El conjunto de ids sale de la cache (o de un UNION indexado); el listado
+    # queda como busqueda por clave primaria, sin DISTINCT ni OR entre tablas.
+    ids = sorted(proyectos_accesibles(cursor, current_user_id))
     
-    proyectos = cursor.fetchall()
+    proyectos = []
+    if ids:
+        cursor.execute(f"""
+            SELECT {pagina.select()} FROM proyectos p
+            WHERE p.id IN ({', '.join(['%s'] * len(ids))}) AND p.eliminado_en IS NULL{filtro}
+            {pagina.orden_y_limite()}
+        """, tuple(ids) + params)
+        proyectos = cursor.fetchall()
     
     cursor.close()
     conn.close()
     
-    for p in proyectos:
-        if p.get('fecha_inicio'):
-            p['fecha_inicio'] = p['fecha_inicio'].isoformat()
-        if p.get('fecha_fin'):
-            p['fecha_fin'] = p['fecha_fin'].isoformat()
-        if p.get('fecha_creacion'):
-            p['fecha_creacion'] = p['fecha_creacion'].isoformat()
-        if p.get('fecha_actualizacion'):
-            p['fecha_actualizacion'] = p['fecha_actualizacion'].isoformat()
-    
-    return jsonify(proyectos), 200
+    return pagina.respuesta(proyectos)
 
 
 @proyectos_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
+@requires_project_member(arg='id')
 def obtener_proyecto(id):
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -52,94 +177,183 @@ def obtener_proyecto(id):
     if not proyecto:
         return jsonify({'error': 'Proyecto no encontrado'}), 404
     
-    if proyecto.get('fecha_inicio'):
-        proyecto['fecha_inicio'] = proyecto['fecha_inicio'].isoformat()
-    if proyecto.get('fecha_fin'):
-        proyecto['fecha_fin'] = proyecto['fecha_fin'].isoformat()
-    if proyecto.get('fecha_creacion'):
-        proyecto['fecha_creacion'] = proyecto['fecha_creacion'].isoformat()
-    if proyecto.get('fecha_actualizacion'):
-        proyecto['fecha_actualizacion'] = proyecto['fecha_actualizacion'].isoformat()
-    
     return jsonify(proyecto), 200
 
 
-@proyectos_bp.route('', methods=['POST'])
+@proyectos_bp.route('/<int:id>/arbol', methods=['GET'])
 @jwt_required()
-def crear_proyecto():
-    current_user_id = get_jwt_identity()
-    data = request.get_json()
+@requires_project_member(arg='id')
+def obtener_arbol(id):
+    profundidad = request.args.get('profundidad', default=len(NIVELES_ARBOL), type=int)
+    profundidad = max(1, min(profundidad, len(NIVELES_ARBOL)))
+    con_criterios = request.args.get('criterios', 'true').lower() in ('1', 'true')
+
+    campos_por_nivel = {}
+    for nivel in NIVELES_ARBOL:
+        fields = request.args.get(f'fields_{nivel[0]}')
+        if fields:
+            campos_por_nivel[nivel[0]] = {f.strip() for f in fields.split(',')}
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
     
-    if not data.get('nombre'):
-        return jsonify({'error': 'El nombre es requerido'}), 400
+    cursor.execute("SELECT * FROM proyectos WHERE id = %s", (id,))
+    proyecto = cursor.fetchone()
     
-    if not data.get('prioridad'):
-        return jsonify({'error': 'La prioridad es requerida'}), 400
+    if not proyecto:
+        cursor.close()
+        conn.close()
+        return jsonify({'error': 'Proyecto no encontrado'}), 404
+    
+    proyecto['procesos'] = construir_arbol(cursor, id, profundidad, con_criterios, campos_por_nivel)
+    
+    cursor.close()
+    conn.close()
     
+    return jsonify(proyecto), 200
+
+
+@proyectos_bp.route('/<int:id>/estadisticas', methods=['GET'])
+@jwt_required()
+@requires_project_member(arg='id')
+def obtener_estadisticas(id):
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     
-    cursor.execute("""
-        INSERT INTO proyectos (nombre, descripcion, estado, prioridad, fecha_inicio, fecha_fin, creado_por)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-    """, (
-        data['nombre'],
-        data.get('descripcion'),
-        data.get('estado', 'iniciado'),
-        data['prioridad'],
-        data.get('fecha_inicio'),
-        data.get('fecha_fin'),
-        current_user_id
-    ))
-    conn.commit()
-    
-    proyecto_id = cursor.lastrowid
-    
-    cursor.execute("SELECT id FROM roles WHERE nombre = 'Product Owner' AND es_fijo = 1")
-    rol_po = cursor.fetchone()
-    
-    if rol_po:
-        cursor.execute("""
-            INSERT INTO miembros_proyecto (proyecto_id, usuario_id, rol_id, asignado_por)
-            VALUES (%s, %s, %s, %s)
-        """, (proyecto_id, current_user_id, rol_po['id'], current_user_id))
-        conn.commit()
+    resumen, hay_filas = leer_estadisticas(cursor, id)
     
-    cursor.execute("SELECT * FROM proyectos WHERE id = %s", (proyecto_id,))
-    proyecto = cursor.fetchone()
+    # Un proyecto sin contenido no tiene filas en el resumen; solo en ese caso
+    # hace falta distinguirlo de un proyecto inexistente.
+    existe = hay_filas
+    if not existe:
+        cursor.execute("SELECT id FROM proyectos WHERE id = %s", (id,))
+        existe = cursor.fetchone() is not None
     
     cursor.close()
     conn.close()
     
-    if proyecto.get('fecha_inicio'):
-        proyecto['fecha_inicio'] = proyecto['fecha_inicio'].isoformat()
-    if proyecto.get('fecha_fin'):
-        proyecto['fecha_fin'] = proyecto['fecha_fin'].isoformat()
-    if proyecto.get('fecha_creacion'):
-        proyecto['fecha_creacion'] = proyecto['fecha_creacion'].isoformat()
-    if proyecto.get('fecha_actualizacion'):
-        proyecto['fecha_actualizacion'] = proyecto['fecha_actualizacion'].isoformat()
+    if not existe:
+        return jsonify({'error': 'Proyecto no encontrado'}), 404
     
-    return jsonify({
-        'message': 'Proyecto creado',
-        'proyecto': proyecto
-    }), 201
+    return jsonify(resumen), 200
 
 
-@proyectos_bp.route('/<int:id>', methods=['PUT'])
+# NDJSON: una linea por registro ({tipo, id, datos}), padres antes que hijos.
+# Para reanudar una descarga cortada se pide ?desde=<tipo>:<id> con el ultimo
+# registro recibido; el archivo completo termina con una linea {tipo: 'fin'}.
+@proyectos_bp.route('/<int:id>/export', methods=['GET'])
 @jwt_required()
-def actualizar_proyecto(id):
-    data = request.get_json()
+@requires_project_member(arg='id')
+def exportar_proyecto(id):
+    try:
+        reanudar = punto_de_reanudacion(request.args.get('desde'))
+    except ReanudacionInvalida as e:
+        return jsonify({'error': str(e)}), 400
     
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     
+    # Todas las secciones se leen de la misma instantanea aunque el export dure minutos.
+    cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
     cursor.execute("SELECT id FROM proyectos WHERE id = %s", (id,))
     if not cursor.fetchone():
         cursor.close()
         conn.close()
         return jsonify({'error': 'Proyecto no encontrado'}), 404
     
+    dumps = current_app.json.dumps
+    tamano_lote = current_app.config['EXPORT_BATCH_SIZE']
+    
+    def generar():
+        try:
+            yield from ndjson(cursor, id, dumps, reanudar, tamano_lote)
+        finally:
+            cursor.close()
+            conn.close()
+    
+    respuesta = current_app.response_class(stream_with_context(generar()), mimetype='application/x-ndjson')
+    respuesta.headers['Content-Disposition'] = f'attachment; filename=proyecto-{id}.ndjson'
+    return respuesta
+
+
+# Recibe un archivo del export (NDJSON) como cuerpo y lo crea como proyecto
+# nuevo del usuario; el cuerpo se lee por lineas sin cargarlo entero.
+@proyectos_bp.route('/import', methods=['POST'])
+@jwt_required()
+def importar_proyecto():
+    current_user_id = get_jwt_identity()
+    commit_cada = request.args.get('commit_cada', type=int)
+    
+    conn = get_db_connection()
+    try:
+        resumen = importar(
+            conn, request.stream, current_user_id, current_app.config['IMPORT_BATCH_SIZE'], commit_cada,
+            request.args.get('nombre')
+        )
+    except ImportacionInvalida as e:
+        return jsonify({'error': str(e)}), 400
+    finally:
+        conn.close()
+    
+    return jsonify({
+        'message': 'Proyecto importado',
+        'importacion': resumen
+    }), 201
+
+
+@proyectos_bp.route('', methods=['POST'])
+@jwt_required()
+def crear_proyecto():
+    current_user_id = get_jwt_identity()
+    data = request.get_json()
+    
+    if not data.get('nombre'):
+        return jsonify({'error': 'El nombre es requerido'}), 400
+    
+    if not data.get('prioridad'):
+        return jsonify({'error': 'La prioridad es requerida'}), 400
+    
+    with transaccion() as cursor:
+        cursor.execute("""
+            INSERT INTO proyectos (nombre, descripcion, estado, prioridad, fecha_inicio, fecha_fin, creado_por)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, (
+            data['nombre'],
+            data.get('descripcion'),
+            data.get('estado', 'iniciado'),
+            data['prioridad'],
+            data.get('fecha_inicio'),
+            data.get('fecha_fin'),
+            current_user_id
+        ))
+        
+        proyecto_id = cursor.lastrowid
+        
+        rol_po = catalogo.rol_fijo_por_nombre('Product Owner')
+        
+        if rol_po:
+            cursor.execute("""
+                INSERT INTO miembros_proyecto (proyecto_id, usuario_id, rol_id, asignado_por)
+                VALUES (%s, %s, %s, %s)
+            """, (proyecto_id, current_user_id, rol_po['id'], current_user_id))
+        
+        cursor.execute("SELECT * FROM proyectos WHERE id = %s", (proyecto_id,))
+        proyecto = cursor.fetchone()
+    
+    invalidar_membresias(current_user_id)
+    
+    return jsonify({
+        'message': 'Proyecto creado',
+        'proyecto': proyecto
+    }), 201
+
+
+@proyectos_bp.route('/<int:id>', methods=['PUT'])
+@jwt_required()
+@requires_project_member(arg='id')
+def actualizar_proyecto(id):
+    data = request.get_json()
+    
     updates = []
     values = []
     
@@ -162,25 +376,18 @@ def actualizar_proyecto(id):
         updates.append("fecha_fin = %s")
         values.append(data['fecha_fin'] if data['fecha_fin'] else None)
     
-    if updates:
-        values.append(id)
-        cursor.execute(f"UPDATE proyectos SET {', '.join(updates)} WHERE id = %s", values)
-        conn.commit()
-    
-    cursor.execute("SELECT * FROM proyectos WHERE id = %s", (id,))
-    proyecto = cursor.fetchone()
-    
-    cursor.close()
-    conn.close()
+    with transaccion() as cursor:
+        if updates:
+            values.append(id)
+            cursor.execute(f"UPDATE proyectos SET {', '.join(updates)} WHERE id = %s", values)
+            if cursor.rowcount == 0:
+                return jsonify({'error': 'Proyecto no encontrado'}), 404
+        
+        cursor.execute("SELECT * FROM proyectos WHERE id = %s", (id,))
+        proyecto = cursor.fetchone()
     
-    if proyecto.get('fecha_inicio'):
-        proyecto['fecha_inicio'] = proyecto['fecha_inicio'].isoformat()
-    if proyecto.get('fecha_fin'):
-        proyecto['fecha_fin'] = proyecto['fecha_fin'].isoformat()
-    if proyecto.get('fecha_creacion'):
-        proyecto['fecha_creacion'] = proyecto['fecha_creacion'].isoformat()
-    if proyecto.get('fecha_actualizacion'):
-        proyecto['fecha_actualizacion'] = proyecto['fecha_actualizacion'].isoformat()
+    if not proyecto:
+        return jsonify({'error': 'Proyecto no encontrado'}), 404
     
     return jsonify({
         'message': 'Proyecto actualizado',
@@ -188,31 +395,61 @@ def actualizar_proyecto(id):
     }), 200
 
 
+# Solo marca el proyecto y encola la purga: borrar en linea recorre toda la
+# cascada con los bloqueos tomados. El proyecto desaparece de inmediato del
+# mapa de membresias; el worker de trabajos (o `flask purgar-proyectos`) borra
+# los hijos por lotes y el avance se consulta en /<id>/eliminacion.
 @proyectos_bp.route('/<int:id>', methods=['DELETE'])
 @jwt_required()
 def eliminar_proyecto(id):
     current_user_id = get_jwt_identity()
     
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("SELECT creado_por FROM proyectos WHERE id = %s", (id,))
-    proyecto = cursor.fetchone()
-    
-    if not proyecto:
-        cursor.close()
-        conn.close()
+    with transaccion() as cursor:
+        cursor.execute("""
+            UPDATE proyectos SET eliminado_en = NOW()
+            WHERE id = %s AND creado_por = %s AND eliminado_en IS NULL
+        """, (id, current_user_id))
+        eliminado = cursor.rowcount > 0
+        
+        if eliminado:
+            solicitar_purga(cursor, id, current_user_id)
+            trabajo_id, _ = encolar(
+                cursor, 'purgar', {'proyecto_id': id}, current_user_id, f'purga:{id}',
+                current_app.config['JOBS_MAX_ATTEMPTS']
+            )
+            cursor.execute("SELECT usuario_id FROM miembros_proyecto WHERE proyecto_id = %s", (id,))
+            miembros = [fila['usuario_id'] for fila in cursor.fetchall()]
+        else:
+            # Solo en el camino de error se distingue inexistente de ajeno.
+            cursor.execute("SELECT id FROM proyectos WHERE id = %s AND eliminado_en IS NULL", (id,))
+            existe = cursor.fetchone()
+    
+    if eliminado:
+        invalidar_membresias(current_user_id, *miembros)
+        return jsonify({
+            'message': 'Proyecto eliminado',
+            'estado': f'/api/proyectos/{id}/eliminacion',
+            'trabajo': f'/api/jobs/{trabajo_id}'
+        }), 202
+    
+    if not existe:
         return jsonify({'error': 'Proyecto no encontrado'}), 404
     
-    if proyecto['creado_por'] != current_user_id:
-        cursor.close()
-        conn.close()
-        return jsonify({'error': 'No tienes permiso para eliminar este proyecto'}), 403
+    return jsonify({'error': 'No tienes permiso para eliminar este proyecto'}), 403
+
+
+@proyectos_bp.route('/<int:id>/eliminacion', methods=['GET'])
+@jwt_required()
+def obtener_eliminacion(id):
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
     
-    cursor.execute("DELETE FROM proyectos WHERE id = %s", (id,))
-    conn.commit()
+    purga = leer_purga(cursor, id)
     
     cursor.close()
     conn.close()
     
-    return jsonify({'message': 'Proyecto eliminado'}), 200
+    if not purga or str(purga['solicitado_por']) != str(get_jwt_identity()):
+        return jsonify({'error': 'Eliminacion no encontrada'}), 404
+    
+    return jsonify(purga), 200
@@ -1,105 +1,240 @@
 import json
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from extensions import get_db_connection
+from acceso import requires_project_member
+from conditional import respuesta_con_etag, verificar_no_modificado
+from estadisticas import (DESDE_CRITERIOS, DESDE_REQUERIMIENTOS, deltas_criterio, deltas_requerimiento,
+                          proyecto_de_requerimiento, proyecto_de_subproceso, registrar, sumar)
+from extensions import get_db_connection, transaccion
+from pagination import Pagina
+from serializers import serializar, serializar_fila
+from streaming import respuesta_json_stream, stream_solicitado
 
 requerimientos_bp = Blueprint('requerimientos', __name__)
 
+CAMPOS_REQUERIMIENTO = {c: f'r.{c}' for c in [
+    'id', 'subproceso_id', 'subproceso_tecnica_id', 'codigo', 'titulo', 'descripcion', 'tipo',
+    'prioridad', 'estado', 'metadata', 'creado_por', 'fecha_creacion', 'fecha_actualizacion'
+]}
+CAMPOS_REQUERIMIENTO_TECNICA = dict(CAMPOS_REQUERIMIENTO, tecnica_nombre='t.nombre', tecnica_categoria='t.categoria')
 
-def generar_codigo(cursor, subproceso_id):
-    cursor.execute(
-        "SELECT COUNT(*) as total FROM requerimientos WHERE subproceso_id = %s",
-        (subproceso_id,)
-    )
-    total = cursor.fetchone()['total']
-    return f"REQ-{str(total + 1).zfill(3)}"
 
+TIPOS = ('funcional', 'no_funcional', 'restriccion', 'regla_negocio')
+PRIORIDADES = ('critica', 'alta', 'media', 'baja')
+ESTADOS = ('borrador', 'propuesto', 'aprobado', 'rechazado')
 
-@requerimientos_bp.route('/subproceso/<int:subproceso_id>', methods=['GET'])
-@jwt_required()
-def listar_por_subproceso(subproceso_id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
 
+def generar_codigos(cursor, subproceso_id, cantidad):
+    # Una sola sentencia sobre la fila del contador: el bloqueo de la fila dura
+    # hasta el commit del INSERT, asi que dos altas concurrentes nunca obtienen
+    # el mismo numero y un codigo borrado no se vuelve a entregar. La fila la
+    # crean crear_subproceso, la importacion y la migracion 001, de modo que el
+    # INSERT solo ocurre en subprocesos sin requerimientos previos. Con un
+    # UPDATE seguido de un INSERT, dos primeras altas se bloqueaban el hueco
+    # una a la otra y terminaban en deadlock.
     cursor.execute("""
-        SELECT r.*, t.nombre as tecnica_nombre, t.categoria as tecnica_categoria
+        INSERT INTO requerimiento_secuencias (subproceso_id, ultimo)
+        VALUES (%s, LAST_INSERT_ID(%s))
+        ON DUPLICATE KEY UPDATE ultimo = LAST_INSERT_ID(ultimo + %s)
+    """, (subproceso_id, cantidad, cantidad))
+
+    cursor.execute("SELECT LAST_INSERT_ID() as ultimo")
+    ultimo = cursor.fetchone()['ultimo']
+    return [f"REQ-{str(n).zfill(3)}" for n in range(ultimo - cantidad + 1, ultimo + 1)]
+
+
+def generar_codigo(cursor, subproceso_id):
+    return generar_codigos(cursor, subproceso_id, 1)[0]
+
+
+def valor_metadata(metadata):
+    if not metadata:
+        return None
+    return json.dumps(metadata) if isinstance(metadata, dict) else metadata
+
+
+# Las consultas de listado se arman aparte para compartirlas con el modo ASGI
+# (asgi.py), que las ejecuta con el driver asincrono.
+def consulta_criterios(requerimiento_ids):
+    placeholders = ', '.join(['%s'] * len(requerimiento_ids))
+    return f"""
+        SELECT * FROM criterios_aceptacion
+        WHERE requerimiento_id IN ({placeholders})
+        ORDER BY requerimiento_id, orden
+    """, tuple(requerimiento_ids)
+
+
+def agrupar_criterios(criterios):
+    criterios_por_req = {}
+    for c in criterios:
+        criterios_por_req.setdefault(c['requerimiento_id'], []).append(c)
+    return criterios_por_req
+
+
+def cargar_criterios(cursor, requerimiento_ids):
+    if not requerimiento_ids:
+        return {}
+
+    cursor.execute(*consulta_criterios(requerimiento_ids))
+    return agrupar_criterios(cursor.fetchall())
+
+
+def pagina_por_subproceso():
+    return Pagina(CAMPOS_REQUERIMIENTO_TECNICA, orden='codigo', extras=('criterios',))
+
+
+def consulta_por_subproceso(pagina, subproceso_id):
+    filtro, params = pagina.filtro()
+    return f"""
+        SELECT {pagina.select()}
         FROM requerimientos r
         JOIN subproceso_tecnicas st ON r.subproceso_tecnica_id = st.id
         JOIN tecnicas t ON st.tecnica_id = t.id
-        WHERE r.subproceso_id = %s
-        ORDER BY r.codigo
-    """, (subproceso_id,))
+        WHERE r.subproceso_id = %s{filtro}
+        {pagina.orden_y_limite()}
+    """, (subproceso_id,) + params
+
+
+def pagina_por_tecnica():
+    return Pagina(CAMPOS_REQUERIMIENTO, orden='codigo', extras=('criterios',))
+
+
+def consulta_por_tecnica(pagina, subproceso_tecnica_id):
+    filtro, params = pagina.filtro()
+    return f"""
+        SELECT {pagina.select()} FROM requerimientos r
+        WHERE r.subproceso_tecnica_id = %s{filtro}
+        {pagina.orden_y_limite()}
+    """, (subproceso_tecnica_id,) + params
+
+
+# Los criterios viajan dentro del requerimiento, asi que cualquier cambio en
+# ellos debe invalidar su ETag.
+def tocar_requerimiento(cursor, requerimiento_id):
+    cursor.execute(
+        "UPDATE requerimientos SET fecha_actualizacion = CURRENT_TIMESTAMP(6) WHERE id = %s",
+        (requerimiento_id,)
+    )
+    return cursor.rowcount
+
+
+def tocar_requerimiento_de_criterio(cursor, criterio_id):
+    cursor.execute("""
+        UPDATE requerimientos SET fecha_actualizacion = CURRENT_TIMESTAMP(6)
+        WHERE id = (SELECT requerimiento_id FROM criterios_aceptacion WHERE id = %s)
+    """, (criterio_id,))
+
+
+# Valores que alimentan las estadisticas del proyecto, leidos con bloqueo antes
+# de modificar o borrar la fila.
+def estado_requerimiento(cursor, requerimiento_id):
+    cursor.execute(f"""
+        SELECT r.tipo, r.estado, r.prioridad, p.proyecto_id,
+               (SELECT COUNT(*) FROM criterios_aceptacion c WHERE c.requerimiento_id = r.id) AS criterios,
+               (SELECT COALESCE(SUM(c.cumplido), 0) FROM criterios_aceptacion c WHERE c.requerimiento_id = r.id) AS cumplidos
+        FROM {DESDE_REQUERIMIENTOS}
+        WHERE r.id = %s
+        FOR UPDATE OF r
+    """, (requerimiento_id,))
+    return cursor.fetchone()
+
 
-    requerimientos = cursor.fetchall()
+def estado_criterio(cursor, criterio_id):
+    cursor.execute(f"""
+        SELECT c.cumplido, p.proyecto_id
+        FROM {DESDE_CRITERIOS}
+        WHERE c.id = %s
+        FOR UPDATE OF c
+    """, (criterio_id,))
+    return cursor.fetchone()
 
+
+def agregar_criterios(cursor, requerimientos):
+    criterios_por_req = cargar_criterios(cursor, [req['id'] for req in requerimientos])
     for req in requerimientos:
-        cursor.execute(
-            "SELECT * FROM criterios_aceptacion WHERE requerimiento_id = %s ORDER BY orden",
-            (req['id'],)
-        )
-        criterios = cursor.fetchall()
-        for c in criterios:
-            if c.get('fecha_creacion'):
-                c['fecha_creacion'] = c['fecha_creacion'].isoformat()
-        req['criterios'] = criterios
-
-        if req.get('fecha_creacion'):
-            req['fecha_creacion'] = req['fecha_creacion'].isoformat()
-        if req.get('fecha_actualizacion'):
-            req['fecha_actualizacion'] = req['fecha_actualizacion'].isoformat()
-        if req.get('metadata') and isinstance(req['metadata'], str):
-            req['metadata'] = json.loads(req['metadata'])
+        req['criterios'] = criterios_por_req.get(req['id'], [])
+
+
+# Un cursor sin buffer ocupa la conexion hasta leer la ultima fila, y pedir una
+# segunda conexion por peticion agota el pool. Con criterios se recorre por
+# keyset en lotes: cada lote se lee entero y sus criterios se consultan por la
+# misma conexion antes de pedir el siguiente.
+def stream_con_criterios(conn, cursor, pagina, consulta):
+    def lotes(tamano_lote):
+        pagina.limite = tamano_lote
+        while True:
+            cursor.execute(*consulta(pagina))
+            lote, siguiente = pagina.recortar(serializar(cursor, cursor.fetchall()))
+            agregar_criterios(cursor, lote)
+            # El cursor se arma antes de entregar el lote: al emitirlo se le
+            # quitan las columnas que no estan en fields.
+            if siguiente is not None:
+                pagina.after = (lote[-1][pagina.orden], lote[-1]['id'])
+            yield lote
+            if siguiente is None:
+                return
+
+    return respuesta_json_stream(conn, cursor, lotes=lotes, pagina=pagina)
+
+
+def listar(conn, cursor, pagina, consulta):
+    if stream_solicitado() and pagina.limite is None:
+        if pagina.incluye('criterios'):
+            return stream_con_criterios(conn, cursor, pagina, consulta)
+        cursor.execute(*consulta(pagina))
+        return respuesta_json_stream(conn, cursor, pagina=pagina)
+
+    cursor.execute(*consulta(pagina))
+    requerimientos = serializar(cursor, cursor.fetchall())
+
+    enriquecer = None
+    if pagina.incluye('criterios'):
+        enriquecer = lambda filas: agregar_criterios(cursor, filas)
+    respuesta = pagina.respuesta(requerimientos, enriquecer=enriquecer)
 
     cursor.close()
     conn.close()
 
-    return jsonify(requerimientos), 200
+    return respuesta
 
 
-@requerimientos_bp.route('/tecnica/<int:subproceso_tecnica_id>', methods=['GET'])
+@requerimientos_bp.route('/subproceso/<int:subproceso_id>', methods=['GET'])
 @jwt_required()
-def listar_por_tecnica(subproceso_tecnica_id):
+@requires_project_member(entidad='subproceso', arg='subproceso_id')
+def listar_por_subproceso(subproceso_id):
+    pagina = pagina_por_subproceso()
+
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
-    cursor.execute("""
-        SELECT r.* FROM requerimientos r
-        WHERE r.subproceso_tecnica_id = %s
-        ORDER BY r.codigo
-    """, (subproceso_tecnica_id,))
+    return listar(conn, cursor, pagina, lambda pagina: consulta_por_subproceso(pagina, subproceso_id))
 
-    requerimientos = cursor.fetchall()
 
-    for req in requerimientos:
-        cursor.execute(
-            "SELECT * FROM criterios_aceptacion WHERE requerimiento_id = %s ORDER BY orden",
-            (req['id'],)
-        )
-        criterios = cursor.fetchall()
-        for c in criterios:
-            if c.get('fecha_creacion'):
-                c['fecha_creacion'] = c['fecha_creacion'].isoformat()
-        req['criterios'] = criterios
-
-        if req.get('fecha_creacion'):
-            req['fecha_creacion'] = req['fecha_creacion'].isoformat()
-        if req.get('fecha_actualizacion'):
-            req['fecha_actualizacion'] = req['fecha_actualizacion'].isoformat()
-        if req.get('metadata') and isinstance(req['metadata'], str):
-            req['metadata'] = json.loads(req['metadata'])
+@requerimientos_bp.route('/tecnica/<int:subproceso_tecnica_id>', methods=['GET'])
+@jwt_required()
+@requires_project_member(entidad='subproceso_tecnica', arg='subproceso_tecnica_id')
+def listar_por_tecnica(subproceso_tecnica_id):
+    pagina = pagina_por_tecnica()
 
-    cursor.close()
-    conn.close()
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
 
-    return jsonify(requerimientos), 200
+    return listar(conn, cursor, pagina, lambda pagina: consulta_por_tecnica(pagina, subproceso_tecnica_id))
 
 
 @requerimientos_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
+@requires_project_member(entidad='requerimiento')
 def obtener(id):
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
+    no_modificado = verificar_no_modificado(cursor, 'requerimientos', id)
+    if no_modificado:
+        cursor.close()
+        conn.close()
+        return no_modificado
+
     cursor.execute("""
         SELECT r.*, t.nombre as tecnica_nombre, t.categoria as tecnica_categoria
         FROM requerimientos r
@@ -108,38 +243,24 @@ def obtener(id):
         WHERE r.id = %s
     """, (id,))
 
-    req = cursor.fetchone()
+    req = serializar_fila(cursor, cursor.fetchone())
 
     if not req:
         cursor.close()
         conn.close()
         return jsonify({'error': 'Requerimiento no encontrado'}), 404
 
-    cursor.execute(
-        "SELECT * FROM criterios_aceptacion WHERE requerimiento_id = %s ORDER BY orden",
-        (req['id'],)
-    )
-    criterios = cursor.fetchall()
-    for c in criterios:
-        if c.get('fecha_creacion'):
-            c['fecha_creacion'] = c['fecha_creacion'].isoformat()
-    req['criterios'] = criterios
-
-    if req.get('fecha_creacion'):
-        req['fecha_creacion'] = req['fecha_creacion'].isoformat()
-    if req.get('fecha_actualizacion'):
-        req['fecha_actualizacion'] = req['fecha_actualizacion'].isoformat()
-    if req.get('metadata') and isinstance(req['metadata'], str):
-        req['metadata'] = json.loads(req['metadata'])
+    req['criterios'] = cargar_criterios(cursor, [req['id']]).get(req['id'], [])
 
     cursor.close()
     conn.close()
 
-    return jsonify(req), 200
+    return respuesta_con_etag(jsonify(req), id, req['fecha_actualizacion'])
 
 
 @requerimientos_bp.route('', methods=['POST'])
 @jwt_required()
+@requires_project_member(entidad='subproceso', arg='subproceso_id')
 def crear():
     current_user_id = get_jwt_identity()
     data = request.get_json()
@@ -149,71 +270,53 @@ def crear():
         if not data.get(field):
             return jsonify({'error': f'El campo {field} es requerido'}), 400
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    codigo = generar_codigo(cursor, data['subproceso_id'])
-
-    metadata_value = None
-    if data.get('metadata'):
-        metadata_value = json.dumps(data['metadata']) if isinstance(data['metadata'], dict) else data['metadata']
-
-    cursor.execute("""
-        INSERT INTO requerimientos (subproceso_id, subproceso_tecnica_id, codigo, titulo, descripcion, tipo, prioridad, estado, metadata, creado_por)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """, (
-        data['subproceso_id'],
-        data['subproceso_tecnica_id'],
-        codigo,
-        data['titulo'],
-        data.get('descripcion'),
-        data.get('tipo', 'funcional'),
-        data.get('prioridad', 'media'),
-        data.get('estado', 'borrador'),
-        metadata_value,
-        current_user_id
-    ))
-    conn.commit()
-
-    req_id = cursor.lastrowid
-
-    if data.get('criterios'):
-        for i, criterio in enumerate(data['criterios']):
-            cursor.execute("""
+    with transaccion() as cursor:
+        # La membresia se valido sobre subproceso_id; la tecnica tiene que ser de ese subproceso.
+        cursor.execute("SELECT id FROM subproceso_tecnicas WHERE id = %s AND subproceso_id = %s",
+                       (data['subproceso_tecnica_id'], data['subproceso_id']))
+        if not cursor.fetchone():
+            return jsonify({'error': 'La tecnica no pertenece al subproceso'}), 400
+
+        codigo = generar_codigo(cursor, data['subproceso_id'])
+
+        cursor.execute("""
+            INSERT INTO requerimientos (subproceso_id, subproceso_tecnica_id, codigo, titulo, descripcion, tipo, prioridad, estado, metadata, creado_por)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, (
+            data['subproceso_id'],
+            data['subproceso_tecnica_id'],
+            codigo,
+            data['titulo'],
+            data.get('descripcion'),
+            data.get('tipo', 'funcional'),
+            data.get('prioridad', 'media'),
+            data.get('estado', 'borrador'),
+            valor_metadata(data.get('metadata')),
+            current_user_id
+        ))
+
+        req_id = cursor.lastrowid
+
+        if data.get('criterios'):
+            cursor.executemany("""
                 INSERT INTO criterios_aceptacion (requerimiento_id, descripcion, orden)
                 VALUES (%s, %s, %s)
-            """, (req_id, criterio['descripcion'], i))
-        conn.commit()
+            """, [(req_id, criterio['descripcion'], i) for i, criterio in enumerate(data['criterios'])])
 
-    cursor.execute("""
-        SELECT r.*, t.nombre as tecnica_nombre, t.categoria as tecnica_categoria
-        FROM requerimientos r
-        JOIN subproceso_tecnicas st ON r.subproceso_tecnica_id = st.id
-        JOIN tecnicas t ON st.tecnica_id = t.id
-        WHERE r.id = %s
-    """, (req_id,))
+        cursor.execute("""
+            SELECT r.*, t.nombre as tecnica_nombre, t.categoria as tecnica_categoria
+            FROM requerimientos r
+            JOIN subproceso_tecnicas st ON r.subproceso_tecnica_id = st.id
+            JOIN tecnicas t ON st.tecnica_id = t.id
+            WHERE r.id = %s
+        """, (req_id,))
 
-    req = cursor.fetchone()
+        req = serializar_fila(cursor, cursor.fetchone())
 
-    cursor.execute(
-        "SELECT * FROM criterios_aceptacion WHERE requerimiento_id = %s ORDER BY orden",
-        (req_id,)
-    )
-    criterios = cursor.fetchall()
-    for c in criterios:
-        if c.get('fecha_creacion'):
-            c['fecha_creacion'] = c['fecha_creacion'].isoformat()
-    req['criterios'] = criterios
+        req['criterios'] = cargar_criterios(cursor, [req_id]).get(req_id, [])
 
-    if req.get('fecha_creacion'):
-        req['fecha_creacion'] = req['fecha_creacion'].isoformat()
-    if req.get('fecha_actualizacion'):
-        req['fecha_actualizacion'] = req['fecha_actualizacion'].isoformat()
-    if req.get('metadata') and isinstance(req['metadata'], str):
-        req['metadata'] = json.loads(req['metadata'])
-
-    cursor.close()
-    conn.close()
+        registrar(cursor, proyecto_de_subproceso(cursor, data['subproceso_id']),
+                  sumar(deltas_requerimiento(req), {'criterios.total': len(req['criterios'])}))
 
     return jsonify({
         'message': 'Requerimiento creado',
@@ -221,18 +324,129 @@ def crear():
     }), 201
 
 
-@requerimientos_bp.route('/<int:id>', methods=['PUT'])
+def validar_item(item, tecnicas_validas):
+    if not isinstance(item, dict):
+        return 'Cada requerimiento debe ser un objeto'
+    for field in ['subproceso_tecnica_id', 'titulo']:
+        if not item.get(field):
+            return f'El campo {field} es requerido'
+    if not isinstance(item['subproceso_tecnica_id'], int) or item['subproceso_tecnica_id'] not in tecnicas_validas:
+        return 'La tecnica no pertenece al subproceso'
+    if not isinstance(item['titulo'], str) or len(item['titulo']) > 255:
+        return 'El titulo debe ser texto de hasta 255 caracteres'
+    for campo, validos in (('tipo', TIPOS), ('prioridad', PRIORIDADES), ('estado', ESTADOS)):
+        if campo in item and item[campo] not in validos:
+            return f'Valor invalido para {campo}: {item[campo]}'
+    criterios = item.get('criterios') or []
+    if not isinstance(criterios, list) or not all(isinstance(c, dict) and c.get('descripcion') for c in criterios):
+        return 'Cada criterio requiere una descripcion'
+    return None
+
+
+# Alta masiva: todo el lote se valida antes de escribir, los codigos se reservan
+# en un solo bloque y requerimientos y criterios se insertan con executemany en
+# una unica transaccion. Los items invalidos se informan por indice; con
+# atomico=true cualquier error cancela el lote completo.
+@requerimientos_bp.route('/bulk', methods=['POST'])
 @jwt_required()
-def actualizar(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+@requires_project_member(entidad='subproceso', arg='subproceso_id')
+def crear_bulk():
+    current_user_id = get_jwt_identity()
+    data = request.get_json()
 
-    cursor.execute("SELECT id FROM requerimientos WHERE id = %s", (id,))
-    if not cursor.fetchone():
-        cursor.close()
-        conn.close()
-        return jsonify({'error': 'Requerimiento no encontrado'}), 404
+    subproceso_id = data.get('subproceso_id')
+    items = data.get('requerimientos')
+    if not subproceso_id:
+        return jsonify({'error': 'El campo subproceso_id es requerido'}), 400
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'El campo requerimientos es requerido'}), 400
+    if len(items) > current_app.config['REQUERIMIENTOS_BULK_MAX']:
+        return jsonify({'error': 'Demasiados requerimientos en un solo lote'}), 413
+
+    with transaccion() as cursor:
+        cursor.execute("SELECT id FROM subproceso_tecnicas WHERE subproceso_id = %s", (subproceso_id,))
+        tecnicas_validas = {fila['id'] for fila in cursor.fetchall()}
+
+        if not tecnicas_validas:
+            cursor.execute("SELECT id FROM subprocesos WHERE id = %s", (subproceso_id,))
+            if not cursor.fetchone():
+                return jsonify({'error': 'Subproceso no encontrado'}), 404
+
+        errores = []
+        validos = []
+        for i, item in enumerate(items):
+            error = validar_item(item, tecnicas_validas)
+            if error:
+                errores.append({'indice': i, 'error': error})
+            else:
+                validos.append((i, item))
+
+        if not validos or (errores and data.get('atomico')):
+            return jsonify({'error': 'Ningun requerimiento fue creado', 'errores': errores}), 400
+
+        codigos = generar_codigos(cursor, subproceso_id, len(validos))
+
+        cursor.executemany("""
+            INSERT INTO requerimientos (subproceso_id, subproceso_tecnica_id, codigo, titulo, descripcion, tipo, prioridad, estado, metadata, creado_por)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, [(
+            subproceso_id,
+            item['subproceso_tecnica_id'],
+            codigo,
+            item['titulo'],
+            item.get('descripcion'),
+            item.get('tipo', 'funcional'),
+            item.get('prioridad', 'media'),
+            item.get('estado', 'borrador'),
+            valor_metadata(item.get('metadata')),
+            current_user_id
+        ) for (_, item), codigo in zip(validos, codigos)])
+
+        # Los ids de un INSERT multifila no son necesariamente consecutivos, asi que
+        # se recuperan por el codigo recien reservado (unico dentro del subproceso).
+        placeholders = ', '.join(['%s'] * len(codigos))
+        cursor.execute(f"""
+            SELECT r.*, t.nombre as tecnica_nombre, t.categoria as tecnica_categoria
+            FROM requerimientos r
+            JOIN subproceso_tecnicas st ON r.subproceso_tecnica_id = st.id
+            JOIN tecnicas t ON st.tecnica_id = t.id
+            WHERE r.subproceso_id = %s AND r.codigo IN ({placeholders})
+            ORDER BY r.id
+        """, (subproceso_id, *codigos))
+        creados = serializar(cursor, cursor.fetchall())
+        por_codigo = {req['codigo']: req for req in creados}
+
+        criterios = [
+            (por_codigo[codigo]['id'], criterio['descripcion'], orden)
+            for (_, item), codigo in zip(validos, codigos)
+            for orden, criterio in enumerate(item.get('criterios') or [])
+        ]
+        if criterios:
+            cursor.executemany("""
+                INSERT INTO criterios_aceptacion (requerimiento_id, descripcion, orden)
+                VALUES (%s, %s, %s)
+            """, criterios)
+
+        agregar_criterios(cursor, creados)
+
+        registrar(cursor, proyecto_de_subproceso(cursor, subproceso_id),
+                  sumar(*[deltas_requerimiento(req) for req in creados], {'criterios.total': len(criterios)}))
 
+    resultados = [
+        dict(por_codigo[codigo], indice=i)
+        for (i, _), codigo in zip(validos, codigos)
+    ]
+    return jsonify({
+        'message': f'{len(resultados)} requerimientos creados',
+        'requerimientos': resultados,
+        'errores': errores
+    }), 207 if errores else 201
+
+
+@requerimientos_bp.route('/<int:id>', methods=['PUT'])
+@jwt_required()
+@requires_project_member(entidad='requerimiento')
+def actualizar(id):
     data = request.get_json()
 
     updates = []
@@ -249,40 +463,37 @@ def actualizar(id):
         meta = data['metadata']
         values.append(json.dumps(meta) if isinstance(meta, dict) else meta)
 
-    if updates:
-        values.append(id)
-        cursor.execute(f"UPDATE requerimientos SET {', '.join(updates)} WHERE id = %s", values)
-        conn.commit()
+    with transaccion() as cursor:
+        anterior = None
+        if any(campo in data for campo in ('tipo', 'estado', 'prioridad')):
+            anterior = estado_requerimiento(cursor, id)
+            if not anterior:
+                return jsonify({'error': 'Requerimiento no encontrado'}), 404
 
-    cursor.execute("""
-        SELECT r.*, t.nombre as tecnica_nombre, t.categoria as tecnica_categoria
-        FROM requerimientos r
-        JOIN subproceso_tecnicas st ON r.subproceso_tecnica_id = st.id
-        JOIN tecnicas t ON st.tecnica_id = t.id
-        WHERE r.id = %s
-    """, (id,))
+        if updates:
+            values.append(id)
+            cursor.execute(f"UPDATE requerimientos SET {', '.join(updates)} WHERE id = %s", values)
+            if cursor.rowcount == 0:
+                return jsonify({'error': 'Requerimiento no encontrado'}), 404
 
-    req = cursor.fetchone()
+        cursor.execute("""
+            SELECT r.*, t.nombre as tecnica_nombre, t.categoria as tecnica_categoria
+            FROM requerimientos r
+            JOIN subproceso_tecnicas st ON r.subproceso_tecnica_id = st.id
+            JOIN tecnicas t ON st.tecnica_id = t.id
+            WHERE r.id = %s
+        """, (id,))
 
-    cursor.execute(
-        "SELECT * FROM criterios_aceptacion WHERE requerimiento_id = %s ORDER BY orden",
-        (id,)
-    )
-    criterios = cursor.fetchall()
-    for c in criterios:
-        if c.get('fecha_creacion'):
-            c['fecha_creacion'] = c['fecha_creacion'].isoformat()
-    req['criterios'] = criterios
+        req = serializar_fila(cursor, cursor.fetchone())
 
-    if req.get('fecha_creacion'):
-        req['fecha_creacion'] = req['fecha_creacion'].isoformat()
-    if req.get('fecha_actualizacion'):
-        req['fecha_actualizacion'] = req['fecha_actualizacion'].isoformat()
-    if req.get('metadata') and isinstance(req['metadata'], str):
-        req['metadata'] = json.loads(req['metadata'])
+        if not req:
+            return jsonify({'error': 'Requerimiento no encontrado'}), 404
 
-    cursor.close()
-    conn.close()
+        req['criterios'] = cargar_criterios(cursor, [id]).get(id, [])
+
+        if anterior:
+            registrar(cursor, anterior['proyecto_id'],
+                      sumar(deltas_requerimiento(anterior, -1), deltas_requerimiento(req)))
 
     return jsonify({
         'message': 'Requerimiento actualizado',
@@ -292,21 +503,20 @@ def actualizar(id):
 
 @requerimientos_bp.route('/<int:id>', methods=['DELETE'])
 @jwt_required()
+@requires_project_member(entidad='requerimiento')
 def eliminar(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    with transaccion() as cursor:
+        anterior = estado_requerimiento(cursor, id)
+        if not anterior:
+            return jsonify({'error': 'Requerimiento no encontrado'}), 404
 
-    cursor.execute("SELECT id FROM requerimientos WHERE id = %s", (id,))
-    if not cursor.fetchone():
-        cursor.close()
-        conn.close()
-        return jsonify({'error': 'Requerimiento no encontrado'}), 404
+        cursor.execute("DELETE FROM requerimientos WHERE id = %s", (id,))
 
-    cursor.execute("DELETE FROM requerimientos WHERE id = %s", (id,))
-    conn.commit()
-
-    cursor.close()
-    conn.close()
+        # Los criterios se borran en cascada junto con el requerimiento.
+        registrar(cursor, anterior['proyecto_id'], sumar(
+            deltas_requerimiento(anterior, -1),
+            {'criterios.total': -anterior['criterios'], 'criterios.cumplidos': -anterior['cumplidos']}
+        ))
 
     return jsonify({'message': 'Requerimiento eliminado'}), 200
 
@@ -315,45 +525,36 @@ def eliminar(id):
 
 @requerimientos_bp.route('/<int:requerimiento_id>/criterios', methods=['POST'])
 @jwt_required()
+@requires_project_member(entidad='requerimiento', arg='requerimiento_id')
 def agregar_criterio(requerimiento_id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("SELECT id FROM requerimientos WHERE id = %s", (requerimiento_id,))
-    if not cursor.fetchone():
-        cursor.close()
-        conn.close()
-        return jsonify({'error': 'Requerimiento no encontrado'}), 404
-
     data = request.get_json()
 
     if not data.get('descripcion'):
-        cursor.close()
-        conn.close()
         return jsonify({'error': 'La descripcion es requerida'}), 400
 
-    cursor.execute(
-        "SELECT COALESCE(MAX(orden), -1) + 1 as siguiente FROM criterios_aceptacion WHERE requerimiento_id = %s",
-        (requerimiento_id,)
-    )
-    siguiente_orden = cursor.fetchone()['siguiente']
+    with transaccion() as cursor:
+        # Tocar el requerimiento primero sirve de chequeo de existencia y bloquea
+        # su fila, asi dos altas concurrentes no calculan el mismo orden.
+        if not tocar_requerimiento(cursor, requerimiento_id):
+            return jsonify({'error': 'Requerimiento no encontrado'}), 404
 
-    cursor.execute("""
-        INSERT INTO criterios_aceptacion (requerimiento_id, descripcion, orden)
-        VALUES (%s, %s, %s)
-    """, (requerimiento_id, data['descripcion'], siguiente_orden))
-    conn.commit()
+        cursor.execute(
+            "SELECT COALESCE(MAX(orden), -1) + 1 as siguiente FROM criterios_aceptacion WHERE requerimiento_id = %s",
+            (requerimiento_id,)
+        )
+        siguiente_orden = cursor.fetchone()['siguiente']
 
-    criterio_id = cursor.lastrowid
+        cursor.execute("""
+            INSERT INTO criterios_aceptacion (requerimiento_id, descripcion, orden)
+            VALUES (%s, %s, %s)
+        """, (requerimiento_id, data['descripcion'], siguiente_orden))
 
-    cursor.execute("SELECT * FROM criterios_aceptacion WHERE id = %s", (criterio_id,))
-    criterio = cursor.fetchone()
+        criterio_id = cursor.lastrowid
 
-    if criterio.get('fecha_creacion'):
-        criterio['fecha_creacion'] = criterio['fecha_creacion'].isoformat()
+        cursor.execute("SELECT * FROM criterios_aceptacion WHERE id = %s", (criterio_id,))
+        criterio = cursor.fetchone()
 
-    cursor.close()
-    conn.close()
+        registrar(cursor, proyecto_de_requerimiento(cursor, requerimiento_id), deltas_criterio(criterio))
 
     return jsonify({
         'message': 'Criterio agregado',
@@ -363,16 +564,8 @@ def agregar_criterio(requerimiento_id):
 
 @requerimientos_bp.route('/criterios/<int:id>', methods=['PUT'])
 @jwt_required()
+@requires_project_member(entidad='criterio')
 def actualizar_criterio(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("SELECT id FROM criterios_aceptacion WHERE id = %s", (id,))
-    if not cursor.fetchone():
-        cursor.close()
-        conn.close()
-        return jsonify({'error': 'Criterio no encontrado'}), 404
-
     data = request.get_json()
 
     updates = []
@@ -388,19 +581,29 @@ def actualizar_criterio(id):
         updates.append("orden = %s")
         values.append(data['orden'])
 
-    if updates:
-        values.append(id)
-        cursor.execute(f"UPDATE criterios_aceptacion SET {', '.join(updates)} WHERE id = %s", values)
-        conn.commit()
+    with transaccion() as cursor:
+        anterior = None
+        if 'cumplido' in data:
+            anterior = estado_criterio(cursor, id)
+            if not anterior:
+                return jsonify({'error': 'Criterio no encontrado'}), 404
 
-    cursor.execute("SELECT * FROM criterios_aceptacion WHERE id = %s", (id,))
-    criterio = cursor.fetchone()
+        if updates:
+            values.append(id)
+            cursor.execute(f"UPDATE criterios_aceptacion SET {', '.join(updates)} WHERE id = %s", values)
+            if cursor.rowcount == 0:
+                return jsonify({'error': 'Criterio no encontrado'}), 404
+            tocar_requerimiento_de_criterio(cursor, id)
 
-    if criterio.get('fecha_creacion'):
-        criterio['fecha_creacion'] = criterio['fecha_creacion'].isoformat()
+        cursor.execute("SELECT * FROM criterios_aceptacion WHERE id = %s", (id,))
+        criterio = cursor.fetchone()
 
-    cursor.close()
-    conn.close()
+        if anterior and criterio:
+            registrar(cursor, anterior['proyecto_id'],
+                      sumar(deltas_criterio(anterior, -1), deltas_criterio(criterio)))
+
+    if not criterio:
+        return jsonify({'error': 'Criterio no encontrado'}), 404
 
     return jsonify({
         'message': 'Criterio actualizado',
@@ -410,20 +613,15 @@ def actualizar_criterio(id):
 
 @requerimientos_bp.route('/criterios/<int:id>', methods=['DELETE'])
 @jwt_required()
+@requires_project_member(entidad='criterio')
 def eliminar_criterio(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("SELECT id FROM criterios_aceptacion WHERE id = %s", (id,))
-    if not cursor.fetchone():
-        cursor.close()
-        conn.close()
-        return jsonify({'error': 'Criterio no encontrado'}), 404
-
-    cursor.execute("DELETE FROM criterios_aceptacion WHERE id = %s", (id,))
-    conn.commit()
-
-    cursor.close()
-    conn.close()
+    with transaccion() as cursor:
+        anterior = estado_criterio(cursor, id)
+        if not anterior:
+            return jsonify({'error': 'Criterio no encontrado'}), 404
+
+        tocar_requerimiento_de_criterio(cursor, id)
+        cursor.execute("DELETE FROM criterios_aceptacion WHERE id = %s", (id,))
+        registrar(cursor, anterior['proyecto_id'], deltas_criterio(anterior, -1))
 
     return jsonify({'message': 'Criterio eliminado'}), 200
@@ -1,40 +1,44 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
-from extensions import get_db_connection
+from acceso import requires_project_member
+from catalogo import catalogo
+from extensions import get_db_connection, transaccion
 
 roles_bp = Blueprint('roles', __name__)
 
 
 @roles_bp.route('', methods=['GET'])
 @jwt_required()
+@requires_project_member()
 def listar_roles():
     proyecto_id = request.args.get('proyecto_id', type=int)
     
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    roles = catalogo.roles_fijos()
     
+    # Los roles fijos salen del catalogo; solo los propios del proyecto van a la base.
     if proyecto_id:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        
         cursor.execute("""
-            SELECT * FROM roles WHERE es_fijo = TRUE OR proyecto_id = %s
+            SELECT * FROM roles WHERE proyecto_id = %s AND es_fijo = FALSE
         """, (proyecto_id,))
-    else:
-        cursor.execute("SELECT * FROM roles WHERE es_fijo = TRUE")
-    
-    roles = cursor.fetchall()
-    
-    cursor.close()
-    conn.close()
-    
-    for r in roles:
-        if r.get('fecha_creacion'):
-            r['fecha_creacion'] = r['fecha_creacion'].isoformat()
+        roles += cursor.fetchall()
+        
+        cursor.close()
+        conn.close()
     
     return jsonify(roles), 200
 
 
 @roles_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
+@requires_project_member(entidad='rol')
 def obtener_rol(id):
+    rol = catalogo.rol_fijo(id)
+    if rol:
+        return jsonify(rol), 200
+    
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     
@@ -47,14 +51,12 @@ def obtener_rol(id):
     if not rol:
         return jsonify({'error': 'Rol no encontrado'}), 404
     
-    if rol.get('fecha_creacion'):
-        rol['fecha_creacion'] = rol['fecha_creacion'].isoformat()
-    
     return jsonify(rol), 200
 
 
 @roles_bp.route('', methods=['POST'])
 @jwt_required()
+@requires_project_member()
 def crear_rol():
     data = request.get_json()
     
@@ -64,25 +66,16 @@ def crear_rol():
     if not data.get('proyecto_id'):
         return jsonify({'error': 'El proyecto_id es requerido'}), 400
     
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("""
-        INSERT INTO roles (proyecto_id, nombre, descripcion, es_fijo)
-        VALUES (%s, %s, %s, FALSE)
-    """, (data['proyecto_id'], data['nombre'], data.get('descripcion')))
-    conn.commit()
-    
-    rol_id = cursor.lastrowid
-    
-    cursor.execute("SELECT * FROM roles WHERE id = %s", (rol_id,))
-    rol = cursor.fetchone()
-    
-    cursor.close()
-    conn.close()
-    
-    if rol.get('fecha_creacion'):
-        rol['fecha_creacion'] = rol['fecha_creacion'].isoformat()
+    with transaccion() as cursor:
+        cursor.execute("""
+            INSERT INTO roles (proyecto_id, nombre, descripcion, es_fijo)
+            VALUES (%s, %s, %s, FALSE)
+        """, (data['proyecto_id'], data['nombre'], data.get('descripcion')))
+        
+        rol_id = cursor.lastrowid
+        
+        cursor.execute("SELECT * FROM roles WHERE id = %s", (rol_id,))
+        rol = cursor.fetchone()
     
     return jsonify({
         'message': 'Rol creado',
@@ -92,21 +85,9 @@ def crear_rol():
 
 @roles_bp.route('/<int:id>', methods=['PUT'])
 @jwt_required()
+@requires_project_member(entidad='rol')
 def actualizar_rol(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("SELECT * FROM roles WHERE id = %s", (id,))
-    rol = cursor.fetchone()
-    
-    if not rol:
-        cursor.close()
-        conn.close()
-        return jsonify({'error': 'Rol no encontrado'}), 404
-    
-    if rol['es_fijo']:
-        cursor.close()
-        conn.close()
+    if catalogo.rol_fijo(id):
         return jsonify({'error': 'No se pueden modificar roles fijos'}), 403
     
     data = request.get_json()
@@ -121,19 +102,18 @@ def actualizar_rol(id):
         updates.append("descripcion = %s")
         values.append(data['descripcion'])
     
-    if updates:
-        values.append(id)
-        cursor.execute(f"UPDATE roles SET {', '.join(updates)} WHERE id = %s", values)
-        conn.commit()
-    
-    cursor.execute("SELECT * FROM roles WHERE id = %s", (id,))
-    rol = cursor.fetchone()
+    with transaccion() as cursor:
+        if updates:
+            values.append(id)
+            cursor.execute(f"UPDATE roles SET {', '.join(updates)} WHERE id = %s AND es_fijo = FALSE", values)
+            if cursor.rowcount == 0:
+                return jsonify({'error': 'Rol no encontrado'}), 404
+        
+        cursor.execute("SELECT * FROM roles WHERE id = %s", (id,))
+        rol = cursor.fetchone()
     
-    cursor.close()
-    conn.close()
-    
-    if rol.get('fecha_creacion'):
-        rol['fecha_creacion'] = rol['fecha_creacion'].isoformat()
+    if not rol:
+        return jsonify({'error': 'Rol no encontrado'}), 404
     
     return jsonify({
         'message': 'Rol actualizado',
@@ -143,27 +123,16 @@ def actualizar_rol(id):
 
 @roles_bp.route('/<int:id>', methods=['DELETE'])
 @jwt_required()
+@requires_project_member(entidad='rol')
 def eliminar_rol(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("SELECT * FROM roles WHERE id = %s", (id,))
-    rol = cursor.fetchone()
-    
-    if not rol:
-        cursor.close()
-        conn.close()
-        return jsonify({'error': 'Rol no encontrado'}), 404
-    
-    if rol['es_fijo']:
-        cursor.close()
-        conn.close()
+    if catalogo.rol_fijo(id):
         return jsonify({'error': 'No se pueden eliminar roles fijos'}), 403
     
-    cursor.execute("DELETE FROM roles WHERE id = %s", (id,))
-    conn.commit()
+    with transaccion() as cursor:
+        cursor.execute("DELETE FROM roles WHERE id = %s AND es_fijo = FALSE", (id,))
+        eliminados = cursor.rowcount
     
-    cursor.close()
-    conn.close()
+    if not eliminados:
+        return jsonify({'error': 'Rol no encontrado'}), 404
     
     return jsonify({'message': 'Rol eliminado'}), 200
@@ -0,0 +1,129 @@
+import json
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+from mysql.connector import FieldType
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+Anidado = namedtuple('Anidado', ['clave', 'id_col', 'campos', 'opcional'])
+
+
+# campos: clave del objeto anidado -> columna de la fila. Las columnas usadas
+# (salvo id_col) se quitan del nivel superior.
+def anidado(clave, id_col, opcional=False, **campos):
+    return Anidado(clave, id_col, tuple(campos.items()), opcional)
+
+
+def _cargar_json(valor):
+    if isinstance(valor, (str, bytes, bytearray)):
+        return json.loads(valor)
+    return valor
+
+
+_CONVERSORES = {
+    FieldType.JSON: _cargar_json,
+}
+
+_planes = {}
+
+
+def _compilar(description, anidados):
+    clave = (tuple((col[0], col[1]) for col in description), anidados)
+    plan = _planes.get(clave)
+    if plan is not None:
+        return plan
+
+    conversiones = tuple(
+        (col[0], _CONVERSORES[col[1]])
+        for col in description
+        if col[1] in _CONVERSORES
+    )
+    eliminados = tuple({
+        columna
+        for a in anidados
+        for _, columna in a.campos
+        if columna != a.id_col
+    })
+    plan = (conversiones, eliminados, anidados)
+    _planes[clave] = plan
+    return plan
+
+
+def _aplicar(plan, fila):
+    conversiones, eliminados, anidados = plan
+
+    for nombre, conversor in conversiones:
+        valor = fila[nombre]
+        if valor is not None:
+            fila[nombre] = conversor(valor)
+
+    for a in anidados:
+        if a.opcional and not fila.get(a.id_col):
+            fila[a.clave] = None
+        else:
+            fila[a.clave] = {k: fila[columna] for k, columna in a.campos}
+
+    for columna in eliminados:
+        del fila[columna]
+
+    return fila
+
+
+def serializar(cursor, filas, anidados=()):
+    if not filas:
+        return filas
+    plan = _compilar(cursor.description, tuple(anidados))
+    for fila in filas:
+        _aplicar(plan, fila)
+    return filas
+
+
+def serializar_fila(cursor, fila, anidados=()):
+    if fila is None:
+        return None
+    return _aplicar(_compilar(cursor.description, tuple(anidados)), fila)
+
+
+class GestproyJSONProvider(DefaultJSONProvider):
+    @staticmethod
+    def default(o):
+        if isinstance(o, (datetime, date, time)):
+            return o.isoformat()
+        if isinstance(o, Decimal):
+            return float(o)
+        if isinstance(o, timedelta):
+            return o.total_seconds()
+        return DefaultJSONProvider.default(o)
+
+
+class OrjsonJSONProvider(GestproyJSONProvider):
+    def dumps(self, obj, **kwargs):
+        return self._dumps_bytes(obj, kwargs.pop('indent', None)).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def _dumps_bytes(self, obj, indent=None):
+        opciones = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            opciones |= orjson.OPT_SORT_KEYS
+        if indent:
+            opciones |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=opciones)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if self.compact is False or (self.compact is None and self._app.debug) else None
+        return self._app.response_class(self._dumps_bytes(obj, indent), mimetype=self.mimetype)
+
+
+def crear_json_provider(app):
+    if app.config.get('JSON_USE_ORJSON') and orjson is not None:
+        return OrjsonJSONProvider(app)
+    return GestproyJSONProvider(app)
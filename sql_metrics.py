@@ -0,0 +1,183 @@
+import heapq
+import json
+import logging
+import time
+
+from flask import current_app, g, has_app_context, request
+
+logger = logging.getLogger('gestproy.sql')
+
+
+class MetricasSQL:
+    def __init__(self, umbral_lento_ms, max_lentas=5):
+        self.consultas = 0
+        self.tiempo = 0.0
+        self.filas = 0
+        self.umbral_lento = umbral_lento_ms / 1000
+        self.max_lentas = max_lentas
+        self._lentas = []
+
+    def registrar(self, sql, params, duracion, muchos=False):
+        self.consultas += 1
+        self.tiempo += duracion
+        if duracion < self.umbral_lento:
+            return
+        entrada = (duracion, self.consultas, _compactar(sql), _forma(params, muchos))
+        if len(self._lentas) < self.max_lentas:
+            heapq.heappush(self._lentas, entrada)
+        else:
+            heapq.heappushpop(self._lentas, entrada)
+
+    @property
+    def lentas(self):
+        return [
+            {'ms': round(d * 1000, 2), 'sql': sql, 'params': forma}
+            for d, _, sql, forma in sorted(self._lentas, reverse=True)
+        ]
+
+
+def _compactar(sql, limite=500):
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', 'replace')
+    sql = ' '.join(sql.split())
+    return sql if len(sql) <= limite else sql[:limite] + '...'
+
+
+# Solo se registra la forma de los parametros (tipos y cantidad), nunca los valores.
+def _forma(params, muchos=False):
+    if params is None:
+        return None
+    if muchos:
+        params = list(params)
+        return {'filas': len(params), 'forma': _forma(params[0]) if params else None}
+    if isinstance(params, dict):
+        return {k: type(v).__name__ for k, v in params.items()}
+    return [type(v).__name__ for v in params]
+
+
+def metricas_actuales():
+    if not has_app_context():
+        return None
+    metricas = g.get('sql_metricas')
+    if metricas is None:
+        if not current_app.config['SQL_METRICS_ENABLED']:
+            return None
+        metricas = MetricasSQL(current_app.config['SQL_SLOW_QUERY_MS'])
+        g.sql_metricas = metricas
+    return metricas
+
+
+class CursorInstrumentado:
+    def __init__(self, cursor, metricas):
+        self._cursor = cursor
+        self._metricas = metricas
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        for fila in self._cursor:
+            self._metricas.filas += 1
+            yield fila
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, params, *args, **kwargs)
+        finally:
+            self._metricas.registrar(sql, params, time.perf_counter() - inicio)
+
+    def executemany(self, sql, seq_params, *args, **kwargs):
+        seq_params = list(seq_params)
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, seq_params, *args, **kwargs)
+        finally:
+            self._metricas.registrar(sql, seq_params, time.perf_counter() - inicio, muchos=True)
+
+    def fetchone(self):
+        fila = self._cursor.fetchone()
+        if fila is not None:
+            self._metricas.filas += 1
+        return fila
+
+    def fetchmany(self, *args, **kwargs):
+        filas = self._cursor.fetchmany(*args, **kwargs)
+        self._metricas.filas += len(filas)
+        return filas
+
+    def fetchall(self):
+        filas = self._cursor.fetchall()
+        self._metricas.filas += len(filas)
+        return filas
+
+
+# Variante para los cursores de aiomysql que usa el modo ASGI (asgi.py).
+class CursorAsincronoInstrumentado:
+    def __init__(self, cursor, metricas):
+        self._cursor = cursor
+        self._metricas = metricas
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    async def execute(self, sql, params=None):
+        inicio = time.perf_counter()
+        try:
+            return await self._cursor.execute(sql, params)
+        finally:
+            self._metricas.registrar(sql, params, time.perf_counter() - inicio)
+
+    async def fetchone(self):
+        fila = await self._cursor.fetchone()
+        if fila is not None:
+            self._metricas.filas += 1
+        return fila
+
+    async def fetchall(self):
+        filas = await self._cursor.fetchall()
+        self._metricas.filas += len(filas)
+        return filas
+
+
+def instrumentar_cursor(cursor):
+    metricas = metricas_actuales()
+    if metricas is None:
+        return cursor
+    return CursorInstrumentado(cursor, metricas)
+
+
+def instrumentar_cursor_asincrono(cursor):
+    metricas = metricas_actuales()
+    if metricas is None:
+        return cursor
+    return CursorAsincronoInstrumentado(cursor, metricas)
+
+
+def registrar_respuesta(response):
+    metricas = g.get('sql_metricas')
+    if metricas is None:
+        return response
+
+    db_ms = round(metricas.tiempo * 1000, 2)
+    response.headers.add(
+        'Server-Timing',
+        f'db;dur={db_ms};desc="{metricas.consultas} queries, {metricas.filas} rows"'
+    )
+
+    registro = {
+        'metodo': request.method,
+        'ruta': request.path,
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        'consultas': metricas.consultas,
+        'db_ms': db_ms,
+        'filas': metricas.filas,
+    }
+    lentas = metricas.lentas
+    if lentas:
+        registro['lentas'] = lentas
+        logger.warning(json.dumps(registro, ensure_ascii=False))
+    else:
+        logger.info(json.dumps(registro, ensure_ascii=False))
+    return response
@@ -1,31 +1,42 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
-from extensions import get_db_connection
+from acceso import requires_project_member
+from extensions import get_db_connection, transaccion
+from pagination import Pagina
 
 stakeholders_bp = Blueprint('stakeholders', __name__)
 
+CAMPOS_STAKEHOLDER = {c: c for c in [
+    'id', 'proyecto_id', 'nombre_completo', 'correo', 'telefono', 'organizacion', 'cargo',
+    'tipo', 'nivel_influencia_interes', 'notas', 'fecha_creacion'
+]}
+
 
 @stakeholders_bp.route('/proyecto/<int:proyecto_id>', methods=['GET'])
 @jwt_required()
+@requires_project_member()
 def listar_stakeholders(proyecto_id):
+    pagina = Pagina(CAMPOS_STAKEHOLDER)
+    filtro, params = pagina.filtro()
+    
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     
-    cursor.execute("SELECT * FROM stakeholders WHERE proyecto_id = %s", (proyecto_id,))
+    cursor.execute(
+        f"SELECT {pagina.select()} FROM stakeholders WHERE proyecto_id = %s{filtro}{pagina.orden_y_limite()}",
+        (proyecto_id,) + params
+    )
     stakeholders = cursor.fetchall()
     
     cursor.close()
     conn.close()
     
-    for s in stakeholders:
-        if s.get('fecha_creacion'):
-            s['fecha_creacion'] = s['fecha_creacion'].isoformat()
-    
-    return jsonify(stakeholders), 200
+    return pagina.respuesta(stakeholders)
 
 
 @stakeholders_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
+@requires_project_member(entidad='stakeholder')
 def obtener_stakeholder(id):
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -39,14 +50,12 @@ def obtener_stakeholder(id):
     if not stakeholder:
         return jsonify({'error': 'Stakeholder no encontrado'}), 404
     
-    if stakeholder.get('fecha_creacion'):
-        stakeholder['fecha_creacion'] = stakeholder['fecha_creacion'].isoformat()
-    
     return jsonify(stakeholder), 200
 
 
 @stakeholders_bp.route('', methods=['POST'])
 @jwt_required()
+@requires_project_member()
 def crear_stakeholder():
     data = request.get_json()
     
@@ -55,35 +64,26 @@ def crear_stakeholder():
         if not data.get(field):
             return jsonify({'error': f'El campo {field} es requerido'}), 400
     
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("""
-        INSERT INTO stakeholders (proyecto_id, nombre_completo, correo, telefono, organizacion, cargo, tipo, nivel_influencia_interes, notas)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """, (
-        data['proyecto_id'],
-        data['nombre_completo'],
-        data.get('correo'),
-        data.get('telefono'),
-        data.get('organizacion'),
-        data.get('cargo'),
-        data['tipo'],
-        data['nivel_influencia_interes'],
-        data.get('notas')
-    ))
-    conn.commit()
-    
-    stakeholder_id = cursor.lastrowid
-    
-    cursor.execute("SELECT * FROM stakeholders WHERE id = %s", (stakeholder_id,))
-    stakeholder = cursor.fetchone()
-    
-    cursor.close()
-    conn.close()
-    
-    if stakeholder.get('fecha_creacion'):
-        stakeholder['fecha_creacion'] = stakeholder['fecha_creacion'].isoformat()
+    with transaccion() as cursor:
+        cursor.execute("""
+            INSERT INTO stakeholders (proyecto_id, nombre_completo, correo, telefono, organizacion, cargo, tipo, nivel_influencia_interes, notas)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, (
+            data['proyecto_id'],
+            data['nombre_completo'],
+            data.get('correo'),
+            data.get('telefono'),
+            data.get('organizacion'),
+            data.get('cargo'),
+            data['tipo'],
+            data['nivel_influencia_interes'],
+            data.get('notas')
+        ))
+        
+        stakeholder_id = cursor.lastrowid
+        
+        cursor.execute("SELECT * FROM stakeholders WHERE id = %s", (stakeholder_id,))
+        stakeholder = cursor.fetchone()
     
     return jsonify({
         'message': 'Stakeholder creado',
@@ -93,16 +93,8 @@ def crear_stakeholder():
 
 @stakeholders_bp.route('/<int:id>', methods=['PUT'])
 @jwt_required()
+@requires_project_member(entidad='stakeholder')
 def actualizar_stakeholder(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("SELECT id FROM stakeholders WHERE id = %s", (id,))
-    if not cursor.fetchone():
-        cursor.close()
-        conn.close()
-        return jsonify({'error': 'Stakeholder no encontrado'}), 404
-    
     data = request.get_json()
     
     updates = []
@@ -115,19 +107,18 @@ def actualizar_stakeholder(id):
             updates.append(f"{campo} = %s")
             values.append(data[campo])
     
-    if updates:
-        values.append(id)
-        cursor.execute(f"UPDATE stakeholders SET {', '.join(updates)} WHERE id = %s", values)
-        conn.commit()
-    
-    cursor.execute("SELECT * FROM stakeholders WHERE id = %s", (id,))
-    stakeholder = cursor.fetchone()
-    
-    cursor.close()
-    conn.close()
+    with transaccion() as cursor:
+        if updates:
+            values.append(id)
+            cursor.execute(f"UPDATE stakeholders SET {', '.join(updates)} WHERE id = %s", values)
+            if cursor.rowcount == 0:
+                return jsonify({'error': 'Stakeholder no encontrado'}), 404
+        
+        cursor.execute("SELECT * FROM stakeholders WHERE id = %s", (id,))
+        stakeholder = cursor.fetchone()
     
-    if stakeholder.get('fecha_creacion'):
-        stakeholder['fecha_creacion'] = stakeholder['fecha_creacion'].isoformat()
+    if not stakeholder:
+        return jsonify({'error': 'Stakeholder no encontrado'}), 404
     
     return jsonify({
         'message': 'Stakeholder actualizado',
@@ -137,20 +128,13 @@ def actualizar_stakeholder(id):
 
 @stakeholders_bp.route('/<int:id>', methods=['DELETE'])
 @jwt_required()
+@requires_project_member(entidad='stakeholder')
 def eliminar_stakeholder(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    with transaccion() as cursor:
+        cursor.execute("DELETE FROM stakeholders WHERE id = %s", (id,))
+        eliminados = cursor.rowcount
     
-    cursor.execute("SELECT id FROM stakeholders WHERE id = %s", (id,))
-    if not cursor.fetchone():
-        cursor.close()
-        conn.close()
+    if not eliminados:
         return jsonify({'error': 'Stakeholder no encontrado'}), 404
     
-    cursor.execute("DELETE FROM stakeholders WHERE id = %s", (id,))
-    conn.commit()
-    
-    cursor.close()
-    conn.close()
-    
     return jsonify({'message': 'Stakeholder eliminado'}), 200
@@ -0,0 +1,47 @@
+from flask import current_app, request, stream_with_context
+
+from serializers import serializar
+
+
+def stream_solicitado():
+    return request.args.get('stream', '').lower() in ('1', 'true')
+
+
+def leer_lotes(cursor, tamano_lote, anidados=()):
+    while True:
+        lote = cursor.fetchmany(tamano_lote)
+        if not lote:
+            return
+        yield serializar(cursor, lote, anidados)
+
+
+# Emite un arreglo JSON elemento a elemento a medida que llegan los lotes, de
+# modo que nunca se tienen todas las filas en memoria. Por defecto los lotes
+# salen del cursor (sin buffer) con fetchmany; lotes(tamano_lote) permite
+# producirlos de otra forma, p. ej. si entre lote y lote hay que consultar por
+# la misma conexion. Con pagina, cada lote se proyecta segun fields igual que
+# en la respuesta sin stream.
+def respuesta_json_stream(conn, cursor, anidados=(), lotes=None, tamano_lote=None, pagina=None):
+    tamano_lote = tamano_lote or current_app.config['JSON_STREAM_BATCH_SIZE']
+    dumps = current_app.json.dumps
+    lotes = lotes or (lambda tamano: leer_lotes(cursor, tamano, anidados))
+
+    def generar():
+        try:
+            yield '['
+            primero = True
+            for lote in lotes(tamano_lote):
+                if pagina is not None:
+                    pagina.proyectar(lote)
+                for fila in lote:
+                    if primero:
+                        primero = False
+                        yield dumps(fila)
+                    else:
+                        yield ',' + dumps(fila)
+            yield ']'
+        finally:
+            cursor.close()
+            conn.close()
+
+    return current_app.response_class(stream_with_context(generar()), mimetype='application/json')
@@ -1,12 +1,18 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
-from extensions import get_db_connection
+from acceso import requires_project_member
+from estadisticas import proyecto_de_subproceso_tecnica, recalcular
+from extensions import get_db_connection, transaccion
+from serializers import anidado, serializar, serializar_fila
 
 subproceso_tecnicas_bp = Blueprint('subproceso_tecnicas', __name__)
 
+TECNICA = anidado('tecnica', 'tecnica_id', id='tecnica_id', nombre='tecnica_nombre', categoria='tecnica_categoria')
+
 
 @subproceso_tecnicas_bp.route('/subproceso/<int:subproceso_id>', methods=['GET'])
 @jwt_required()
+@requires_project_member(entidad='subproceso', arg='subproceso_id')
 def listar_tecnicas_subproceso(subproceso_id):
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -18,31 +24,17 @@ def listar_tecnicas_subproceso(subproceso_id):
         WHERE st.subproceso_id = %s
     """, (subproceso_id,))
     
-    asignaciones = cursor.fetchall()
+    asignaciones = serializar(cursor, cursor.fetchall(), (TECNICA,))
     
     cursor.close()
     conn.close()
     
-    result = []
-    for a in asignaciones:
-        result.append({
-            'id': a['id'],
-            'subproceso_id': a['subproceso_id'],
-            'tecnica_id': a['tecnica_id'],
-            'notas': a['notas'],
-            'fecha_asignacion': a['fecha_asignacion'].isoformat() if a.get('fecha_asignacion') else None,
-            'tecnica': {
-                'id': a['tecnica_id'],
-                'nombre': a['tecnica_nombre'],
-                'categoria': a['tecnica_categoria']
-            }
-        })
-    
-    return jsonify(result), 200
+    return jsonify(asignaciones), 200
 
 
 @subproceso_tecnicas_bp.route('', methods=['POST'])
 @jwt_required()
+@requires_project_member(entidad='subproceso', arg='subproceso_id')
 def asignar_tecnica():
     data = request.get_json()
     
@@ -52,50 +44,29 @@ def asignar_tecnica():
     if not data.get('tecnica_id'):
         return jsonify({'error': 'El tecnica_id es requerido'}), 400
     
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("""
-        SELECT id FROM subproceso_tecnicas WHERE subproceso_id = %s AND tecnica_id = %s
-    """, (data['subproceso_id'], data['tecnica_id']))
-    
-    if cursor.fetchone():
-        cursor.close()
-        conn.close()
-        return jsonify({'error': 'La tecnica ya esta asignada a este subproceso'}), 400
-    
-    cursor.execute("""
-        INSERT INTO subproceso_tecnicas (subproceso_id, tecnica_id, notas)
-        VALUES (%s, %s, %s)
-    """, (data['subproceso_id'], data['tecnica_id'], data.get('notas')))
-    conn.commit()
-    
-    asignacion_id = cursor.lastrowid
-    
-    cursor.execute("""
-        SELECT st.*, t.nombre as tecnica_nombre, t.categoria as tecnica_categoria
-        FROM subproceso_tecnicas st
-        JOIN tecnicas t ON st.tecnica_id = t.id
-        WHERE st.id = %s
-    """, (asignacion_id,))
-    
-    a = cursor.fetchone()
-    
-    cursor.close()
-    conn.close()
-    
-    asignacion = {
-        'id': a['id'],
-        'subproceso_id': a['subproceso_id'],
-        'tecnica_id': a['tecnica_id'],
-        'notas': a['notas'],
-        'fecha_asignacion': a['fecha_asignacion'].isoformat() if a.get('fecha_asignacion') else None,
-        'tecnica': {
-            'id': a['tecnica_id'],
-            'nombre': a['tecnica_nombre'],
-            'categoria': a['tecnica_categoria']
-        }
-    }
+    with transaccion() as cursor:
+        cursor.execute("""
+            SELECT id FROM subproceso_tecnicas WHERE subproceso_id = %s AND tecnica_id = %s
+        """, (data['subproceso_id'], data['tecnica_id']))
+        
+        if cursor.fetchone():
+            return jsonify({'error': 'La tecnica ya esta asignada a este subproceso'}), 400
+        
+        cursor.execute("""
+            INSERT INTO subproceso_tecnicas (subproceso_id, tecnica_id, notas)
+            VALUES (%s, %s, %s)
+        """, (data['subproceso_id'], data['tecnica_id'], data.get('notas')))
+        
+        asignacion_id = cursor.lastrowid
+        
+        cursor.execute("""
+            SELECT st.*, t.nombre as tecnica_nombre, t.categoria as tecnica_categoria
+            FROM subproceso_tecnicas st
+            JOIN tecnicas t ON st.tecnica_id = t.id
+            WHERE st.id = %s
+        """, (asignacion_id,))
+        
+        asignacion = serializar_fila(cursor, cursor.fetchone(), (TECNICA,))
     
     return jsonify({
         'message': 'Tecnica asignada',
@@ -105,46 +76,27 @@ def asignar_tecnica():
 
 @subproceso_tecnicas_bp.route('/<int:id>', methods=['PUT'])
 @jwt_required()
+@requires_project_member(entidad='subproceso_tecnica')
 def actualizar_asignacion(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("SELECT id FROM subproceso_tecnicas WHERE id = %s", (id,))
-    if not cursor.fetchone():
-        cursor.close()
-        conn.close()
-        return jsonify({'error': 'Asignacion no encontrada'}), 404
-    
     data = request.get_json()
     
-    if 'notas' in data:
-        cursor.execute("UPDATE subproceso_tecnicas SET notas = %s WHERE id = %s", (data['notas'], id))
-        conn.commit()
-    
-    cursor.execute("""
-        SELECT st.*, t.nombre as tecnica_nombre, t.categoria as tecnica_categoria
-        FROM subproceso_tecnicas st
-        JOIN tecnicas t ON st.tecnica_id = t.id
-        WHERE st.id = %s
-    """, (id,))
-    
-    a = cursor.fetchone()
-    
-    cursor.close()
-    conn.close()
-    
-    asignacion = {
-        'id': a['id'],
-        'subproceso_id': a['subproceso_id'],
-        'tecnica_id': a['tecnica_id'],
-        'notas': a['notas'],
-        'fecha_asignacion': a['fecha_asignacion'].isoformat() if a.get('fecha_asignacion') else None,
-        'tecnica': {
-            'id': a['tecnica_id'],
-            'nombre': a['tecnica_nombre'],
-            'categoria': a['tecnica_categoria']
-        }
-    }
+    with transaccion() as cursor:
+        if 'notas' in data:
+            cursor.execute("UPDATE subproceso_tecnicas SET notas = %s WHERE id = %s", (data['notas'], id))
+            if cursor.rowcount == 0:
+                return jsonify({'error': 'Asignacion no encontrada'}), 404
+        
+        cursor.execute("""
+            SELECT st.*, t.nombre as tecnica_nombre, t.categoria as tecnica_categoria
+            FROM subproceso_tecnicas st
+            JOIN tecnicas t ON st.tecnica_id = t.id
+            WHERE st.id = %s
+        """, (id,))
+        
+        asignacion = serializar_fila(cursor, cursor.fetchone(), (TECNICA,))
+    
+    if not asignacion:
+        return jsonify({'error': 'Asignacion no encontrada'}), 404
     
     return jsonify({
         'message': 'Asignacion actualizada',
@@ -154,20 +106,16 @@ def actualizar_asignacion(id):
 
 @subproceso_tecnicas_bp.route('/<int:id>', methods=['DELETE'])
 @jwt_required()
+@requires_project_member(entidad='subproceso_tecnica')
 def eliminar_asignacion(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("SELECT id FROM subproceso_tecnicas WHERE id = %s", (id,))
-    if not cursor.fetchone():
-        cursor.close()
-        conn.close()
+    with transaccion() as cursor:
+        proyecto_id = proyecto_de_subproceso_tecnica(cursor, id)
+        cursor.execute("DELETE FROM subproceso_tecnicas WHERE id = %s", (id,))
+        eliminados = cursor.rowcount
+        if eliminados:
+            recalcular(cursor, proyecto_id)
+    
+    if not eliminados:
         return jsonify({'error': 'Asignacion no encontrada'}), 404
     
-    cursor.execute("DELETE FROM subproceso_tecnicas WHERE id = %s", (id,))
-    conn.commit()
-    
-    cursor.close()
-    conn.close()
-    
     return jsonify({'message': 'Asignacion eliminada'}), 200
@@ -1,12 +1,19 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
-from extensions import get_db_connection
+from acceso import requires_project_member
+from estadisticas import DESDE_SUBPROCESOS, deltas_subproceso, proyecto_de_proceso, recalcular, registrar, sumar
+from extensions import get_db_connection, transaccion
+from serializers import anidado, serializar, serializar_fila
 
 subprocesos_bp = Blueprint('subprocesos', __name__)
 
+RESPONSABLE = anidado('responsable', 'responsable_id', opcional=True,
+                      id='responsable_id', nombre='responsable_nombre', apellido='responsable_apellido')
+
 
 @subprocesos_bp.route('/proceso/<int:proceso_id>', methods=['GET'])
 @jwt_required()
+@requires_project_member(entidad='proceso', arg='proceso_id')
 def listar_subprocesos(proceso_id):
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -18,35 +25,17 @@ def listar_subprocesos(proceso_id):
         WHERE s.proceso_id = %s
     """, (proceso_id,))
     
-    subprocesos = cursor.fetchall()
+    subprocesos = serializar(cursor, cursor.fetchall(), (RESPONSABLE,))
     
     cursor.close()
     conn.close()
     
-    result = []
-    for s in subprocesos:
-        result.append({
-            'id': s['id'],
-            'proceso_id': s['proceso_id'],
-            'nombre': s['nombre'],
-            'descripcion': s['descripcion'],
-            'responsable_id': s['responsable_id'],
-            'estado': s['estado'],
-            'horas_estimadas': float(s['horas_estimadas']) if s.get('horas_estimadas') else None,
-            'fecha_creacion': s['fecha_creacion'].isoformat() if s.get('fecha_creacion') else None,
-            'fecha_actualizacion': s['fecha_actualizacion'].isoformat() if s.get('fecha_actualizacion') else None,
-            'responsable': {
-                'id': s['responsable_id'],
-                'nombre': s['responsable_nombre'],
-                'apellido': s['responsable_apellido']
-            } if s.get('responsable_id') else None
-        })
-    
-    return jsonify(result), 200
+    return jsonify(subprocesos), 200
 
 
 @subprocesos_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
+@requires_project_member(entidad='subproceso')
 def obtener_subproceso(id):
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -58,36 +47,20 @@ def obtener_subproceso(id):
         WHERE s.id = %s
     """, (id,))
     
-    s = cursor.fetchone()
+    subproceso = serializar_fila(cursor, cursor.fetchone(), (RESPONSABLE,))
     
     cursor.close()
     conn.close()
     
-    if not s:
+    if not subproceso:
         return jsonify({'error': 'Subproceso no encontrado'}), 404
     
-    subproceso = {
-        'id': s['id'],
-        'proceso_id': s['proceso_id'],
-        'nombre': s['nombre'],
-        'descripcion': s['descripcion'],
-        'responsable_id': s['responsable_id'],
-        'estado': s['estado'],
-        'horas_estimadas': float(s['horas_estimadas']) if s.get('horas_estimadas') else None,
-        'fecha_creacion': s['fecha_creacion'].isoformat() if s.get('fecha_creacion') else None,
-        'fecha_actualizacion': s['fecha_actualizacion'].isoformat() if s.get('fecha_actualizacion') else None,
-        'responsable': {
-            'id': s['responsable_id'],
-            'nombre': s['responsable_nombre'],
-            'apellido': s['responsable_apellido']
-        } if s.get('responsable_id') else None
-    }
-    
     return jsonify(subproceso), 200
 
 
 @subprocesos_bp.route('', methods=['POST'])
 @jwt_required()
+@requires_project_member(entidad='proceso', arg='proceso_id')
 def crear_subproceso():
     data = request.get_json()
     
@@ -97,52 +70,34 @@ def crear_subproceso():
     if not data.get('nombre'):
         return jsonify({'error': 'El nombre es requerido'}), 400
     
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("""
-        INSERT INTO subprocesos (proceso_id, nombre, descripcion, responsable_id, estado, horas_estimadas)
-        VALUES (%s, %s, %s, %s, %s, %s)
-    """, (
-        data['proceso_id'],
-        data['nombre'],
-        data.get('descripcion'),
-        data.get('responsable_id'),
-        data.get('estado', 'definido'),
-        data.get('horas_estimadas')
-    ))
-    conn.commit()
-    
-    subproceso_id = cursor.lastrowid
-    
-    cursor.execute("""
-        SELECT s.*, u.nombre as responsable_nombre, u.apellido as responsable_apellido
-        FROM subprocesos s
-        LEFT JOIN usuarios u ON s.responsable_id = u.id
-        WHERE s.id = %s
-    """, (subproceso_id,))
-    
-    s = cursor.fetchone()
-    
-    cursor.close()
-    conn.close()
-    
-    subproceso = {
-        'id': s['id'],
-        'proceso_id': s['proceso_id'],
-        'nombre': s['nombre'],
-        'descripcion': s['descripcion'],
-        'responsable_id': s['responsable_id'],
-        'estado': s['estado'],
-        'horas_estimadas': float(s['horas_estimadas']) if s.get('horas_estimadas') else None,
-        'fecha_creacion': s['fecha_creacion'].isoformat() if s.get('fecha_creacion') else None,
-        'fecha_actualizacion': s['fecha_actualizacion'].isoformat() if s.get('fecha_actualizacion') else None,
-        'responsable': {
-            'id': s['responsable_id'],
-            'nombre': s['responsable_nombre'],
-            'apellido': s['responsable_apellido']
-        } if s.get('responsable_id') else None
-    }
+    with transaccion() as cursor:
+        cursor.execute("""
+            INSERT INTO subprocesos (proceso_id, nombre, descripcion, responsable_id, estado, horas_estimadas)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (
+            data['proceso_id'],
+            data['nombre'],
+            data.get('descripcion'),
+            data.get('responsable_id'),
+            data.get('estado', 'definido'),
+            data.get('horas_estimadas')
+        ))
+        
+        subproceso_id = cursor.lastrowid
+        
+        # Contador de codigos REQ-NNN (ver generar_codigos).
+        cursor.execute("INSERT INTO requerimiento_secuencias (subproceso_id) VALUES (%s)", (subproceso_id,))
+        
+        cursor.execute("""
+            SELECT s.*, u.nombre as responsable_nombre, u.apellido as responsable_apellido
+            FROM subprocesos s
+            LEFT JOIN usuarios u ON s.responsable_id = u.id
+            WHERE s.id = %s
+        """, (subproceso_id,))
+        
+        subproceso = serializar_fila(cursor, cursor.fetchone(), (RESPONSABLE,))
+        
+        registrar(cursor, proyecto_de_proceso(cursor, data['proceso_id']), deltas_subproceso(subproceso))
     
     return jsonify({
         'message': 'Subproceso creado',
@@ -152,16 +107,8 @@ def crear_subproceso():
 
 @subprocesos_bp.route('/<int:id>', methods=['PUT'])
 @jwt_required()
+@requires_project_member(entidad='subproceso')
 def actualizar_subproceso(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("SELECT id FROM subprocesos WHERE id = %s", (id,))
-    if not cursor.fetchone():
-        cursor.close()
-        conn.close()
-        return jsonify({'error': 'Subproceso no encontrado'}), 404
-    
     data = request.get_json()
     
     updates = []
@@ -174,39 +121,41 @@ def actualizar_subproceso(id):
             updates.append(f"{campo} = %s")
             values.append(data[campo])
     
-    if updates:
-        values.append(id)
-        cursor.execute(f"UPDATE subprocesos SET {', '.join(updates)} WHERE id = %s", values)
-        conn.commit()
-    
-    cursor.execute("""
-        SELECT s.*, u.nombre as responsable_nombre, u.apellido as responsable_apellido
-        FROM subprocesos s
-        LEFT JOIN usuarios u ON s.responsable_id = u.id
-        WHERE s.id = %s
-    """, (id,))
-    
-    s = cursor.fetchone()
-    
-    cursor.close()
-    conn.close()
-    
-    subproceso = {
-        'id': s['id'],
-        'proceso_id': s['proceso_id'],
-        'nombre': s['nombre'],
-        'descripcion': s['descripcion'],
-        'responsable_id': s['responsable_id'],
-        'estado': s['estado'],
-        'horas_estimadas': float(s['horas_estimadas']) if s.get('horas_estimadas') else None,
-        'fecha_creacion': s['fecha_creacion'].isoformat() if s.get('fecha_creacion') else None,
-        'fecha_actualizacion': s['fecha_actualizacion'].isoformat() if s.get('fecha_actualizacion') else None,
-        'responsable': {
-            'id': s['responsable_id'],
-            'nombre': s['responsable_nombre'],
-            'apellido': s['responsable_apellido']
-        } if s.get('responsable_id') else None
-    }
+    with transaccion() as cursor:
+        anterior = None
+        if 'horas_estimadas' in data:
+            cursor.execute(f"""
+                SELECT s.horas_estimadas, p.proyecto_id
+                FROM {DESDE_SUBPROCESOS}
+                WHERE s.id = %s
+                FOR UPDATE OF s
+            """, (id,))
+            anterior = cursor.fetchone()
+            if not anterior:
+                return jsonify({'error': 'Subproceso no encontrado'}), 404
+        
+        if updates:
+            values.append(id)
+            cursor.execute(f"UPDATE subprocesos SET {', '.join(updates)} WHERE id = %s", values)
+            if cursor.rowcount == 0:
+                return jsonify({'error': 'Subproceso no encontrado'}), 404
+        
+        cursor.execute("""
+            SELECT s.*, u.nombre as responsable_nombre, u.apellido as responsable_apellido
+            FROM subprocesos s
+            LEFT JOIN usuarios u ON s.responsable_id = u.id
+            WHERE s.id = %s
+        """, (id,))
+        
+        subproceso = serializar_fila(cursor, cursor.fetchone(), (RESPONSABLE,))
+        
+        if anterior and subproceso:
+            registrar(cursor, anterior['proyecto_id'], sumar(
+                deltas_subproceso(anterior, -1), deltas_subproceso(subproceso)
+            ))
+    
+    if not subproceso:
+        return jsonify({'error': 'Subproceso no encontrado'}), 404
     
     return jsonify({
         'message': 'Subproceso actualizado',
@@ -216,20 +165,18 @@ def actualizar_subproceso(id):
 
 @subprocesos_bp.route('/<int:id>', methods=['DELETE'])
 @jwt_required()
+@requires_project_member(entidad='subproceso')
 def eliminar_subproceso(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("SELECT id FROM subprocesos WHERE id = %s", (id,))
-    if not cursor.fetchone():
-        cursor.close()
-        conn.close()
+    with transaccion() as cursor:
+        cursor.execute(f"SELECT p.proyecto_id FROM {DESDE_SUBPROCESOS} WHERE s.id = %s", (id,))
+        proyecto = cursor.fetchone()
+        cursor.execute("DELETE FROM subprocesos WHERE id = %s", (id,))
+        eliminados = cursor.rowcount
+        # El borrado arrastra requerimientos, criterios y ejecuciones en cascada.
+        if eliminados:
+            recalcular(cursor, proyecto['proyecto_id'])
+    
+    if not eliminados:
         return jsonify({'error': 'Subproceso no encontrado'}), 404
     
-    cursor.execute("DELETE FROM subprocesos WHERE id = %s", (id,))
-    conn.commit()
-    
-    cursor.close()
-    conn.close()
-    
     return jsonify({'message': 'Subproceso eliminado'}), 200
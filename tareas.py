@@ -0,0 +1,181 @@
+import logging
+import os
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from cola import TrabajoFallido, Worker, tarea
+from eliminacion import leer as leer_purga, purgar, tomar as tomar_purga
+from estadisticas import recalcular
+from exportacion import SECCIONES, ndjson
+from extensions import nueva_conexion
+from importacion import ImportacionInvalida, importar
+
+logger = logging.getLogger('gestproy.trabajos')
+
+
+def ruta_de(archivo):
+    return os.path.join(current_app.config['JOBS_DIR'], archivo)
+
+
+# Los export quedan para descargar y los import que fallaron no se borran solos;
+# pasadas `horas` desde su ultima escritura se eliminan (la descarga responde
+# 410 y un import todavia pendiente falla por archivo inexistente).
+def limpiar_archivos(directorio, horas):
+    limite = time.time() - horas * 3600
+    borrados = 0
+    try:
+        nombres = os.listdir(directorio)
+    except FileNotFoundError:
+        return 0
+    for nombre in nombres:
+        ruta = os.path.join(directorio, nombre)
+        try:
+            if os.path.isfile(ruta) and os.path.getmtime(ruta) < limite:
+                os.remove(ruta)
+                borrados += 1
+        except FileNotFoundError:
+            # Lo borro otro worker.
+            continue
+    if borrados:
+        logger.info('%s archivos de trabajos vencidos eliminados de %s', borrados, directorio)
+    return borrados
+
+
+@tarea('exportar')
+def exportar(parametros, trabajo, avance):
+    proyecto_id = parametros['proyecto_id']
+    os.makedirs(current_app.config['JOBS_DIR'], exist_ok=True)
+    archivo = f"exportacion-{trabajo['id']}.ndjson"
+    temporal = ruta_de(archivo) + '.tmp'
+
+    conn = nueva_conexion()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+        cursor.execute("SELECT id FROM proyectos WHERE id = %s AND eliminado_en IS NULL", (proyecto_id,))
+        if not cursor.fetchone():
+            raise TrabajoFallido('Proyecto no encontrado')
+
+        seccion = lambda indice, tipo: avance(indice / len(SECCIONES), tipo)
+        lineas = 0
+        with open(temporal, 'w', encoding='utf-8') as f:
+            for linea in ndjson(cursor, proyecto_id, current_app.json.dumps,
+                                tamano_lote=current_app.config['EXPORT_BATCH_SIZE'], progreso=seccion):
+                f.write(linea)
+                lineas += 1
+        conn.commit()
+
+        # El archivo final aparece completo o no aparece.
+        os.replace(temporal, ruta_de(archivo))
+    finally:
+        cursor.close()
+        conn.close()
+        # Tras el replace el temporal ya no existe; si sigue ahi, el export fallo.
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+    return {
+        'proyecto_id': proyecto_id,
+        'archivo': archivo,
+        'registros': lineas - 2,
+        'bytes': os.path.getsize(ruta_de(archivo)),
+    }
+
+
+@tarea('importar')
+def importar_archivo(parametros, trabajo, avance):
+    ruta = ruta_de(parametros['archivo'])
+    if not os.path.exists(ruta):
+        raise TrabajoFallido('El archivo a importar ya no existe')
+    tamano = os.path.getsize(ruta) or 1
+
+    conn = nueva_conexion()
+    try:
+        with open(ruta, 'rb') as f:
+            def lineas():
+                for numero, linea in enumerate(f, 1):
+                    if numero % 1000 == 0:
+                        avance(f.tell() / tamano, f'{numero} lineas leidas')
+                    yield linea
+
+            resumen = importar(
+                conn, lineas(), trabajo['creado_por'], current_app.config['IMPORT_BATCH_SIZE'],
+                parametros.get('commit_cada'), parametros.get('nombre')
+            )
+    except ImportacionInvalida as e:
+        raise TrabajoFallido(str(e))
+    finally:
+        conn.close()
+
+    os.remove(ruta)
+    return resumen
+
+
+@tarea('estadisticas')
+def reconstruir_estadisticas(parametros, trabajo, avance):
+    conn = nueva_conexion()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        recalcular(cursor, parametros.get('proyecto_id'))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    return {'proyecto_id': parametros.get('proyecto_id')}
+
+
+# Lo encola eliminar_proyecto. La purga lleva su propio estado en
+# purgas_proyecto, asi que `flask purgar-proyectos` puede seguir usandose sin
+# worker de trabajos; tomar evita que ambos trabajen el mismo proyecto.
+@tarea('purgar')
+def purgar_proyecto(parametros, trabajo, avance):
+    proyecto_id = parametros['proyecto_id']
+    conn = nueva_conexion()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        if not tomar_purga(conn, cursor, proyecto_id):
+            purga = leer_purga(cursor, proyecto_id)
+            if purga is None:
+                raise TrabajoFallido('No hay una eliminacion pendiente para este proyecto')
+            # Completada o activa en otro worker: su avance sigue en /<id>/eliminacion.
+            return {'proyecto_id': proyecto_id, 'estado': purga['estado'], 'filas_borradas': purga['filas_borradas']}
+
+        try:
+            purgar(conn, cursor, proyecto_id, current_app.config['PURGE_BATCH_SIZE'],
+                   current_app.config['PURGE_PAUSE_MS'] / 1000,
+                   lambda tabla, borradas, totales: avance(borradas / totales if totales else 0, tabla))
+        except Exception as e:
+            conn.rollback()
+            cursor.execute("UPDATE purgas_proyecto SET estado = 'error', error = %s WHERE proyecto_id = %s",
+                           (str(e), proyecto_id))
+            conn.commit()
+            raise
+        purga = leer_purga(cursor, proyecto_id)
+    finally:
+        cursor.close()
+        conn.close()
+    return {'proyecto_id': proyecto_id, 'estado': purga['estado'], 'filas_borradas': purga['filas_borradas']}
+
+
+@click.command('procesar-trabajos')
+@click.option('--continuo', is_flag=True, help='Seguir esperando trabajos nuevos.')
+@click.option('--intervalo', type=float, default=2.0, help='Segundos entre consultas cuando la cola esta vacia.')
+@click.option('--maximo', type=int, default=None, help='Terminar tras procesar N trabajos.')
+@with_appcontext
+def procesar_trabajos(continuo, intervalo, maximo):
+    config = current_app.config
+    worker = Worker(
+        nueva_conexion,
+        latido=config['JOBS_HEARTBEAT_SECONDS'],
+        abandonado=config['JOBS_STALE_SECONDS'],
+        backoff=config['JOBS_BACKOFF_SECONDS'],
+        mantenimiento=lambda: limpiar_archivos(config['JOBS_DIR'], config['JOBS_RETENTION_HOURS'])
+    )
+    procesados = worker.correr(continuo, intervalo, maximo)
+    click.echo(f'{procesados} trabajos procesados')
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
-from extensions import get_db_connection
+from catalogo import catalogo
+from extensions import transaccion
 
 tecnicas_bp = Blueprint('tecnicas', __name__)
 
@@ -9,64 +10,23 @@ tecnicas_bp = Blueprint('tecnicas', __name__)
 @jwt_required()
 def listar_tecnicas():
     categoria = request.args.get('categoria')
-    
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    if categoria:
-        cursor.execute("SELECT * FROM tecnicas WHERE activo = TRUE AND categoria = %s", (categoria,))
-    else:
-        cursor.execute("SELECT * FROM tecnicas WHERE activo = TRUE")
-    
-    tecnicas = cursor.fetchall()
-    
-    cursor.close()
-    conn.close()
-    
-    for t in tecnicas:
-        if t.get('fecha_creacion'):
-            t['fecha_creacion'] = t['fecha_creacion'].isoformat()
-    
-    return jsonify(tecnicas), 200
+    return jsonify(catalogo.tecnicas(categoria)), 200
 
 
 @tecnicas_bp.route('/todas', methods=['GET'])
 @jwt_required()
 def listar_todas_tecnicas():
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("SELECT * FROM tecnicas")
-    tecnicas = cursor.fetchall()
-    
-    cursor.close()
-    conn.close()
-    
-    for t in tecnicas:
-        if t.get('fecha_creacion'):
-            t['fecha_creacion'] = t['fecha_creacion'].isoformat()
-    
-    return jsonify(tecnicas), 200
+    return jsonify(catalogo.tecnicas(solo_activas=False)), 200
 
 
 @tecnicas_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
 def obtener_tecnica(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("SELECT * FROM tecnicas WHERE id = %s", (id,))
-    tecnica = cursor.fetchone()
-    
-    cursor.close()
-    conn.close()
+    tecnica = catalogo.tecnica(id)
     
     if not tecnica:
         return jsonify({'error': 'Tecnica no encontrada'}), 404
     
-    if tecnica.get('fecha_creacion'):
-        tecnica['fecha_creacion'] = tecnica['fecha_creacion'].isoformat()
-    
     return jsonify(tecnica), 200
 
 
@@ -81,30 +41,23 @@ def crear_tecnica():
     if not data.get('categoria'):
         return jsonify({'error': 'La categoria es requerida'}), 400
     
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("""
-        INSERT INTO tecnicas (nombre, descripcion, categoria, activo)
-        VALUES (%s, %s, %s, %s)
-    """, (
-        data['nombre'],
-        data.get('descripcion'),
-        data['categoria'],
-        data.get('activo', True)
-    ))
-    conn.commit()
-    
-    tecnica_id = cursor.lastrowid
-    
-    cursor.execute("SELECT * FROM tecnicas WHERE id = %s", (tecnica_id,))
-    tecnica = cursor.fetchone()
-    
-    cursor.close()
-    conn.close()
-    
-    if tecnica.get('fecha_creacion'):
-        tecnica['fecha_creacion'] = tecnica['fecha_creacion'].isoformat()
+    with transaccion() as cursor:
+        cursor.execute("""
+            INSERT INTO tecnicas (nombre, descripcion, categoria, activo)
+            VALUES (%s, %s, %s, %s)
+        """, (
+            data['nombre'],
+            data.get('descripcion'),
+            data['categoria'],
+            data.get('activo', True)
+        ))
+        
+        tecnica_id = cursor.lastrowid
+        
+        cursor.execute("SELECT * FROM tecnicas WHERE id = %s", (tecnica_id,))
+        tecnica = cursor.fetchone()
+    
+    catalogo.recargar()
     
     return jsonify({
         'message': 'Tecnica creada',
@@ -115,15 +68,6 @@ def crear_tecnica():
 @tecnicas_bp.route('/<int:id>', methods=['PUT'])
 @jwt_required()
 def actualizar_tecnica(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("SELECT id FROM tecnicas WHERE id = %s", (id,))
-    if not cursor.fetchone():
-        cursor.close()
-        conn.close()
-        return jsonify({'error': 'Tecnica no encontrada'}), 404
-    
     data = request.get_json()
     
     updates = []
@@ -136,19 +80,21 @@ def actualizar_tecnica(id):
             updates.append(f"{campo} = %s")
             values.append(data[campo])
     
-    if updates:
-        values.append(id)
-        cursor.execute(f"UPDATE tecnicas SET {', '.join(updates)} WHERE id = %s", values)
-        conn.commit()
-    
-    cursor.execute("SELECT * FROM tecnicas WHERE id = %s", (id,))
-    tecnica = cursor.fetchone()
+    with transaccion() as cursor:
+        if updates:
+            values.append(id)
+            cursor.execute(f"UPDATE tecnicas SET {', '.join(updates)} WHERE id = %s", values)
+            if cursor.rowcount == 0:
+                return jsonify({'error': 'Tecnica no encontrada'}), 404
+        
+        cursor.execute("SELECT * FROM tecnicas WHERE id = %s", (id,))
+        tecnica = cursor.fetchone()
     
-    cursor.close()
-    conn.close()
+    if not tecnica:
+        return jsonify({'error': 'Tecnica no encontrada'}), 404
     
-    if tecnica.get('fecha_creacion'):
-        tecnica['fecha_creacion'] = tecnica['fecha_creacion'].isoformat()
+    if updates:
+        catalogo.recargar()
     
     return jsonify({
         'message': 'Tecnica actualizada',
@@ -159,19 +105,13 @@ def actualizar_tecnica(id):
 @tecnicas_bp.route('/<int:id>', methods=['DELETE'])
 @jwt_required()
 def desactivar_tecnica(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    with transaccion() as cursor:
+        cursor.execute("UPDATE tecnicas SET activo = FALSE WHERE id = %s", (id,))
+        encontrados = cursor.rowcount
     
-    cursor.execute("SELECT id FROM tecnicas WHERE id = %s", (id,))
-    if not cursor.fetchone():
-        cursor.close()
-        conn.close()
+    if not encontrados:
         return jsonify({'error': 'Tecnica no encontrada'}), 404
     
-    cursor.execute("UPDATE tecnicas SET activo = FALSE WHERE id = %s", (id,))
-    conn.commit()
-    
-    cursor.close()
-    conn.close()
+    catalogo.recargar()
     
     return jsonify({'message': 'Tecnica desactivada'}), 200
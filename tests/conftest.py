@@ -0,0 +1,128 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Pruebas de integracion contra MySQL. Recrean database/schema.sql (DROP TABLE
+# incluido), asi que solo corren si GESTPROY_TEST_DATABASE apunta a una base
+# descartable; las credenciales salen de MYSQL_HOST/USER/PASSWORD.
+BASE_DE_PRUEBA = os.getenv('GESTPROY_TEST_DATABASE')
+if BASE_DE_PRUEBA:
+    os.environ['MYSQL_DATABASE'] = BASE_DE_PRUEBA
+
+CONSERVADAS = {'tecnicas'}
+ROLES_FIJOS = [(1, 'Product Owner'), (2, 'Technical Leader'), (3, 'Analista')]
+
+
+@pytest.fixture(scope='session')
+def app():
+    if not BASE_DE_PRUEBA:
+        pytest.skip('GESTPROY_TEST_DATABASE no esta definida')
+    pytest.importorskip('flask')
+    pytest.importorskip('mysql.connector')
+    pytest.importorskip('bcrypt')
+
+    from benchmarks.sembrar import aplicar_esquema, conectar
+    conn = conectar()
+    cursor = conn.cursor()
+    aplicar_esquema(cursor)
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+    from app import create_app
+    app = create_app()
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def db(app):
+    from benchmarks.sembrar import conectar
+    from cache import CACHES
+
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    cursor.execute("SHOW TABLES")
+    for (tabla,) in cursor.fetchall():
+        if tabla not in CONSERVADAS:
+            cursor.execute(f"TRUNCATE TABLE `{tabla}`")
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    cursor.executemany("INSERT INTO roles (id, proyecto_id, nombre, es_fijo) VALUES (%s, NULL, %s, TRUE)", ROLES_FIJOS)
+    conn.commit()
+    cursor.close()
+
+    for cache in CACHES.values():
+        cache.clear()
+
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def client(app, db):
+    return app.test_client()
+
+
+def crear_usuario(conn, n):
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO usuarios (nombre, apellido, correo, contrasena) VALUES (%s, 'Prueba', %s, 'x')
+    """, (f'Usuario{n}', f'usuario{n}@example.com'))
+    conn.commit()
+    usuario_id = cursor.lastrowid
+    cursor.close()
+    return usuario_id
+
+
+def crear_proyecto(conn, usuario_id, nombre='Proyecto'):
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO proyectos (nombre, prioridad, creado_por) VALUES (%s, 'media', %s)
+    """, (nombre, usuario_id))
+    proyecto_id = cursor.lastrowid
+    cursor.execute("""
+        INSERT INTO miembros_proyecto (proyecto_id, usuario_id, rol_id, asignado_por) VALUES (%s, %s, 1, %s)
+    """, (proyecto_id, usuario_id, usuario_id))
+    conn.commit()
+    cursor.close()
+    return proyecto_id
+
+
+def auth(app, usuario_id):
+    from flask_jwt_extended import create_access_token
+    with app.app_context():
+        return {'Authorization': f'Bearer {create_access_token(identity=str(usuario_id))}'}
+
+
+# Proyecto con un proceso, un subproceso y una tecnica asignada; devuelve los ids.
+def crear_jerarquia(conn, usuario_id, requerimientos=0):
+    proyecto_id = crear_proyecto(conn, usuario_id)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO procesos (proyecto_id, nombre) VALUES (%s, 'Proceso')", (proyecto_id,))
+    proceso_id = cursor.lastrowid
+    cursor.execute("INSERT INTO subprocesos (proceso_id, nombre) VALUES (%s, 'Subproceso')", (proceso_id,))
+    subproceso_id = cursor.lastrowid
+    cursor.execute("INSERT INTO subproceso_tecnicas (subproceso_id, tecnica_id) VALUES (%s, 2)", (subproceso_id,))
+    subproceso_tecnica_id = cursor.lastrowid
+    for n in range(1, requerimientos + 1):
+        cursor.execute("""
+            INSERT INTO requerimientos (subproceso_id, subproceso_tecnica_id, codigo, titulo, creado_por)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (subproceso_id, subproceso_tecnica_id, f'REQ-{n:03d}', f'Requerimiento {n}', usuario_id))
+        cursor.execute("""
+            INSERT INTO criterios_aceptacion (requerimiento_id, descripcion, orden) VALUES (%s, 'Criterio', 0)
+        """, (cursor.lastrowid,))
+    cursor.execute("INSERT INTO requerimiento_secuencias (subproceso_id, ultimo) VALUES (%s, %s)",
+                   (subproceso_id, requerimientos))
+    conn.commit()
+    cursor.close()
+    return {
+        'proyecto': proyecto_id,
+        'proceso': proceso_id,
+        'subproceso': subproceso_id,
+        'subproceso_tecnica': subproceso_tecnica_id,
+    }
@@ -0,0 +1,55 @@
+from conftest import auth, crear_jerarquia, crear_proyecto, crear_usuario
+
+
+def test_query_distinta_del_cuerpo_se_rechaza(client, app, db):
+    atacante = crear_usuario(db, 1)
+    victima = crear_usuario(db, 2)
+    propio = crear_proyecto(db, atacante, 'Propio')
+    ajeno = crear_proyecto(db, victima, 'Ajeno')
+
+    respuesta = client.post(f'/api/miembros?proyecto_id={propio}', headers=auth(app, atacante),
+                            json={'proyecto_id': ajeno, 'usuario_id': atacante, 'rol_id': 3})
+
+    assert respuesta.status_code == 400
+
+
+def test_cuerpo_de_proyecto_ajeno_se_deniega(client, app, db):
+    atacante = crear_usuario(db, 1)
+    victima = crear_usuario(db, 2)
+    crear_proyecto(db, atacante, 'Propio')
+    ajeno = crear_jerarquia(db, victima)
+
+    encabezados = auth(app, atacante)
+    respuesta = client.post('/api/miembros', headers=encabezados,
+                            json={'proyecto_id': ajeno['proyecto'], 'usuario_id': atacante, 'rol_id': 3})
+    assert respuesta.status_code == 403
+
+    respuesta = client.post('/api/subprocesos', headers=encabezados,
+                            json={'proceso_id': ajeno['proceso'], 'nombre': 'Intruso'})
+    assert respuesta.status_code == 403
+
+
+def test_mismo_valor_en_query_y_cuerpo_pasa(client, app, db):
+    usuario_id = crear_usuario(db, 1)
+    otro = crear_usuario(db, 2)
+    proyecto_id = crear_proyecto(db, usuario_id)
+
+    respuesta = client.post(f'/api/miembros?proyecto_id={proyecto_id}', headers=auth(app, usuario_id),
+                            json={'proyecto_id': proyecto_id, 'usuario_id': otro, 'rol_id': 3})
+
+    assert respuesta.status_code == 201
+
+
+def test_baja_de_miembro_vale_en_la_siguiente_peticion(client, app, db):
+    dueno = crear_usuario(db, 1)
+    otro = crear_usuario(db, 2)
+    proyecto_id = crear_proyecto(db, dueno)
+    encabezados = auth(app, otro)
+
+    miembro = client.post('/api/miembros', headers=auth(app, dueno),
+                          json={'proyecto_id': proyecto_id, 'usuario_id': otro, 'rol_id': 3}).get_json()['miembro']
+    assert client.get(f'/api/proyectos/{proyecto_id}', headers=encabezados).status_code == 200
+
+    assert client.delete(f"/api/miembros/{miembro['id']}", headers=auth(app, dueno)).status_code == 200
+
+    assert client.get(f'/api/proyectos/{proyecto_id}', headers=encabezados).status_code == 403
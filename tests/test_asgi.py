@@ -0,0 +1,79 @@
+import asyncio
+import json
+
+import pytest
+
+from conftest import auth, crear_jerarquia, crear_usuario
+
+
+async def pedir(asgi_app, ruta, query, headers):
+    entrada, salida = asyncio.Queue(), asyncio.Queue()
+    ciclo = asyncio.create_task(asgi_app({'type': 'lifespan'}, entrada.get, salida.put))
+    await entrada.put({'type': 'lifespan.startup'})
+    assert (await salida.get())['type'] == 'lifespan.startup.complete'
+
+    enviados = []
+
+    async def recibir():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def enviar(mensaje):
+        enviados.append(mensaje)
+
+    await asgi_app({
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': ruta,
+        'raw_path': ruta.encode('latin-1'),
+        'query_string': query.encode('latin-1'),
+        'root_path': '',
+        'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers.items()],
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 50000),
+    }, recibir, enviar)
+
+    await entrada.put({'type': 'lifespan.shutdown'})
+    await salida.get()
+    await ciclo
+
+    return enviados[0]['status'], b''.join(m.get('body', b'') for m in enviados[1:])
+
+
+@pytest.fixture
+def asgi_app(app):
+    pytest.importorskip('aiomysql')
+    pytest.importorskip('asgiref')
+    from asgi import AppASGI
+    return AppASGI(app)
+
+
+@pytest.mark.parametrize('plantilla, entidad', [
+    ('/api/requerimientos/subproceso/{}', 'subproceso'),
+    ('/api/requerimientos/tecnica/{}', 'subproceso_tecnica'),
+    ('/api/ejecuciones/tecnica/{}', 'subproceso_tecnica'),
+])
+def test_listado_asgi_igual_a_wsgi(app, db, client, asgi_app, plantilla, entidad):
+    usuario_id = crear_usuario(db, 1)
+    ids = crear_jerarquia(db, usuario_id, requerimientos=3)
+    ruta = plantilla.format(ids[entidad])
+    headers = auth(app, usuario_id)
+
+    wsgi = client.get(f'{ruta}?limit=2', headers=headers)
+    status, cuerpo = asyncio.run(pedir(asgi_app, ruta, 'limit=2', headers))
+
+    assert status == wsgi.status_code == 200
+    assert json.loads(cuerpo) == wsgi.get_json()
+
+
+def test_asgi_rechaza_a_quien_no_es_miembro(app, db, asgi_app):
+    dueno = crear_usuario(db, 1)
+    ajeno = crear_usuario(db, 2)
+    ids = crear_jerarquia(db, dueno, requerimientos=1)
+
+    status, _ = asyncio.run(pedir(
+        asgi_app, f"/api/requerimientos/subproceso/{ids['subproceso']}", '', auth(app, ajeno)
+    ))
+    assert status == 403
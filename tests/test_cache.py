@@ -0,0 +1,78 @@
+import pytest
+
+from cache import _SIN_VALOR, CACHES, TTLCache
+
+
+# Hace de Redis para dos caches que representan dos workers.
+class BackendEnMemoria:
+    def __init__(self):
+        self.datos = {}
+
+    def get(self, clave):
+        return self.datos.get(clave, _SIN_VALOR)
+
+    def set(self, clave, valor, ttl):
+        self.datos[clave] = valor
+
+    def delete(self, clave):
+        self.datos.pop(clave, None)
+
+
+def dos_workers(local):
+    compartido = BackendEnMemoria()
+    caches = [TTLCache(f'prueba_{local}_{n}', ttl=300, compartido=compartido, local=local) for n in range(2)]
+    for cache in caches:
+        CACHES.pop(cache.nombre)
+    return caches
+
+
+def test_invalidacion_llega_a_otro_worker_sin_nivel_local():
+    uno, otro = dos_workers(local=False)
+    uno.set(7, {'activo': True})
+    assert otro.get(7) == {'activo': True}
+
+    uno.invalidate(7)
+
+    assert otro.get(7) is None
+    assert otro.get_or_load(7, lambda: {'activo': False}) == {'activo': False}
+
+
+def test_nivel_local_conserva_el_valor_hasta_el_ttl():
+    uno, otro = dos_workers(local=True)
+    uno.set(7, {'activo': True})
+    assert otro.get(7) == {'activo': True}
+
+    uno.invalidate(7)
+
+    assert otro.get(7) == {'activo': True}
+
+
+def test_sin_compartido_el_nivel_local_vive_ttl_local(monkeypatch):
+    import cache as modulo
+    ahora = [1000.0]
+    monkeypatch.setattr(modulo.time, 'monotonic', lambda: ahora[0])
+    cache = TTLCache('prueba_sin_compartido', ttl=300, local=False, ttl_local=5)
+    CACHES.pop(cache.nombre)
+    cargas = []
+
+    def cargar():
+        cargas.append(1)
+        return 'valor'
+
+    cache.get_or_load(1, cargar)
+    cache.get_or_load(1, cargar)
+    assert len(cargas) == 1
+
+    ahora[0] += 6
+    cache.get_or_load(1, cargar)
+    assert len(cargas) == 2
+
+
+# El fixture db vacia todo lo registrado en CACHES antes de cada prueba.
+def test_todo_lo_registrado_se_puede_vaciar():
+    pytest.importorskip('flask')
+    pytest.importorskip('mysql.connector')
+    import app  # noqa: F401  registra las caches de todos los blueprints
+
+    for cache in list(CACHES.values()):
+        cache.clear()
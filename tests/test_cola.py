@@ -0,0 +1,143 @@
+import os
+import time
+
+import pytest
+
+from conftest import crear_proyecto, crear_usuario
+
+
+def correr_worker(app, maximo=1):
+    from cola import Worker
+    from extensions import nueva_conexion
+    with app.app_context():
+        return Worker(nueva_conexion, latido=1, backoff=0).correr(maximo=maximo)
+
+
+def leer_trabajo(conn, trabajo_id):
+    from cola import leer
+    conn.commit()
+    cursor = conn.cursor(dictionary=True)
+    trabajo = leer(cursor, trabajo_id)
+    cursor.close()
+    return trabajo
+
+
+def encolar_trabajo(conn, tipo, parametros, usuario_id, clave=None):
+    from cola import encolar
+    cursor = conn.cursor(dictionary=True)
+    resultado = encolar(cursor, tipo, parametros, usuario_id, clave)
+    conn.commit()
+    cursor.close()
+    return resultado
+
+
+def test_trabajo_se_toma_y_ejecuta(app, db):
+    from cola import TAREAS, tarea
+
+    recibidos = []
+
+    @tarea('prueba_eco')
+    def eco(parametros, trabajo, avance):
+        recibidos.append((parametros, trabajo['intentos']))
+        avance(0.5, 'a mitad')
+        return {'eco': parametros['valor']}
+
+    try:
+        usuario_id = crear_usuario(db, 1)
+        trabajo_id, creado = encolar_trabajo(db, 'prueba_eco', {'valor': 7}, usuario_id)
+        assert creado
+
+        assert correr_worker(app) == 1
+
+        trabajo = leer_trabajo(db, trabajo_id)
+        assert trabajo['estado'] == 'completado'
+        assert trabajo['resultado'] == {'eco': 7}
+        assert recibidos == [({'valor': 7}, 1)]
+    finally:
+        TAREAS.pop('prueba_eco', None)
+
+
+def test_estadisticas_de_punta_a_punta(app, db):
+    usuario_id = crear_usuario(db, 1)
+    proyecto_id = crear_proyecto(db, usuario_id)
+    trabajo_id, _ = encolar_trabajo(db, 'estadisticas', {'proyecto_id': proyecto_id}, usuario_id)
+
+    import tareas  # noqa: F401 - registra las tareas
+    assert correr_worker(app) == 1
+
+    trabajo = leer_trabajo(db, trabajo_id)
+    assert trabajo['estado'] == 'completado', trabajo['error']
+    assert trabajo['resultado'] == {'proyecto_id': proyecto_id}
+
+
+def test_error_se_reintenta_y_luego_falla(app, db):
+    from cola import TAREAS, tarea
+
+    @tarea('prueba_falla')
+    def falla(parametros, trabajo, avance):
+        raise RuntimeError('fallo transitorio')
+
+    try:
+        usuario_id = crear_usuario(db, 1)
+        trabajo_id, _ = encolar_trabajo(db, 'prueba_falla', {}, usuario_id)
+
+        correr_worker(app)
+        trabajo = leer_trabajo(db, trabajo_id)
+        assert trabajo['estado'] == 'pendiente'
+        assert trabajo['intentos'] == 1
+
+        correr_worker(app, maximo=5)
+        trabajo = leer_trabajo(db, trabajo_id)
+        assert trabajo['estado'] == 'error'
+        assert trabajo['intentos'] == trabajo['max_intentos']
+    finally:
+        TAREAS.pop('prueba_falla', None)
+
+
+def test_clave_de_idempotencia_devuelve_el_mismo_trabajo(app, db):
+    usuario_id = crear_usuario(db, 1)
+    primero, creado = encolar_trabajo(db, 'estadisticas', {'proyecto_id': 1}, usuario_id, 'clave-1')
+    segundo, repetido = encolar_trabajo(db, 'estadisticas', {'proyecto_id': 1}, usuario_id, 'clave-1')
+    assert creado and not repetido
+    assert primero == segundo
+
+
+def test_clave_con_usuario_inexistente_propaga_el_error(app, db):
+    from mysql.connector import errors
+    with pytest.raises(errors.IntegrityError):
+        encolar_trabajo(db, 'estadisticas', {'proyecto_id': 1}, 999999, 'clave-1')
+    db.rollback()
+
+
+def test_export_fallido_no_deja_temporal(app, db, tmp_path, monkeypatch):
+    import tareas
+
+    def ndjson_cortado(*args, **kwargs):
+        yield '{"tipo": "export"}\n'
+        raise RuntimeError('conexion perdida')
+
+    monkeypatch.setitem(app.config, 'JOBS_DIR', str(tmp_path))
+    monkeypatch.setattr(tareas, 'ndjson', ndjson_cortado)
+    usuario_id = crear_usuario(db, 1)
+    proyecto_id = crear_proyecto(db, usuario_id)
+    trabajo_id, _ = encolar_trabajo(db, 'exportar', {'proyecto_id': proyecto_id}, usuario_id)
+
+    correr_worker(app)
+
+    assert leer_trabajo(db, trabajo_id)['error'] == 'conexion perdida'
+    assert os.listdir(tmp_path) == []
+
+
+def test_limpieza_borra_solo_archivos_vencidos(tmp_path):
+    pytest.importorskip('flask')
+    from tareas import limpiar_archivos
+
+    viejo, nuevo = tmp_path / 'exportacion-1.ndjson', tmp_path / 'exportacion-2.ndjson'
+    viejo.write_text('{}')
+    nuevo.write_text('{}')
+    hace_cuatro_dias = time.time() - 4 * 24 * 3600
+    os.utime(viejo, (hace_cuatro_dias, hace_cuatro_dias))
+
+    assert limpiar_archivos(str(tmp_path), 72) == 1
+    assert os.listdir(tmp_path) == ['exportacion-2.ndjson']
+    assert limpiar_archivos(str(tmp_path / 'no-existe'), 72) == 0
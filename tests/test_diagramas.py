@@ -0,0 +1,75 @@
+import pytest
+
+from conftest import auth, crear_proyecto, crear_usuario
+
+
+@pytest.fixture
+def rutas():
+    pytest.importorskip('flask')
+    import diagramas.routes
+    return diagramas.routes
+
+
+def test_add_usa_json_set_en_la_posicion_siguiente(rutas):
+    expr, params = rutas.compilar_operaciones(
+        {'elements': ['a', None, 'c'], 'connections': []},
+        [{'op': 'add', 'item': {'id': 'd'}}, {'op': 'delete', 'id': 'c'}]
+    )
+
+    assert 'JSON_ARRAY_APPEND' not in expr
+    assert params[0] == '$.elements[3]'
+    assert params[2] == '$.elements[2]'
+
+
+def test_arreglo_inexistente_es_operacion_invalida(rutas):
+    with pytest.raises(rutas.OperacionInvalida):
+        rutas.compilar_operaciones({'elements': None, 'connections': []}, [{'op': 'add', 'item': {'id': 'a'}}])
+
+
+@pytest.mark.parametrize('operaciones', [[1], ['x'], [None], [{'tipo': ['element'], 'op': 'add'}], {'op': 'add'}])
+def test_operaciones_malformadas_son_operacion_invalida(rutas, operaciones):
+    with pytest.raises(rutas.OperacionInvalida):
+        rutas.compilar_operaciones({'elements': [], 'connections': []}, operaciones)
+
+
+def crear_diagrama(client, app, db, datos):
+    usuario_id = crear_usuario(db, 1)
+    proyecto_id = crear_proyecto(db, usuario_id)
+    encabezados = auth(app, usuario_id)
+    respuesta = client.post('/api/diagramas', headers=encabezados,
+                            json={'proyecto_id': proyecto_id, 'tipo': 'flujo', 'nombre': 'D', 'datos': datos})
+    return respuesta.get_json()['diagrama'], encabezados
+
+
+def test_patch_respeta_posiciones_de_items_sin_id(client, app, db):
+    datos = {'elements': [{'nombre': 'sin id'}, {'id': 'a', 'x': 0, 'y': 0}], 'connections': []}
+    diagrama, encabezados = crear_diagrama(client, app, db, datos)
+
+    respuesta = client.patch(f"/api/diagramas/{diagrama['id']}", headers=encabezados, json={
+        'version': diagrama['version'],
+        'operaciones': [{'op': 'move', 'id': 'a', 'x': 5, 'y': 7}, {'op': 'add', 'item': {'id': 'b'}}],
+    })
+    assert respuesta.status_code == 200
+
+    elementos = client.get(f"/api/diagramas/{diagrama['id']}", headers=encabezados).get_json()['datos']['elements']
+    assert elementos == [{'nombre': 'sin id'}, {'id': 'a', 'x': 5, 'y': 7}, {'id': 'b'}]
+
+
+def test_patch_sin_arreglo_destino_es_400(client, app, db):
+    diagrama, encabezados = crear_diagrama(client, app, db, {'elements': []})
+
+    respuesta = client.patch(f"/api/diagramas/{diagrama['id']}", headers=encabezados, json={
+        'version': diagrama['version'],
+        'operaciones': [{'op': 'add', 'tipo': 'connection', 'item': {'id': 'c1'}}],
+    })
+
+    assert respuesta.status_code == 400
+
+
+def test_patch_con_operaciones_malformadas_es_400(client, app, db):
+    diagrama, encabezados = crear_diagrama(client, app, db, {'elements': [], 'connections': []})
+
+    for operaciones in ([1], ['x']):
+        respuesta = client.patch(f"/api/diagramas/{diagrama['id']}", headers=encabezados,
+                                 json={'version': diagrama['version'], 'operaciones': operaciones})
+        assert respuesta.status_code == 400
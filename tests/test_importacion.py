@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from conftest import auth, crear_usuario
+
+
+def archivo(*registros):
+    lineas = [{'tipo': 'export', 'version': 1, 'reanudado': False}, *registros, {'tipo': 'fin'}]
+    return '\n'.join(json.dumps(linea) for linea in lineas) + '\n'
+
+
+PROYECTO = {'tipo': 'proyecto', 'id': 1,
+            'datos': {'id': 1, 'nombre': 'Importado', 'estado': 'iniciado', 'prioridad': 'media'}}
+
+
+def contar_proyectos(conn):
+    conn.commit()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM proyectos")
+    total = cursor.fetchone()[0]
+    cursor.close()
+    return total
+
+
+@pytest.mark.parametrize('contenido', [
+    archivo({'tipo': 'proyecto', 'datos': {'nombre': 'Sin id'}}),
+    archivo(PROYECTO, {'tipo': 'proceso', 'datos': {'id': 1, 'nombre': 'Sin id de registro', 'estado': 'definido'}}),
+    archivo(dict(PROYECTO, datos=dict(PROYECTO['datos'], prioridad='urgentisima'))),
+])
+def test_archivo_invalido_es_400_sin_dejar_proyecto(client, app, db, contenido):
+    usuario_id = crear_usuario(db, 1)
+
+    respuesta = client.post('/api/proyectos/import', headers=auth(app, usuario_id), data=contenido,
+                            content_type='application/x-ndjson')
+
+    assert respuesta.status_code == 400
+    assert contar_proyectos(db) == 0
@@ -0,0 +1,27 @@
+import base64
+import json
+
+import pytest
+
+pytest.importorskip('flask')
+
+from pagination import CursorInvalido, codificar_cursor, decodificar_cursor  # noqa: E402
+
+
+def cursor_de(valor):
+    return base64.urlsafe_b64encode(json.dumps(valor).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def test_decodifica_lo_que_codifica():
+    assert decodificar_cursor(codificar_cursor('REQ-001', 7)) == ('REQ-001', 7)
+
+
+@pytest.mark.parametrize('valor', ['ab', 12, None, {'a': 1, 'b': 2}, [1], [1, 2, 3], [1, 'x'], [[1], 2], [1, True]])
+def test_forma_inesperada_es_cursor_invalido(valor):
+    with pytest.raises(CursorInvalido):
+        decodificar_cursor(cursor_de(valor))
+
+
+def test_base64_invalido_es_cursor_invalido():
+    with pytest.raises(CursorInvalido):
+        decodificar_cursor('%%%')
@@ -0,0 +1,82 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import auth, crear_jerarquia, crear_usuario
+
+
+def test_stream_con_criterios_recorre_todos_los_lotes(client, app, db, monkeypatch):
+    monkeypatch.setitem(app.config, 'JSON_STREAM_BATCH_SIZE', 2)
+    usuario_id = crear_usuario(db, 1)
+    ids = crear_jerarquia(db, usuario_id, requerimientos=5)
+
+    respuesta = client.get(f"/api/requerimientos/subproceso/{ids['subproceso']}?stream=1",
+                           headers=auth(app, usuario_id))
+
+    assert respuesta.status_code == 200
+    requerimientos = respuesta.get_json()
+    assert [r['codigo'] for r in requerimientos] == [f'REQ-{n:03d}' for n in range(1, 6)]
+    assert all(len(r['criterios']) == 1 for r in requerimientos)
+
+
+@pytest.mark.parametrize('fields', ['titulo', 'titulo,criterios'])
+def test_stream_aplica_fields_como_sin_stream(client, app, db, monkeypatch, fields):
+    monkeypatch.setitem(app.config, 'JSON_STREAM_BATCH_SIZE', 2)
+    usuario_id = crear_usuario(db, 1)
+    ids = crear_jerarquia(db, usuario_id, requerimientos=3)
+    ruta = f"/api/requerimientos/subproceso/{ids['subproceso']}?fields={fields}"
+
+    sin_stream = client.get(ruta, headers=auth(app, usuario_id)).get_json()
+    con_stream = client.get(ruta + '&stream=1', headers=auth(app, usuario_id)).get_json()
+
+    assert con_stream == sin_stream
+    assert all(set(r) == set(fields.split(',')) for r in con_stream)
+
+
+def crear_en_paralelo(app, usuario_id, ids, hilos=8, por_hilo=5):
+    encabezados = auth(app, usuario_id)
+    cuerpo = {'subproceso_id': ids['subproceso'], 'subproceso_tecnica_id': ids['subproceso_tecnica']}
+    inicio = threading.Barrier(hilos)
+
+    def crear(n):
+        cliente = app.test_client()
+        inicio.wait()
+        return [cliente.post('/api/requerimientos', headers=encabezados, json=dict(cuerpo, titulo=f'R{n}-{i}'))
+                for i in range(por_hilo)]
+
+    with ThreadPoolExecutor(hilos) as ejecutor:
+        return [r for respuestas in ejecutor.map(crear, range(hilos)) for r in respuestas]
+
+
+@pytest.mark.parametrize('con_contador', [True, False])
+def test_altas_concurrentes_no_repiten_codigos(app, db, con_contador):
+    usuario_id = crear_usuario(db, 1)
+    ids = crear_jerarquia(db, usuario_id)
+    if not con_contador:
+        # Subproceso sin fila de contador: la primera alta la crea.
+        cursor = db.cursor()
+        cursor.execute("DELETE FROM requerimiento_secuencias WHERE subproceso_id = %s", (ids['subproceso'],))
+        db.commit()
+        cursor.close()
+
+    respuestas = crear_en_paralelo(app, usuario_id, ids)
+
+    assert [r.status_code for r in respuestas] == [201] * len(respuestas)
+    codigos = sorted(r.get_json()['requerimiento']['codigo'] for r in respuestas)
+    assert codigos == [f'REQ-{n:03d}' for n in range(1, len(respuestas) + 1)]
+
+
+def test_crear_con_tecnica_de_otro_proyecto_es_400(client, app, db):
+    usuario_id = crear_usuario(db, 1)
+    victima = crear_usuario(db, 2)
+    propia = crear_jerarquia(db, usuario_id)
+    ajena = crear_jerarquia(db, victima)
+
+    respuesta = client.post('/api/requerimientos', headers=auth(app, usuario_id), json={
+        'subproceso_id': propia['subproceso'],
+        'subproceso_tecnica_id': ajena['subproceso_tecnica'],
+        'titulo': 'Intruso',
+    })
+
+    assert respuesta.status_code == 400
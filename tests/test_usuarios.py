@@ -0,0 +1,21 @@
+from conftest import auth, crear_usuario
+
+
+def test_editar_el_propio_usuario_invalida_la_cache(client, app, db):
+    usuario_id = crear_usuario(db, 1)
+    encabezados = auth(app, usuario_id)
+    assert client.get('/api/auth/me', headers=encabezados).get_json()['nombre'] == 'Usuario1'
+
+    respuesta = client.put(f'/api/usuarios/{usuario_id}', headers=encabezados, json={'nombre': 'Otro'})
+
+    assert respuesta.status_code == 200
+    assert client.get('/api/auth/me', headers=encabezados).get_json()['nombre'] == 'Otro'
+
+
+def test_no_se_puede_editar_ni_desactivar_a_otro_usuario(client, app, db):
+    usuario_id = crear_usuario(db, 1)
+    otro_id = crear_usuario(db, 2)
+    encabezados = auth(app, usuario_id)
+
+    assert client.put(f'/api/usuarios/{otro_id}', headers=encabezados, json={'nombre': 'X'}).status_code == 403
+    assert client.delete(f'/api/usuarios/{otro_id}', headers=encabezados).status_code == 403
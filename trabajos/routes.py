@@ -0,0 +1,189 @@
+import os
+import shutil
+import uuid
+from flask import Blueprint, current_app, request, jsonify, send_file
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from acceso import requires_project_member
+from cola import buscar, encolar, leer
+from extensions import get_db_connection, transaccion
+from pagination import Pagina
+
+trabajos_bp = Blueprint('trabajos', __name__)
+
+CAMPOS_TRABAJO = {c: f't.{c}' for c in [
+    'id', 'tipo', 'estado', 'progreso', 'mensaje', 'intentos', 'max_intentos', 'error',
+    'fecha_creacion', 'fecha_actualizacion', 'fecha_fin'
+]}
+
+# Tipos que se encolan con POST /api/jobs; 'importar' tiene su propia ruta
+# porque recibe el archivo como cuerpo y 'purgar' lo encola eliminar_proyecto.
+TIPOS_POR_PROYECTO = ('exportar', 'estadisticas')
+
+
+def clave_idempotencia():
+    clave = (request.headers.get('Idempotency-Key') or '').strip()
+    return clave or None
+
+
+def trabajo_propio(cursor, id):
+    trabajo = leer(cursor, id)
+    if not trabajo or str(trabajo['creado_por']) != str(get_jwt_identity()):
+        return None
+    return trabajo
+
+
+def respuesta_encolado(trabajo, creado, tipo):
+    if trabajo['tipo'] != tipo:
+        return jsonify({'error': 'La clave de idempotencia ya se uso para otro tipo de trabajo'}), 409
+    
+    resp = jsonify({
+        'message': 'Trabajo encolado' if creado else 'Trabajo ya encolado',
+        'trabajo': trabajo
+    })
+    resp.headers['Location'] = f"/api/jobs/{trabajo['id']}"
+    return resp, 202 if creado else 200
+
+
+# Las operaciones pesadas no corren en el hilo de la peticion: se registra el
+# trabajo y se responde 202 con su id; `flask procesar-trabajos` lo ejecuta.
+# Idempotency-Key hace que repetir la peticion devuelva el mismo trabajo.
+@trabajos_bp.route('', methods=['POST'])
+@jwt_required()
+@requires_project_member()
+def crear_trabajo():
+    current_user_id = get_jwt_identity()
+    data = request.get_json() or {}
+    tipo = data.get('tipo')
+    clave = clave_idempotencia()
+    
+    if tipo not in TIPOS_POR_PROYECTO:
+        return jsonify({'error': f"tipo debe ser uno de: {', '.join(TIPOS_POR_PROYECTO)}"}), 400
+    if not data.get('proyecto_id'):
+        return jsonify({'error': 'El proyecto_id es requerido'}), 400
+    if clave and len(clave) > 100:
+        return jsonify({'error': 'Idempotency-Key admite hasta 100 caracteres'}), 400
+    
+    with transaccion() as cursor:
+        trabajo_id, creado = encolar(
+            cursor, tipo, {'proyecto_id': int(data['proyecto_id'])}, current_user_id, clave,
+            current_app.config['JOBS_MAX_ATTEMPTS']
+        )
+        trabajo = leer(cursor, trabajo_id)
+    
+    return respuesta_encolado(trabajo, creado, tipo)
+
+
+# Recibe el NDJSON del export como cuerpo, lo guarda en JOBS_DIR y encola la
+# importacion; el proyecto creado queda en el resultado del trabajo.
+@trabajos_bp.route('/importar', methods=['POST'])
+@jwt_required()
+def importar_proyecto():
+    current_user_id = get_jwt_identity()
+    clave = clave_idempotencia()
+    
+    if clave and len(clave) > 100:
+        return jsonify({'error': 'Idempotency-Key admite hasta 100 caracteres'}), 400
+    
+    # Un reintento con la misma clave no vuelve a guardar el archivo.
+    if clave:
+        with transaccion() as cursor:
+            existente = buscar(cursor, current_user_id, clave)
+            trabajo = leer(cursor, existente) if existente else None
+        if trabajo:
+            return respuesta_encolado(trabajo, False, 'importar')
+    
+    directorio = current_app.config['JOBS_DIR']
+    os.makedirs(directorio, exist_ok=True)
+    archivo = f'importacion-{uuid.uuid4().hex}.ndjson'
+    with open(os.path.join(directorio, archivo), 'wb') as f:
+        shutil.copyfileobj(request.stream, f, 1024 * 1024)
+    
+    parametros = {
+        'archivo': archivo,
+        'nombre': request.args.get('nombre'),
+        'commit_cada': request.args.get('commit_cada', type=int)
+    }
+    with transaccion() as cursor:
+        trabajo_id, creado = encolar(
+            cursor, 'importar', parametros, current_user_id, clave, current_app.config['JOBS_MAX_ATTEMPTS']
+        )
+        trabajo = leer(cursor, trabajo_id)
+    
+    if not creado:
+        os.remove(os.path.join(directorio, archivo))
+    
+    return respuesta_encolado(trabajo, creado, 'importar')
+
+
+@trabajos_bp.route('', methods=['GET'])
+@jwt_required()
+def listar_trabajos():
+    current_user_id = get_jwt_identity()
+    pagina = Pagina(CAMPOS_TRABAJO, descendente=True)
+    filtro, params = pagina.filtro()
+    
+    estado = request.args.get('estado')
+    if estado:
+        filtro += " AND t.estado = %s"
+        params += (estado,)
+    
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    
+    cursor.execute(f"""
+        SELECT {pagina.select()} FROM trabajos t
+        WHERE t.creado_por = %s{filtro}
+        {pagina.orden_y_limite()}
+    """, (current_user_id,) + params)
+    trabajos = cursor.fetchall()
+    
+    cursor.close()
+    conn.close()
+    
+    return pagina.respuesta(trabajos)
+
+
+@trabajos_bp.route('/<int:id>', methods=['GET'])
+@jwt_required()
+def obtener_trabajo(id):
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    
+    trabajo = trabajo_propio(cursor, id)
+    
+    cursor.close()
+    conn.close()
+    
+    if not trabajo:
+        return jsonify({'error': 'Trabajo no encontrado'}), 404
+    
+    return jsonify(trabajo), 200
+
+
+@trabajos_bp.route('/<int:id>/resultado', methods=['GET'])
+@jwt_required()
+def descargar_resultado(id):
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    
+    trabajo = trabajo_propio(cursor, id)
+    
+    cursor.close()
+    conn.close()
+    
+    if not trabajo:
+        return jsonify({'error': 'Trabajo no encontrado'}), 404
+    
+    if trabajo['tipo'] != 'exportar' or trabajo['estado'] != 'completado':
+        return jsonify({'error': 'El trabajo no tiene un archivo disponible'}), 409
+    
+    ruta = os.path.join(current_app.config['JOBS_DIR'], trabajo['resultado']['archivo'])
+    if not os.path.exists(ruta):
+        return jsonify({'error': 'El archivo del export ya no esta disponible'}), 410
+    
+    return send_file(
+        ruta,
+        mimetype='application/x-ndjson',
+        as_attachment=True,
+        download_name=f"proyecto-{trabajo['resultado']['proyecto_id']}.ndjson"
+    )
@@ -1,75 +1,87 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from extensions import get_db_connection, bcrypt
+from cache import TTLCache, crear_backend_compartido
+from config import Config
+from extensions import get_db_connection, transaccion
+from hashing import hasher
+from pagination import Pagina
 
 usuarios_bp = Blueprint('usuarios', __name__)
 
+CAMPOS_USUARIO = {c: c for c in ['id', 'nombre', 'apellido', 'correo', 'activo', 'fecha_creacion']}
+
+# Con Redis no hay nivel local: un usuario desactivado deja de verse activo en
+# todos los workers en cuanto se invalida. Sin Redis cada worker guarda el
+# usuario USER_CACHE_TTL_LOCAL segundos; la invalidacion es inmediata en el
+# worker que atendio el cambio y, en los demas, al vencer ese plazo.
+cache_usuarios = TTLCache(
+    'usuarios',
+    maxsize=Config.USER_CACHE_SIZE,
+    ttl=Config.USER_CACHE_TTL,
+    compartido=crear_backend_compartido(Config.CACHE_REDIS_URL, 'gestproy:usuarios'),
+    local=False,
+    ttl_local=Config.USER_CACHE_TTL_LOCAL
+)
+
+
+def obtener_usuario_cacheado(usuario_id):
+    def cargar():
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT id, nombre, apellido, correo, activo, fecha_creacion FROM usuarios WHERE id = %s", (usuario_id,))
+        usuario = cursor.fetchone()
+        cursor.close()
+        conn.close()
+        return usuario
+
+    usuario = cache_usuarios.get_or_load(int(usuario_id), cargar)
+    return dict(usuario) if usuario else None
+
 
 @usuarios_bp.route('', methods=['GET'])
 @jwt_required()
 def listar_usuarios():
+    pagina = Pagina(CAMPOS_USUARIO)
+    filtro, params = pagina.filtro()
+    
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     
-    cursor.execute("SELECT id, nombre, apellido, correo, activo, fecha_creacion FROM usuarios WHERE activo = TRUE")
+    cursor.execute(
+        f"SELECT {pagina.select()} FROM usuarios WHERE activo = TRUE{filtro}{pagina.orden_y_limite()}",
+        params
+    )
     usuarios = cursor.fetchall()
     
     cursor.close()
     conn.close()
     
-    for u in usuarios:
-        if u.get('fecha_creacion'):
-            u['fecha_creacion'] = u['fecha_creacion'].isoformat()
-    
-    return jsonify(usuarios), 200
+    return pagina.respuesta(usuarios)
 
 
 @usuarios_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
 def obtener_usuario(id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("SELECT id, nombre, apellido, correo, activo, fecha_creacion FROM usuarios WHERE id = %s", (id,))
-    usuario = cursor.fetchone()
-    
-    cursor.close()
-    conn.close()
+    usuario = obtener_usuario_cacheado(id)
     
     if not usuario:
         return jsonify({'error': 'Usuario no encontrado'}), 404
     
-    if usuario.get('fecha_creacion'):
-        usuario['fecha_creacion'] = usuario['fecha_creacion'].isoformat()
-    
     return jsonify(usuario), 200
 
 
 @usuarios_bp.route('/<int:id>', methods=['PUT'])
 @jwt_required()
 def actualizar_usuario(id):
-    current_user_id = get_jwt_identity()
+    current_user_id = int(get_jwt_identity())
     
     if current_user_id != id:
         return jsonify({'error': 'No tienes permiso para actualizar este usuario'}), 403
     
     data = request.get_json()
     
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("SELECT id FROM usuarios WHERE id = %s", (id,))
-    if not cursor.fetchone():
-        cursor.close()
-        conn.close()
-        return jsonify({'error': 'Usuario no encontrado'}), 404
-    
-    if 'correo' in data:
-        cursor.execute("SELECT id FROM usuarios WHERE correo = %s AND id != %s", (data['correo'], id))
-        if cursor.fetchone():
-            cursor.close()
-            conn.close()
-            return jsonify({'error': 'El correo ya esta en uso'}), 400
+    # Se calcula antes de tomar la conexion para no retenerla durante el hash.
+    nuevo_hash = hasher.generar(data['contrasena']) if 'contrasena' in data else None
     
     updates = []
     values = []
@@ -85,21 +97,28 @@ def actualizar_usuario(id):
         values.append(data['correo'])
     if 'contrasena' in data:
         updates.append("contrasena = %s")
-        values.append(bcrypt.generate_password_hash(data['contrasena']).decode('utf-8'))
-    
-    if updates:
-        values.append(id)
-        cursor.execute(f"UPDATE usuarios SET {', '.join(updates)} WHERE id = %s", values)
-        conn.commit()
-    
-    cursor.execute("SELECT id, nombre, apellido, correo, activo, fecha_creacion FROM usuarios WHERE id = %s", (id,))
-    usuario = cursor.fetchone()
+        values.append(nuevo_hash)
+    
+    with transaccion() as cursor:
+        if 'correo' in data:
+            cursor.execute("SELECT id FROM usuarios WHERE correo = %s AND id != %s", (data['correo'], id))
+            if cursor.fetchone():
+                return jsonify({'error': 'El correo ya esta en uso'}), 400
+        
+        if updates:
+            values.append(id)
+            cursor.execute(f"UPDATE usuarios SET {', '.join(updates)} WHERE id = %s", values)
+            if cursor.rowcount == 0:
+                return jsonify({'error': 'Usuario no encontrado'}), 404
+        
+        cursor.execute("SELECT id, nombre, apellido, correo, activo, fecha_creacion FROM usuarios WHERE id = %s", (id,))
+        usuario = cursor.fetchone()
     
-    cursor.close()
-    conn.close()
+    if not usuario:
+        return jsonify({'error': 'Usuario no encontrado'}), 404
     
-    if usuario.get('fecha_creacion'):
-        usuario['fecha_creacion'] = usuario['fecha_creacion'].isoformat()
+    if updates:
+        cache_usuarios.invalidate(id)
     
     return jsonify({
         'message': 'Usuario actualizado',
@@ -110,24 +129,18 @@ def actualizar_usuario(id):
 @usuarios_bp.route('/<int:id>', methods=['DELETE'])
 @jwt_required()
 def desactivar_usuario(id):
-    current_user_id = get_jwt_identity()
+    current_user_id = int(get_jwt_identity())
     
     if current_user_id != id:
         return jsonify({'error': 'No tienes permiso para desactivar este usuario'}), 403
     
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    with transaccion() as cursor:
+        cursor.execute("UPDATE usuarios SET activo = FALSE WHERE id = %s", (id,))
+        encontrados = cursor.rowcount
     
-    cursor.execute("SELECT id FROM usuarios WHERE id = %s", (id,))
-    if not cursor.fetchone():
-        cursor.close()
-        conn.close()
+    if not encontrados:
         return jsonify({'error': 'Usuario no encontrado'}), 404
     
-    cursor.execute("UPDATE usuarios SET activo = FALSE WHERE id = %s", (id,))
-    conn.commit()
-    
-    cursor.close()
-    conn.close()
+    cache_usuarios.invalidate(id)
     
     return jsonify({'message': 'Usuario desactivado'}), 200